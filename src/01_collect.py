@@ -1,16 +1,25 @@
 import os
-from sbux_model.collect import get_weekly_prices, save_prices, get_fred_series, gt_monthly_to_weekly, get_google_trends_weekly, get_microstructure_features
+import json
+from fredapi import Fred
+from sbux_model.collect import collect_prices, get_fred_one, get_fred_vintages, gt_monthly_to_weekly, get_google_trends_weekly, get_microstructure_features, run_collection
+from sbux_model.frequency import get_frequency, raw_path
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Every source below runs concurrently (bounded by MAX_WORKERS) with retry and
+# backoff, and only fetches data after the last date already saved in data/raw.
+MAX_WORKERS = 4
+tasks = {}
+
+# Bar frequency of the whole pipeline (src/config/pipeline_config.json)
+freq = get_frequency()
 
 # ---------------------------
 # Market / sector prices
 # ---------------------------
 tickers = ["SBUX", "SPY", "XLY", "^VIX", "MCD"]
-prices_df = get_weekly_prices(tickers)
-save_prices(prices_df)
+tasks["prices"] = lambda: collect_prices(tickers, freq=freq)
 
 # ---------------------------
 # Macro data via FRED
@@ -23,9 +32,17 @@ macro_series = {
     "fed_funds_rate": "FEDFUNDS",
     "CPI": "CPIAUCSL"
 }
+vintage_series = ["fed_funds_rate", "CPI"]
 
 if FRED_API_KEY:
-    get_fred_series(macro_series, FRED_API_KEY)
+    fred = Fred(api_key=FRED_API_KEY)
+    for name, fred_id in macro_series.items():
+        tasks[f"fred_{name}"] = lambda name=name, fred_id=fred_id: get_fred_one(name, fred_id, fred, freq=freq)
+    # Release-date vintages of the revised monthly series, for point-in-time
+    # preprocessing (preprocessing_config.json "point_in_time")
+    for name in vintage_series:
+        fred_id = macro_series[name]
+        tasks[f"fred_{name}_vintages"] = lambda name=name, fred_id=fred_id: get_fred_vintages(name, fred_id, fred)
 else:
     print("FRED_API_KEY not set. Macro series not downloaded.")
 
@@ -33,15 +50,23 @@ else:
 # # Google Trends
 # # ---------------------------
 # monthly_gt_filename = "gt_starbucks_2018_2025_monthly.csv"
-# gt_monthly_to_weekly(monthly_gt_filename)
+# gt_monthly_to_weekly(monthly_gt_filename, freq=freq)
 
 
 # ---------------------------
 # Microstructure / Liquidity
 # ---------------------------
-get_microstructure_features("SBUX")
+tasks["microstructure"] = lambda: get_microstructure_features("SBUX", freq=freq)
 
 # ---------------------------
 # Google Trends (pytrends)
 # ---------------------------
-get_google_trends_weekly("Starbucks")
+# Written to the "gt" raw file that preprocessing reads
+with open("src/config/preprocessing_config.json", "r") as f:
+    gt_path = raw_path(json.load(f)["raw_files"]["gt"]["filename"], freq)
+tasks["google_trends"] = lambda: get_google_trends_weekly("Starbucks", freq=freq, path=gt_path)
+
+results = run_collection(tasks, max_workers=MAX_WORKERS, retries=3, backoff=2.0)
+failed = [name for name, result in results.items() if isinstance(result, Exception)]
+if failed:
+    print(f"Collection failed for: {', '.join(failed)}")
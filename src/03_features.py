@@ -1,7 +1,15 @@
 import os
+import sys
 import json
-from sbux_model.io import read_table, save_table
+import pickle
+import pandas as pd
+from sbux_model.io import read_table, save_table, save_matrix
+from sbux_model.cache import store_stage
 from sbux_model import features as ft
+from sbux_model import pipeline as pl
+from sbux_model import profiling
+from sbux_model import stages
+from sbux_model.frequency import get_frequency, scale_feature_defs
 
 CONFIG_PATH = "src/config/features_config.json"
 
@@ -11,46 +19,95 @@ with open(CONFIG_PATH, "r") as f:
 
 stage_name = config["stage_name"]
 input_stage = config["input_stage"]
-feature_defs = config.get("features", {})
+# Feature windows are in weeks: convert them to rows at the pipeline frequency
+freq = get_frequency()
+feature_defs = scale_feature_defs(config.get("features", {}), freq)
+alpha_args = pl.alpha_args(freq)
+profiling.start_run(stage_name)
+
+# Incremental mode: persisted rolling-window state, so only new rows are computed
+incremental_cfg = config.get("incremental", {})
+incremental = incremental_cfg.get("enabled", False)
+state_path = os.path.join("data", stage_name, incremental_cfg.get("state_filename", "features_state.pkl"))
+
+# Optional memory-mapped copy of the output for training
+matrix_cfg = config.get("matrix", {})
+
+
+def save_outputs(df):
+    paths = [save_table(df, stage_name, config.get("output"))]
+    if matrix_cfg.get("enabled", False):
+        paths += save_matrix(df, stage_name, matrix_cfg, leading=pl.matrix_leading_columns())
+        print(f"Saved feature matrix → {paths[1]}")
+    return paths
+
+
+# Skip the stage if the input table, config and code are unchanged
+cache_key, cached = stages.check("features", config)
+if cached:
+    print(f"Cache hit, reusing features table → {cached[0]}")
+    sys.exit(0)
 
 # Load preprocessed table
 df = read_table(stage_name=input_stage, config=config.get("input"))
 
 # ----------------------------------------------------
-# 1. Compute RETURNS and TARGET (Expected Excess Return)
+# Panel mode: betas, alphas and features for a universe of assets in one pass
 # ----------------------------------------------------
-df = ft.compute_residual_alpha(df, asset_col="SBUX", benchmark_col="SPY", window=52)
+panel_df = pl.feature_panel(config, df)
+if panel_df is not None:
+    panel_cfg = config["panel"]
+    panel_path = save_table(panel_df, panel_cfg.get("stage_name", "features_panel"), panel_cfg.get("output"))
+    print(f"Saved panel features table ({len(panel_cfg['assets'])} assets) → {panel_path}")
 
-# ----------------------------------------------------
-# 2. Apply feature engineering from JSON specs
-# ----------------------------------------------------
-for feat_name, feat_cfg in feature_defs.items():
-    ft.apply_feature(df, feat_cfg)
+state = None
+if incremental and os.path.exists(state_path):
+    with open(state_path, "rb") as f:
+        state = pickle.load(f)
+    if not ft.state_matches(state, feature_defs, **alpha_args):
+        print("Feature specs changed since the state was saved, recomputing in full.")
+        state = None
+
+if state is not None:
+    # ------------------------------------------------
+    # Incremental: recompute from the first revised or new row, from the saved state
+    # ------------------------------------------------
+    rows, new_state = ft.update_features(state, df, feature_defs)
+    if rows is None:
+        print("Rows before the revisable window changed since the state was saved, recomputing in full.")
+    elif len(rows) == 0:
+        print("No new or revised rows since the last run, nothing to update.")
+        sys.exit(0)
+    else:
+        prev_df = read_table(stage_name=stage_name, config=config.get("output"))
+        n_new = int((rows.index > state["tail"].index[-1]).sum())
+        print(f"Updating features from {rows.index[0].date()}: {n_new} new rows, {len(rows) - n_new} recomputed.")
+        pl.report_quality(config, rows)
+
+        df = pd.concat([prev_df.loc[prev_df.index < rows.index[0]], rows[prev_df.columns]])
+        df.dropna(inplace=True)
+
+        output_paths = save_outputs(df)
+        with open(state_path, "wb") as f:
+            pickle.dump(new_state, f)
+        store_stage(stage_name, config, cache_key, output_paths)
+        print(f"Saved features table → {output_paths[0]}")
+        sys.exit(0)
 
 # ----------------------------------------------------
-# 3. Drop NA generated by rolling/lag + final rows with no target
+# Returns, residual alpha target, features from JSON specs, NaN diagnostics
 # ----------------------------------------------------
-print("\nNaN count per column (before dropna):")
-nan_counts = df.isna().sum()
-print(nan_counts[nan_counts > 0].sort_values(ascending=False))
-
-# Ignore first 52 rows (warmup)
-rows_with_nans = df.copy()
-rows_with_nans["num_nans"] = rows_with_nans.isna().sum(axis=1)
-rows_with_nans = rows_with_nans.iloc[52:][rows_with_nans.iloc[52:]["num_nans"] > 0]
-
-if len(rows_with_nans) > 0:
-    # List dates and number of NaNs per row
-    rows_with_nans["nan_columns"] = rows_with_nans.apply(lambda r: list(r[r.isna()].index), axis=1)
-    print("\nDates with NaNs (excluding first 52 warmup rows):")
-    print(rows_with_nans[["num_nans", "nan_columns"]])
+if incremental:
+    df, state = pl.features(config, df, return_state=True)
 else:
-    print("\nNo NaNs found after first 52 rows.")
-
-df.dropna(inplace=True)
+    df = pl.features(config, df)
 
 # ----------------------------------------------------
-# 4. Save output
+# Save output
 # ----------------------------------------------------
-output_path = save_table(df, stage_name, config.get("output"))
-print(f"Saved features table → {output_path}")
+output_paths = save_outputs(df)
+if incremental:
+    with open(state_path, "wb") as f:
+        pickle.dump(state, f)
+store_stage(stage_name, config, cache_key, output_paths)
+print(f"Saved features table → {output_paths[0]}")
@@ -1,17 +1,11 @@
-import os
+import sys
 import json
-import pickle
-import numpy as np
-import pandas as pd
-from datetime import datetime
 
-from sklearn.linear_model import LinearRegression, Ridge, Lasso
-from sklearn.metrics import r2_score
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-
-from sbux_model.io import read_table, save_table
-from sbux_model.model import walk_forward_eval, zero_predictor_baseline
+from sbux_model import pipeline as pl
+from sbux_model import profiling
+from sbux_model import stages
+from sbux_model.io import read_table, read_matrix
+from sbux_model.cache import store_stage
 
 CONFIG_PATH = "src/config/train_config.json"
 
@@ -23,159 +17,38 @@ with open(CONFIG_PATH, "r") as f:
 
 stage_name = config["stage_name"]
 input_stage = config["input_stage"]
-
-# Walk-forward parameters
-wf_cfg = config.get("test", {})
-train_window = wf_cfg.get("train_window", 156)
-horizon = wf_cfg.get("horizon", 4)
-expanding = wf_cfg.get("expanding", False)
+profiling.start_run(stage_name)
 
 # ===============================================================
 # Load feature table
 # ===============================================================
-df = read_table(stage_name=input_stage, config=config.get("input"))
-
 target_col = config["target"]
 feature_cols = config["feature_columns"]
 
-X = df[feature_cols].copy()
-y = df[target_col].copy()
-
-# ===============================================================
-# Print most correlated feature pairs
-# ===============================================================
-def print_top_correlated_features(df, top_n=10):
-    corr_matrix = df.corr().abs()  # absolute correlations
-    # Mask lower triangle
-    mask = np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
-    corr_matrix_triu = corr_matrix.where(mask)
-    # Stack and sort
-    sorted_pairs = corr_matrix_triu.stack().sort_values(ascending=False)
-    print(f"\nTop {top_n} most correlated feature pairs:\n")
-    print(sorted_pairs.head(top_n))
+# Train from the memory-mapped feature matrix instead of the table (see features_config "matrix")
+use_matrix = config.get("input", {}).get("matrix", False)
 
-print_top_correlated_features(X, top_n=10)
+# Skip the stage if the features table (or matrix), config and code are unchanged
+cache_key, cached = stages.check("model", config)
+if cached:
+    print("Cache hit, reusing model artifacts:")
+    for path in cached:
+        print(f" - {path}")
+    sys.exit(0)
 
-# ===============================================================
-# Model selection
-# ===============================================================
-model_cfg = config.get("model", {"type": "ridge"})
-model_type = model_cfg.get("type", "ridge").lower()
-
-if model_type == "linear":
-    base_model = LinearRegression(fit_intercept=model_cfg.get("fit_intercept", True))
-elif model_type == "ridge":
-    base_model = Ridge(alpha=model_cfg.get("alpha", 1.0),
-                       fit_intercept=model_cfg.get("fit_intercept", True))
-elif model_type == "lasso":
-    base_model = Lasso(alpha=model_cfg.get("alpha", 1.0),
-                       fit_intercept=model_cfg.get("fit_intercept", True))
+if use_matrix:
+    df = read_matrix(stage_name=input_stage, config=config.get("input"))
 else:
-    raise ValueError(f"Unknown model type: {model_type}")
-
-pipeline = Pipeline([
-    ("scaler", StandardScaler()),
-    ("model", base_model)
-])
+    df = read_table(stage_name=input_stage, config=config.get("input"),
+                    columns=[target_col] + [c for c in feature_cols if c != target_col])
 
 # ===============================================================
-# Walk-Forward Evaluation
+# Walk-forward evaluation, final fit
 # ===============================================================
-print("Running walk-forward evaluation...\n")
-preds_oos, truths_oos, oos_metrics = walk_forward_eval(
-    X, y, pipeline,
-    train_window=train_window,
-    horizon=horizon,
-    expanding=expanding
-)
+result = pl.train(config, df)
 
 # ===============================================================
-# Zero-predictor baseline (alpha = 0)
+# Save predictions, trained model and metrics
 # ===============================================================
-zero_metrics = zero_predictor_baseline(y, truths_oos.index)
-
-print("\nZero-predictor baseline (alpha = 0):")
-for k, v in zero_metrics.items():
-    print(f"{k}: {v}")
-
-
-print("OOS Metrics:")
-for k, v in oos_metrics.items():
-    print(f"{k}: {v}")
-
-# Save predictions of full data (train & oos) into df
-df["pred_" + target_col] = pipeline.predict(X)
-
-# ===============================================================
-# Fit final model on full dataset
-# ===============================================================
-pipeline.fit(X, y)
-
-# ===============================================================
-# Save predictions
-# ===============================================================
-pred_df = df[[target_col, "pred_" + target_col] + feature_cols]
-pred_output_path = save_table(pred_df, stage_name, config.get("output_predictions"))
-print(f"\nSaved predictions → {pred_output_path}")
-
-# ===============================================================
-# Save trained model
-# ===============================================================
-model_dir = f"data/{stage_name}"
-os.makedirs(model_dir, exist_ok=True)
-
-if config.get("output_model") and config["output_model"].get("filename"):
-    model_path = os.path.join(model_dir, config["output_model"]["filename"])
-else:
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    model_path = os.path.join(model_dir, f"{stage_name}_{timestamp}.pkl")
-
-with open(model_path, "wb") as f:
-    pickle.dump(pipeline, f)
-
-print(f"Saved model → {model_path}")
-
-# ===============================================================
-# Determine OOS cutoff date
-# ===============================================================
-if expanding:
-    oos_start_idx = train_window
-else:
-    oos_start_idx = len(df) - len(truths_oos)  # first OOS row
-oos_cutoff_date = df.index[oos_start_idx - 1] if hasattr(df.index, "__getitem__") else df.iloc[oos_start_idx - 1]["Date"]
-
-# ===============================================================
-# Print feature coefficients
-# ===============================================================
-model_coefs = pipeline.named_steps["model"].coef_
-coef_df = pd.DataFrame({
-    "feature": feature_cols,
-    "coefficient": model_coefs
-}).sort_values(by="coefficient", key=abs, ascending=False)
-
-print("\nFeature coefficients (sorted by absolute value):\n")
-print(coef_df)
-
-
-# ===============================================================
-# Save metrics with extra info
-# ===============================================================
-metrics = {
-    "walk_forward": oos_metrics,
-    "zero_baseline": zero_metrics,
-    "model_type": model_type,
-    "model_params": model_cfg,
-    "n_rows": len(df),
-    "train_window": train_window,
-    "horizon": horizon,
-    "features_used": feature_cols,
-    "target_col": target_col,
-    "predicted_col": "pred_" + target_col,
-    "oos_cutoff_date": str(oos_cutoff_date)
-}
-
-metrics_path = model_path.replace(".pkl", "_metrics.json")
-with open(metrics_path, "w") as f:
-    json.dump(metrics, f, indent=4)
-
-print(f"Saved metrics → {metrics_path}")
+paths = pl.write_model(config, result)
+store_stage(stage_name, config, cache_key, paths)
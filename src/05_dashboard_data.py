@@ -1,7 +1,11 @@
 import os
+import sys
 import json
-import pandas as pd
 from sbux_model.io import read_table, save_table
+from sbux_model.cache import store_stage
+from sbux_model import pipeline as pl
+from sbux_model import profiling
+from sbux_model import stages
 
 CONFIG_PATH = "src/config/dashboard_config.json"
 
@@ -12,26 +16,26 @@ with open(CONFIG_PATH, "r") as f:
 stage_name = config["stage_name"]            # e.g. "dashboard"
 model_stage = config["model_stage"]          # e.g. "model"
 preproc_stage = config["preproc_stage"]      # e.g. "preprocessing"
+profiling.start_run(stage_name)
 
 # Columns from preprocessing CSV to include
 preproc_cols = config.get("preproc_columns", [])
 
+# Skip the stage if both input tables, config and code are unchanged
+cache_key, cached = stages.check("dashboard", config)
+if cached:
+    print(f"Cache hit, reusing dashboard table → {cached[0]}")
+    sys.exit(0)
+
 # --- Read latest tables ---
 model_df = read_table(stage_name=model_stage, config=config.get("input_model"))
-preproc_df = read_table(stage_name=preproc_stage, config=config.get("input_preproc"))
-
-# Select columns from preprocessing
-if preproc_cols:
-    preproc_df = preproc_df[preproc_cols]
-else:
-    preproc_df = preproc_df.copy()  # keep all if empty
-
-# Remove any columns that overlap with model_df
-preproc_df = preproc_df.loc[:, ~preproc_df.columns.isin(model_df.columns)]
+# Only load the configured preprocessing columns (all if empty)
+preproc_df = read_table(stage_name=preproc_stage, config=config.get("input_preproc"),
+                        columns=preproc_cols or None)
 
-# Merge on index (Date)
-dashboard_df = model_df.join(preproc_df, how="left")
+dashboard_df = pl.dashboard(config, model_df, preproc_df)
 
 # Save dashboard-ready CSV
 output_path = save_table(dashboard_df, stage_name, config.get("output"))
+store_stage(stage_name, config, cache_key, [output_path])
 print(f"Saved dashboard table → {output_path}")
@@ -0,0 +1,50 @@
+# src/backtest.py
+import os
+import json
+import argparse
+
+from sbux_model import backtest
+from sbux_model import pipeline as pl
+from sbux_model import profiling
+from sbux_model.io import read_table, save_table
+
+BACKTEST_CONFIG = "src/config/backtest_config.json"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the walk-forward predictions of the latest model as a long/short strategy")
+    parser.add_argument("--config", default=BACKTEST_CONFIG, help="Strategy, costs and sweep grid")
+    parser.add_argument("--no-sweep", action="store_true", help="Only backtest the configured strategy")
+    parser.add_argument("--top", type=int, default=10, help="Sweep rows printed")
+    args = parser.parse_args()
+
+    config = pl.load_config(args.config)
+    stage_name = config["stage_name"]
+    profiling.start_run(stage_name)
+
+    pred_col, returns_col = config["prediction"], config["returns"]
+    df = read_table(stage_name=config["input_stage"], config=config.get("input"), columns=[returns_col, pred_col])
+
+    # Configured strategy: per-bar P&L table and summary
+    bars_df, stats = backtest.run(df, pred_col, returns_col, config["strategy"])
+    print(f"Backtest {bars_df.index[0]} to {bars_df.index[-1]} ({len(bars_df)} bars), {config['strategy']}:")
+    for k, v in stats.items():
+        print(f"{k}: {v}")
+
+    output_path = save_table(bars_df, stage_name, config.get("output"))
+    summary_path = os.path.splitext(output_path)[0] + "_summary.json"
+    with open(summary_path, "w") as f:
+        json.dump({"prediction": pred_col, "returns": returns_col, "strategy": config["strategy"], **stats}, f, indent=4)
+    print(f"\nSaved backtest → {output_path}")
+    print(f"Saved summary → {summary_path}")
+
+    # Every combination of the sweep grid at once
+    sweep_cfg = config.get("sweep", {})
+    if sweep_cfg.get("enabled", False) and not args.no_sweep:
+        metric = sweep_cfg.get("metric", "sharpe")
+        with profiling.span("backtest.sweep"):
+            results = backtest.sweep(df, pred_col, returns_col, sweep_cfg)
+        results = results.sort_values(metric, ascending=metric in ("ann_vol", "turnover")).reset_index(drop=True)
+        print(f"\nSweep of {len(results)} combinations, top {args.top} by {metric}:")
+        print(results.head(args.top).to_string())
+        sweep_path = save_table(results, sweep_cfg.get("stage_name", f"{stage_name}_sweep"), sweep_cfg.get("output"))
+        print(f"\nSaved sweep → {sweep_path}")
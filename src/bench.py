@@ -0,0 +1,219 @@
+# src/bench.py
+import os
+import sys
+import json
+import shutil
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from sbux_model import preprocessing as pp
+from sbux_model import features as ft
+from sbux_model import panel as pn
+from sbux_model.io import save_table, read_table
+from sbux_model.model import build_pipeline, walk_forward_eval, walk_forward_eval_linear
+
+BENCH_DIR = "data/bench"
+
+# rows, assets, feature specs, frequency
+PRESETS = {
+    "small": {"rows": 400, "assets": 1, "features": 28, "freq": "W-MON"},
+    "medium": {"rows": 5000, "assets": 100, "features": 60, "freq": "B"},
+    "large": {"rows": 10000, "assets": 1000, "features": 120, "freq": "B"},
+}
+
+FEATURE_TYPES = ["diff", "rolling_mean", "zscore", "momentum"]
+WINDOWS = [4, 8, 16, 26]
+
+
+# ---------------------------------------------------------------
+# Synthetic inputs shaped like data/raw and the stage tables
+# ---------------------------------------------------------------
+def synthetic_prices(rows, assets, freq="W-MON", seed=0):
+    """Geometric random-walk prices: one column per asset plus SPY, indexed by date."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2000-01-03", periods=rows, freq=freq, name="Date")
+    market = rng.normal(0.001, 0.02, rows)
+    betas = rng.uniform(0.5, 1.5, assets)
+    rets = market[:, None] * betas + rng.normal(0, 0.02, (rows, assets))
+    prices = 100 * np.cumprod(1 + rets, axis=0)
+    cols = ["SBUX"] + [f"A{i:04d}" for i in range(1, assets)]
+    df = pd.DataFrame(prices, index=index, columns=cols)
+    df["SPY"] = 100 * np.cumprod(1 + market)
+    return df
+
+
+def synthetic_raw_file(rows, freq="W-MON", seed=0, sparse=False):
+    """A raw CSV-shaped frame: 'Date' column then one value column (NaN gaps if sparse)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-03", periods=rows, freq=freq)
+    values = rng.normal(size=rows).cumsum()
+    if sparse:
+        values[rng.random(rows) < 0.75] = np.nan
+    return pd.DataFrame({"Date": dates.strftime("%Y-%m-%d"), "value": values})
+
+
+def synthetic_feature_defs(n_features, columns):
+    """Feature specs cycling through types, windows and columns."""
+    defs = {}
+    i = 0
+    while len(defs) < n_features:
+        col = columns[i % len(columns)]
+        ftype = FEATURE_TYPES[(i // len(columns)) % len(FEATURE_TYPES)]
+        window = WINDOWS[(i // (len(columns) * len(FEATURE_TYPES))) % len(WINDOWS)]
+        key = "lag" if ftype == "diff" else "window"
+        defs[f"f{i}"] = {"type": ftype, "column": col, key: window}
+        i += 1
+    defs["lagged_alpha"] = {"type": "lagged_alpha", "column": "alpha", "lags": [1, 2, 4, 8], "mas": [4, 12]}
+    return defs
+
+
+# ---------------------------------------------------------------
+# Timing harness
+# ---------------------------------------------------------------
+def measure(func, repeat=3):
+    """Best-of-`repeat` wall time and the peak traced memory of one call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"wall_s": min(times), "peak_mb": peak / 2**20}
+
+
+def run_benchmarks(rows, assets, n_features, freq, repeat=3, stages=None):
+    prices = synthetic_prices(rows, assets, freq)
+    base = pd.concat([prices[["SBUX", "SPY"]], prices.drop(columns=["SBUX", "SPY"]).iloc[:, :8]], axis=1)
+    alpha_df = ft.compute_residual_alpha(base.copy())
+    defs = synthetic_feature_defs(n_features, list(base.columns))
+    features_df = ft.apply_features(alpha_df.copy(), defs).dropna()
+
+    feature_cols = [c for c in features_df.columns if c not in ("alpha_fwd_1", "alpha", "beta_roll")][:20]
+    X, y = features_df[feature_cols], features_df["alpha_fwd_1"]
+    train_window = max(50, len(X) // 5)
+    horizon = max(4, len(X) // 200)
+
+    raw = synthetic_raw_file(rows, freq)
+    raw_sparse = synthetic_raw_file(rows, freq, sparse=True)
+    tmp = tempfile.mkdtemp(prefix="sbux_bench_")
+
+    def io_roundtrip(fmt):
+        def run():
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                save_table(features_df, "bench", {"filename": f"bench.{fmt}", "format": fmt})
+                read_table("bench", {"filename": f"bench.{fmt}"})
+            finally:
+                os.chdir(cwd)
+        return run
+
+    cases = {
+        "resample_weekly_last": lambda: pp.resample_weekly_last(raw.copy()),
+        "resample_weekly_mean": lambda: pp.resample_weekly_mean(raw.copy()),
+        "resample_weekly_ffill": lambda: pp.resample_weekly_ffill(raw_sparse.copy()),
+        "compute_residual_alpha": lambda: ft.compute_residual_alpha(base.copy()),
+        "apply_feature_loop": lambda: [ft.apply_feature(d, c) for d in [alpha_df.copy()] for c in defs.values()],
+        "apply_features_fused": lambda: ft.apply_features(alpha_df.copy(), defs),
+        "panel_residual_alpha": lambda: pn.panel_residual_alpha(
+            prices.drop(columns="SPY").to_numpy(), prices["SPY"].to_numpy()),
+        "walk_forward_eval": lambda: walk_forward_eval(
+            X, y, build_pipeline({"type": "ridge", "alpha": 1.0}), train_window, horizon),
+        "walk_forward_eval_linear": lambda: walk_forward_eval_linear(
+            X, y, train_window, horizon, alpha=1.0),
+        "save_read_csv": io_roundtrip("csv"),
+        "save_read_parquet": io_roundtrip("parquet"),
+    }
+
+    results = {}
+    for name, func in cases.items():
+        if stages and name not in stages:
+            continue
+        try:
+            results[name] = measure(func, repeat)
+            print(f"{name:28s} {results[name]['wall_s']:9.4f}s  {results[name]['peak_mb']:9.1f} MB")
+        except ImportError as e:
+            # e.g. pyarrow missing for parquet
+            print(f"{name:28s} skipped ({e})")
+    shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, current_params, baseline_path, threshold):
+    """Print wall-time ratios against a saved run; return the names that regressed."""
+    with open(baseline_path, "r") as f:
+        saved = json.load(f)
+    baseline = saved["results"]
+    if saved.get("params") != current_params:
+        print(f"Warning: baseline was run with {saved.get('params')}, not {current_params}")
+    regressions = []
+    print(f"\nComparison with {baseline_path} (ratio = current / baseline):")
+    for name, res in current.items():
+        if name not in baseline:
+            continue
+        ratio = res["wall_s"] / baseline[name]["wall_s"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:28s} {ratio:6.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data")
+    parser.add_argument("--preset", choices=list(PRESETS), default="small")
+    parser.add_argument("--rows", type=int, help="Number of time rows (overrides preset)")
+    parser.add_argument("--assets", type=int, help="Number of assets (overrides preset)")
+    parser.add_argument("--features", type=int, help="Number of feature specs (overrides preset)")
+    parser.add_argument("--freq", help="Pandas frequency of the synthetic index, e.g. W-MON or B")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per stage (best is kept)")
+    parser.add_argument("--stages", nargs="*", help="Only run these stages")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Ratio above which a stage counts as regressed")
+    args = parser.parse_args()
+
+    params = dict(PRESETS[args.preset])
+    for key in ("rows", "assets", "features", "freq"):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    print(f"Benchmarking with {params}\n")
+    results = run_benchmarks(params["rows"], params["assets"], params["features"], params["freq"],
+                             repeat=args.repeat, stages=args.stages)
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(BENCH_DIR, f"bench_{args.preset}_{timestamp}.json")
+    with open(out_path, "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "timestamp": timestamp,
+            "params": params,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "results": results,
+        }, f, indent=4)
+    print(f"\nSaved benchmark results → {out_path}")
+
+    if args.compare and compare(results, params, args.compare, args.threshold):
+        sys.exit(1)
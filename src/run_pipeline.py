@@ -0,0 +1,32 @@
+# src/run_pipeline.py
+import argparse
+
+from sbux_model import pipeline as pl
+from sbux_model import profiling
+
+if __name__ == "__main__":
+    config = pl.load_config(pl.PIPELINE_CONFIG)
+
+    parser = argparse.ArgumentParser(description="Run pipeline stages in one process, passing tables in memory")
+    parser.add_argument("--stages", nargs="*", choices=list(pl.STAGE_FUNCTIONS),
+                        help="Stages to run (default from pipeline_config.json); missing inputs are read from disk")
+    parser.add_argument("--write", nargs="*", choices=list(pl.STAGE_FUNCTIONS),
+                        help="Stages whose outputs are saved (default from pipeline_config.json)")
+    parser.add_argument("--write-all", action="store_true", help="Save the outputs of every stage run")
+    parser.add_argument("--no-write", action="store_true", help="Save nothing")
+    parser.add_argument("--workers", type=int, help="Independent stages run concurrently")
+    args = parser.parse_args()
+
+    stages = args.stages or config.get("stages")
+    write = config.get("write", []) if args.write is None else args.write
+    if args.write_all:
+        write = stages
+    if args.no_write:
+        write = []
+
+    profiling.start_run("pipeline")
+    pl.run_pipeline(
+        stages=stages,
+        write=set(write),
+        max_workers=args.workers or config.get("max_workers", 1)
+    )
@@ -0,0 +1,142 @@
+import os
+import json
+
+import numpy as np
+
+# Only NumPy is imported here, so a scoring process can load a model without sklearn or pandas
+ARTIFACT_VERSION = 1
+
+
+# ---------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------
+def fold_scaler(mean, scale, coef, intercept):
+    """
+    Fold standardisation into a linear model: (x - mean) / scale @ coef + intercept
+    becomes x @ w + b. Returns (w, b).
+    """
+    w = np.asarray(coef, dtype=float) / np.asarray(scale, dtype=float)
+    return w, float(intercept - np.asarray(mean, dtype=float) @ w)
+
+
+def artifact_paths(stem):
+    """Manifest and arrays paths of the bundle saved under `stem` (no extension)."""
+    return f"{stem}_artifact.json", f"{stem}_artifact.npz"
+
+
+def artifact_stem(manifest_path):
+    """Inverse of `artifact_paths`: the stem of a bundle from its manifest path."""
+    if not manifest_path.endswith("_artifact.json"):
+        raise ValueError(f"Not a model artifact manifest: {manifest_path}")
+    return manifest_path[:-len("_artifact.json")]
+
+
+def export_linear(pipeline, stem, feature_columns, target, metrics=None, model_cfg=None):
+    """
+    Save a fitted StandardScaler + linear model pipeline as a NumPy/JSON bundle.
+
+    The arrays (scaler mean/scale, coefficients, intercept) go in an .npz and the
+    feature list, target, model config and metrics in a JSON manifest, so loading
+    needs neither sklearn nor pickle.
+
+    Args:
+        pipeline: fitted pipeline from `model.build_pipeline`
+        stem (str): output path without extension, e.g. "data/model/model_20250101_000000"
+        feature_columns (list): model inputs, in training order
+        target (str): target column name
+        metrics (dict, optional): walk-forward metrics to keep alongside the weights
+        model_cfg (dict, optional): the `model` block of train_config.json
+    Returns:
+        list: [manifest path, arrays path]
+    """
+    steps = getattr(pipeline, "named_steps", {})
+    scaler, model = steps.get("scaler"), steps.get("model")
+    if scaler is None or model is None or not hasattr(model, "coef_"):
+        raise ValueError("Only fitted scaler + linear model pipelines can be exported")
+
+    coef = np.ravel(model.coef_).astype(float)
+    if len(coef) != len(feature_columns):
+        raise ValueError(f"Model has {len(coef)} coefficients but {len(feature_columns)} feature columns")
+
+    manifest_path, arrays_path = artifact_paths(stem)
+    np.savez(
+        arrays_path,
+        mean=np.asarray(scaler.mean_, dtype=float),
+        scale=np.asarray(scaler.scale_, dtype=float),
+        coef=coef,
+        intercept=np.float64(np.ravel(model.intercept_)[0] if np.ndim(model.intercept_) else model.intercept_),
+    )
+    manifest = {
+        "version": ARTIFACT_VERSION,
+        "estimator": type(model).__name__,
+        "model": model_cfg or {},
+        "target": target,
+        "feature_columns": list(feature_columns),
+        "metrics": metrics or {},
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+    return [manifest_path, arrays_path]
+
+
+# ---------------------------------------------------------------
+# Lightweight predictor
+# ---------------------------------------------------------------
+class LinearPredictor:
+    """
+    Scores with the weights of an exported linear model.
+
+    The scaler is folded into the coefficients at load time, so a prediction is
+    a single dot product: x @ weights + intercept.
+
+    Args:
+        weights (np.ndarray): (n_features,) coefficients on the raw (unscaled) features
+        intercept (float): intercept on the raw features
+        feature_columns (list): feature names, in the order of `weights`
+        target (str): target column name
+        metadata (dict, optional): the rest of the manifest (metrics, model config)
+    """
+
+    def __init__(self, weights, intercept, feature_columns, target="alpha_fwd_1", metadata=None):
+        self.weights = np.asarray(weights, dtype=float)
+        self.intercept = float(intercept)
+        self.feature_columns = list(feature_columns)
+        self.target = target
+        self.metadata = metadata or {}
+
+    @classmethod
+    def load(cls, manifest_path):
+        """Load a bundle written by `export_linear` from its manifest path."""
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact version: {manifest.get('version')}")
+
+        # Next to the manifest under the same stem: cache hits rename both with a new timestamp
+        _, arrays_path = artifact_paths(artifact_stem(manifest_path))
+        with np.load(arrays_path, allow_pickle=False) as arrays:
+            weights, intercept = fold_scaler(arrays["mean"], arrays["scale"], arrays["coef"], arrays["intercept"])
+
+        metadata = {k: v for k, v in manifest.items() if k not in ("feature_columns", "target", "arrays")}
+        return cls(weights, intercept, manifest["feature_columns"], manifest["target"], metadata)
+
+    def predict(self, X):
+        """
+        Args:
+            X: (n, n_features) or (n_features,) array, columns in `feature_columns` order
+        Returns:
+            np.ndarray or float
+        """
+        return np.asarray(X, dtype=float) @ self.weights + self.intercept
+
+    def predict_row(self, row):
+        """Predict one row given as a dict of feature name -> value."""
+        return float(self.predict([row[c] for c in self.feature_columns]))
+
+
+def latest_artifact_path(stage_name="model"):
+    model_dir = os.path.join("data", stage_name)
+    manifests = [f for f in os.listdir(model_dir) if f.startswith(stage_name) and f.endswith("_artifact.json")]
+    if not manifests:
+        raise FileNotFoundError(f"No model artifact found in {model_dir}")
+    return os.path.join(model_dir, max(manifests))
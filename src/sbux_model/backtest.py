@@ -0,0 +1,279 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from sbux_model import rolling
+from sbux_model.frequency import get_frequency, bars
+
+SIGNALS = ("threshold", "rank")
+STRATEGY_DEFAULTS = {
+    "signal": "threshold",
+    "threshold": 0.0,
+    "rank_window": 52,      # weeks
+    "quantile": 0.3,
+    "vol_target": None,     # annualised, None for unit positions
+    "vol_window": 26,       # weeks
+    "max_leverage": 2.0,
+    "cost_bps": 0.0,        # per unit of turnover
+}
+
+
+def periods_per_year(freq):
+    return 52 * freq["bars_per_week"]
+
+
+# ---------------------------------------------------------------
+# Positions: (T,) predictions, parameters broadcast as (..., 1)
+# ---------------------------------------------------------------
+def threshold_positions(pred, threshold=0.0):
+    """Long one unit when the prediction is above `threshold`, short below -`threshold`, flat otherwise (and on NaN)."""
+    pred = np.asarray(pred, dtype=float)
+    return np.where(np.abs(pred) > np.asarray(threshold, dtype=float), np.sign(pred), 0.0)
+
+
+def trailing_rank(pred, window):
+    """
+    Percentile of each prediction among the `window` predictions before it (ties
+    count half), NaN for the first `window` rows.
+    """
+    pred = np.asarray(pred, dtype=float)
+    out = np.full(len(pred), np.nan)
+    if len(pred) > window:
+        past = sliding_window_view(pred[:-1], window)   # row i: pred[i:i + window]
+        current = pred[window:, None]
+        out[window:] = ((past < current).sum(axis=1) + 0.5 * (past == current).sum(axis=1)) / window
+    return out
+
+
+def rank_positions(rank, quantile=0.3):
+    """Long in the top `quantile` of the trailing rank, short in the bottom `quantile`, flat otherwise."""
+    quantile = np.asarray(quantile, dtype=float)
+    return np.where(rank >= 1 - quantile, 1.0, np.where(rank <= quantile, -1.0, 0.0))
+
+
+def vol_leverage(returns, window, vol_target=None, max_leverage=2.0, annualisation=52):
+    """
+    Leverage scaling a unit position to `vol_target` annualised volatility, from
+    the standard deviation of the `window` returns realised before each bar
+    (`returns[t]` is realised at t + 1), capped at `max_leverage`; 0 until `window`
+    returns are known, 1 where `vol_target` is None/NaN.
+    """
+    realised = rolling.shift(rolling.rolling_std(returns, window), 1) * np.sqrt(annualisation)
+    vol_target = np.asarray(np.nan if vol_target is None else vol_target, dtype=float)
+    max_leverage = np.asarray(max_leverage, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        leverage = np.nan_to_num(np.minimum(vol_target / realised, max_leverage), nan=0.0)
+    return np.where(np.isnan(vol_target), 1.0, leverage)
+
+
+# ---------------------------------------------------------------
+# P&L and statistics, along the last (time) axis
+# ---------------------------------------------------------------
+def pnl(positions, returns, cost_bps=0.0):
+    """
+    Gross and net P&L of holding `positions[t]` over `returns[t]`, paying
+    `cost_bps` per unit traded (the first bar trades from flat).
+
+    Returns:
+        (gross, turnover, net)
+    """
+    positions = np.asarray(positions, dtype=float)
+    turnover = np.abs(np.diff(positions, axis=-1, prepend=0.0))
+    gross = positions * returns
+    net = gross - np.asarray(cost_bps, dtype=float) * 1e-4 * turnover
+    return gross, turnover, net
+
+
+def equity_drawdown(net):
+    """Compounded equity (starting at 1) and drawdown from its running peak."""
+    equity = np.cumprod(1.0 + net, axis=-1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=-1), 1.0)
+    return equity, equity / peak - 1.0
+
+
+def performance(net, turnover, positions, annualisation=52):
+    """
+    Summary statistics of net returns along the last axis.
+
+    Returns:
+        dict of arrays (floats for 1-D input): annualised return, volatility and
+        Sharpe ratio, total return, max drawdown, annual turnover, exposure and
+        hit rate of the bars with a position
+    """
+    n = net.shape[-1]
+    mean = net.mean(axis=-1)
+    std = net.std(axis=-1, ddof=1) if n > 1 else np.full(net.shape[:-1], np.nan)
+    equity, drawdown = equity_drawdown(net)
+    active = positions != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(annualisation), np.nan)
+        hit_rate = ((net > 0) & active).sum(axis=-1) / active.sum(axis=-1)
+    stats = {
+        "ann_return": mean * annualisation,
+        "ann_vol": std * np.sqrt(annualisation),
+        "sharpe": sharpe,
+        "total_return": equity[..., -1] - 1.0,
+        "max_drawdown": drawdown.min(axis=-1),
+        "turnover": turnover.mean(axis=-1) * annualisation,
+        "exposure": np.abs(positions).mean(axis=-1),
+        "hit_rate": hit_rate,
+    }
+    return {k: float(v) for k, v in stats.items()} if net.ndim == 1 else stats
+
+
+# ---------------------------------------------------------------
+# Single strategy
+# ---------------------------------------------------------------
+def prepare(df, pred_col, returns_col):
+    """
+    Predictions and realised returns of a predictions table.
+
+    Returns:
+        (pred, returns, start, index): arrays over the rows with a known return, and
+        the first row with a prediction; rows before `start` only feed the volatility estimate
+    """
+    df = df[df[returns_col].notna()]
+    pred = df[pred_col].to_numpy(dtype=float)
+    predicted = np.flatnonzero(~np.isnan(pred))
+    if not len(predicted):
+        raise ValueError(f"No predictions in column {pred_col}")
+    return pred, df[returns_col].to_numpy(dtype=float), int(predicted[0]), df.index
+
+
+def strategy_positions(pred, returns, start, strategy, freq):
+    """Positions over rows [start, T) of one strategy config (see STRATEGY_DEFAULTS)."""
+    strategy = {**STRATEGY_DEFAULTS, **strategy}
+    signal = strategy["signal"]
+    oos = pred[start:]
+    if signal == "threshold":
+        base = threshold_positions(oos, strategy["threshold"])
+    elif signal == "rank":
+        base = rank_positions(trailing_rank(oos, bars(strategy["rank_window"], freq)), strategy["quantile"])
+    else:
+        raise ValueError(f"Unknown signal: {signal} (expected one of {', '.join(SIGNALS)})")
+    leverage = vol_leverage(returns, bars(strategy["vol_window"], freq), strategy["vol_target"],
+                            strategy["max_leverage"], periods_per_year(freq))
+    return base * leverage[start:]
+
+
+def run(df, pred_col, returns_col, strategy, freq=None):
+    """
+    Backtest one strategy on the walk-forward predictions of a model table.
+
+    Args:
+        df (pd.DataFrame): model predictions table
+        pred_col (str): walk-forward prediction column, e.g. "pred_oos_alpha_fwd_1"
+        returns_col (str): return realised over the bar after each row, e.g. "alpha_fwd_1"
+        strategy (dict): signal, its parameters, vol targeting and costs (see STRATEGY_DEFAULTS)
+    Returns:
+        (bars_df, stats): per-bar positions, P&L, equity and drawdown, and `performance`
+    """
+    freq = freq or get_frequency()
+    strategy = {**STRATEGY_DEFAULTS, **strategy}
+    pred, returns, start, index = prepare(df, pred_col, returns_col)
+
+    positions = strategy_positions(pred, returns, start, strategy, freq)
+    gross, turnover, net = pnl(positions, returns[start:], strategy["cost_bps"])
+    equity, drawdown = equity_drawdown(net)
+    bars_df = pd.DataFrame({
+        "prediction": pred[start:],
+        "return": returns[start:],
+        "position": positions,
+        "turnover": turnover,
+        "gross_pnl": gross,
+        "net_pnl": net,
+        "equity": equity,
+        "drawdown": drawdown,
+    }, index=index[start:])
+    return bars_df, performance(net, turnover, positions, periods_per_year(freq))
+
+
+# ---------------------------------------------------------------
+# Broadcast parameter sweep
+# ---------------------------------------------------------------
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+def _signal_grid(pred, grid, freq):
+    """(S, T) unit positions and their parameters, for every signal in the grid."""
+    positions, params = [], []
+    for signal in _as_list(grid.get("signal", STRATEGY_DEFAULTS["signal"])):
+        if signal == "threshold":
+            thresholds = np.array(_as_list(grid.get("threshold", STRATEGY_DEFAULTS["threshold"])), dtype=float)
+            positions.append(threshold_positions(pred, thresholds[:, None]))
+            params += [{"signal": signal, "threshold": t} for t in thresholds]
+        elif signal == "rank":
+            quantiles = np.array(_as_list(grid.get("quantile", STRATEGY_DEFAULTS["quantile"])), dtype=float)
+            for window in _as_list(grid.get("rank_window", STRATEGY_DEFAULTS["rank_window"])):
+                rank = trailing_rank(pred, bars(window, freq))
+                positions.append(rank_positions(rank, quantiles[:, None]))
+                params += [{"signal": signal, "rank_window": window, "quantile": q} for q in quantiles]
+        else:
+            raise ValueError(f"Unknown signal: {signal} (expected one of {', '.join(SIGNALS)})")
+    return np.concatenate(positions), params
+
+
+def _leverage_grid(returns, start, grid, freq):
+    """(L, T) leverage and its parameters; without a vol target the window and cap are irrelevant."""
+    leverage, params = [], []
+    targets = _as_list(grid.get("vol_target", STRATEGY_DEFAULTS["vol_target"]))
+    caps = np.array(_as_list(grid.get("max_leverage", STRATEGY_DEFAULTS["max_leverage"])), dtype=float)
+    if any(t is None for t in targets):
+        leverage.append(np.ones((1, len(returns) - start)))
+        params.append({"vol_target": None, "vol_window": None, "max_leverage": None})
+    targets = np.array([t for t in targets if t is not None], dtype=float)
+    if len(targets):
+        for window in _as_list(grid.get("vol_window", STRATEGY_DEFAULTS["vol_window"])):
+            # Targets x caps broadcast against one volatility estimate per window
+            lev = vol_leverage(returns, bars(window, freq), targets[:, None, None], caps[None, :, None],
+                               periods_per_year(freq))
+            leverage.append(lev[..., start:].reshape(-1, len(returns) - start))
+            params += [{"vol_target": t, "vol_window": window, "max_leverage": c}
+                       for t, c in itertools.product(targets, caps)]
+    return np.concatenate(leverage), params
+
+
+def sweep(df, pred_col, returns_col, grid, freq=None, max_cells=50_000_000):
+    """
+    Backtest every combination of the parameter lists in `grid` at once.
+
+    Unit positions of each signal setting (S), leverage of each vol-targeting
+    setting (L) and costs (K) are broadcast to an (S, L, K, T) array of net
+    returns, processed in blocks of signal settings of at most `max_cells` values.
+
+    Args:
+        grid (dict): lists for the keys of STRATEGY_DEFAULTS ("signal" may list both signals)
+    Returns:
+        pd.DataFrame: one row per combination, parameters then `performance` columns
+    """
+    freq = freq or get_frequency()
+    annualisation = periods_per_year(freq)
+    pred, returns, start, _ = prepare(df, pred_col, returns_col)
+    oos_returns = returns[start:]
+    T = len(oos_returns)
+
+    signals, signal_params = _signal_grid(pred[start:], grid, freq)
+    leverage, leverage_params = _leverage_grid(returns, start, grid, freq)
+    costs = np.array(_as_list(grid.get("cost_bps", STRATEGY_DEFAULTS["cost_bps"])), dtype=float)
+    S, L, K = len(signals), len(leverage), len(costs)
+
+    block = max(1, max_cells // max(1, L * K * T))
+    stats = []
+    for i in range(0, S, block):
+        positions = signals[i:i + block, None, None, :] * leverage[None, :, None, :]   # (s, L, 1, T)
+        _, turnover, net = pnl(positions, oos_returns, costs[:, None])                # net: (s, L, K, T)
+        stats.append({k: v.reshape(-1) for k, v in performance(
+            net, np.broadcast_to(turnover, net.shape), np.broadcast_to(positions, net.shape), annualisation
+        ).items()})
+
+    # Parameters in the same (S, L, K) order as the flattened statistics
+    params = pd.concat([
+        pd.DataFrame(signal_params).loc[np.repeat(np.arange(S), L * K)].reset_index(drop=True),
+        pd.DataFrame(leverage_params).loc[np.tile(np.repeat(np.arange(L), K), S)].reset_index(drop=True),
+        pd.DataFrame({"cost_bps": np.tile(costs, S * L)}),
+    ], axis=1)
+    results = pd.DataFrame({k: np.concatenate([s[k] for s in stats]) for k in stats[0]})
+    return pd.concat([params, results], axis=1)
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import hashlib
+from datetime import datetime
+
+MANIFEST_NAME = "cache.json"
+TIMESTAMP_RE = re.compile(r"\d{8}_\d{6}")
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def stage_key(input_paths, config: dict, sources=()) -> str:
+    """
+    Cache key for a stage output.
+
+    Args:
+        input_paths (list): Files the stage reads (raw CSVs or upstream stage tables)
+        config (dict): The stage's config section
+        sources (list): Modules, functions or file paths whose code produces the output
+    Returns:
+        str: hex digest that changes whenever any input, the config or the code changes
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(config, sort_keys=True).encode())
+    # Only contents count: cache hits rename timestamped files
+    for path in input_paths:
+        h.update(hash_file(path).encode())
+    for src in sources:
+        if isinstance(src, str):
+            path = src
+        else:
+            import inspect  # only for module/function sources: keeps CLI cache lookups light
+            path = inspect.getsourcefile(src)
+        h.update(hash_file(path).encode())
+    return h.hexdigest()
+
+
+def _manifest_path(stage_name: str) -> str:
+    return os.path.join("data", stage_name, MANIFEST_NAME)
+
+
+def load_manifest(stage_name: str) -> dict:
+    """Cache manifest of a stage: {key: {"artifacts": [...], "last_used": ..., ...}}."""
+    path = _manifest_path(stage_name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _save_manifest(stage_name: str, manifest: dict):
+    path = _manifest_path(stage_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp, path)
+
+
+def _file_state(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _entry_valid(stage_dir: str, entry: dict) -> bool:
+    # Artifacts missing or overwritten since they were cached (e.g. a fixed output filename)
+    for name, state in zip(entry["artifacts"], entry["states"]):
+        path = os.path.join(stage_dir, name)
+        if not os.path.exists(path) or _file_state(path) != state:
+            return False
+    return True
+
+
+def peek(stage_name: str, key: str):
+    """
+    Return the artifact paths cached under `key`, or None, like `lookup` but
+    without renaming artifacts or dropping invalid entries.
+    """
+    entry = load_manifest(stage_name).get(key)
+    stage_dir = os.path.join("data", stage_name)
+    if entry is None or not _entry_valid(stage_dir, entry):
+        return None
+    return [os.path.join(stage_dir, name) for name in entry["artifacts"]]
+
+
+def lookup(stage_name: str, key: str):
+    """
+    Return the artifact paths cached under `key`, or None on a miss.
+
+    Timestamped artifacts are renamed to the current time on a hit, so that
+    `read_table` (which loads the latest file of a stage) picks them up
+    downstream without the stage being rerun or its output copied.
+    """
+    manifest = load_manifest(stage_name)
+    entry = manifest.get(key)
+    if entry is None:
+        return None
+
+    stage_dir = os.path.join("data", stage_name)
+    if not _entry_valid(stage_dir, entry):
+        del manifest[key]
+        _save_manifest(stage_name, manifest)
+        return None
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    renamed = []
+    for name in entry["artifacts"]:
+        new_name = TIMESTAMP_RE.sub(timestamp, name, count=1)
+        if new_name != name:
+            os.replace(os.path.join(stage_dir, name), os.path.join(stage_dir, new_name))
+        renamed.append(new_name)
+
+    entry["artifacts"] = renamed
+    entry["states"] = [_file_state(os.path.join(stage_dir, name)) for name in renamed]
+    entry["last_used"] = timestamp
+    _save_manifest(stage_name, manifest)
+    return [os.path.join(stage_dir, name) for name in renamed]
+
+
+def record(stage_name: str, key: str, paths):
+    """Register freshly written artifacts under `key`."""
+    manifest = load_manifest(stage_name)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    manifest[key] = {
+        "artifacts": [os.path.basename(p) for p in paths],
+        "states": [_file_state(p) for p in paths],
+        "created": timestamp,
+        "last_used": timestamp,
+    }
+    _save_manifest(stage_name, manifest)
+
+
+def evict(stage_name: str, keep: int = None, max_bytes: int = None):
+    """
+    Delete cached artifacts, least recently used first.
+
+    Args:
+        stage_name (str): Name of the stage
+        keep (int, optional): Keep at most this many cache entries
+        max_bytes (int, optional): Keep the total artifact size under this many bytes
+    Returns:
+        list: Paths that were deleted
+    """
+    manifest = load_manifest(stage_name)
+    stage_dir = os.path.join("data", stage_name)
+
+    def entry_size(entry):
+        return sum(state[0] for state in entry["states"])
+
+    # Most recently used first
+    keys = sorted(manifest, key=lambda k: manifest[k]["last_used"], reverse=True)
+    kept, total, deleted = [], 0, []
+    for k in keys:
+        size = entry_size(manifest[k])
+        # Always keep the most recent entry, it is the current stage output
+        if kept and ((keep is not None and len(kept) >= keep)
+                     or (max_bytes is not None and total + size > max_bytes)):
+            for name in manifest[k]["artifacts"]:
+                path = os.path.join(stage_dir, name)
+                if os.path.exists(path):
+                    os.unlink(path)
+                    deleted.append(path)
+            del manifest[k]
+            continue
+        kept.append(k)
+        total += size
+
+    if deleted:
+        _save_manifest(stage_name, manifest)
+    return deleted
+
+
+def check_stage(stage_name: str, config: dict, input_paths, sources=(), touch=True):
+    """
+    Look up a stage's output in the cache, as configured by its `cache` block.
+
+    Args:
+        stage_name (str): Name of the stage
+        config (dict): Full stage config; {"cache": {"enabled": true, ...}} turns caching on
+        input_paths (list): Files the stage reads
+        sources (list): Modules, functions or file paths whose code produces the output
+        touch (bool): Reuse a hit (`lookup`); False only checks for one (`peek`)
+    Returns:
+        (key, paths): paths of the cached artifacts on a hit, else None.
+            key is None when caching is disabled.
+    """
+    if not config.get("cache", {}).get("enabled", False):
+        return None, None
+    # The eviction settings do not change the output
+    key_config = {k: v for k, v in config.items() if k != "cache"}
+    key = stage_key(input_paths, key_config, sources)
+    return key, (lookup if touch else peek)(stage_name, key)
+
+
+def store_stage(stage_name: str, config: dict, key: str, paths):
+    """Record a stage's new artifacts under `key` and apply the eviction policy."""
+    if key is None:
+        return
+    record(stage_name, key, paths)
+    cache_cfg = config.get("cache", {})
+    for path in evict(stage_name, keep=cache_cfg.get("keep"), max_bytes=cache_cfg.get("max_bytes")):
+        print(f"Evicted {path}")
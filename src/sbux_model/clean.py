@@ -0,0 +1,62 @@
+import os
+import shutil
+
+# Default folders to clean (relative to project root)
+FOLDERS = {
+    "preprocessing": "data/preprocessing",
+    "features": "data/features",
+    "features_panel": "data/features_panel",
+    "model": "data/model",
+    "dashboard": "data/dashboard",
+    "backtest": "data/backtest",
+    "backtest_sweep": "data/backtest_sweep",
+    "search": "data/search",
+    "profile": "data/profile",
+    "bench": "data/bench",
+}
+# The time-series store holds raw data (collect refills it only from the APIs), so
+# it is never part of the default clean: only emptied with its own option
+STORE_FOLDER = "data/store"
+# Folders emptied by each `clean` option
+TARGETS = {
+    "preprocessing": [FOLDERS["preprocessing"]],
+    "features": [FOLDERS["features"], FOLDERS["features_panel"]],
+    "model": [FOLDERS["model"]],
+    "dashboard": [FOLDERS["dashboard"]],
+    "backtest": [FOLDERS["backtest"], FOLDERS["backtest_sweep"]],
+    "search": [FOLDERS["search"]],
+    "profile": [FOLDERS["profile"]],
+    "bench": [FOLDERS["bench"]],
+    "store": [STORE_FOLDER],
+}
+
+
+def select_folders(targets):
+    """Folders of the chosen TARGETS, or all default folders (not the store) if none is chosen."""
+    folders = [folder for target in targets for folder in TARGETS[target]]
+    return folders or list(FOLDERS.values())
+
+
+def clean_folders(folders_to_clean, confirm=True):
+    print("The following folders will be emptied:")
+    for folder in folders_to_clean:
+        print(f" - {folder}")
+    if confirm:
+        answer = input("Are you sure? [y/N]: ").strip().lower()
+        if answer != "y":
+            print("Aborted.")
+            return
+
+    for folder in folders_to_clean:
+        if os.path.exists(folder):
+            # Remove all contents
+            for filename in os.listdir(folder):
+                file_path = os.path.join(folder, filename)
+                try:
+                    if os.path.isfile(file_path) or os.path.islink(file_path):
+                        os.unlink(file_path)
+                    elif os.path.isdir(file_path):
+                        shutil.rmtree(file_path)
+                except Exception as e:
+                    print(f"Failed to delete {file_path}: {e}")
+        print(f"Emptied {folder}")
@@ -0,0 +1,148 @@
+import os
+import sys
+import argparse
+
+# Only the standard library is imported at module level: each subcommand imports
+# what it needs when it runs, so --help, status and cache hits return without
+# loading pandas or sklearn. Paths are relative to the project root, like in the
+# stage scripts: main() changes into it first (see `project_root`).
+
+# Subcommand -> pipeline stage
+STAGE_COMMANDS = {
+    "preprocess": "preprocessing",
+    "features": "features",
+    "train": "model",
+    "dashboard": "dashboard",
+}
+
+
+def project_root(cwd=None):
+    """
+    The directory holding src/config and the stage scripts: the working directory
+    or one of its parents, else the checkout this package was installed from
+    (src/sbux_model/..), else None.
+    """
+    def is_root(path):
+        return os.path.isdir(os.path.join(path, "src", "config"))
+
+    path = os.path.abspath(cwd or os.getcwd())
+    while True:
+        if is_root(path):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    checkout = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return checkout if is_root(checkout) else None
+
+
+def run_script(path):
+    """Run a stage script as `python <path>` would, in this process."""
+    import runpy
+
+    if not os.path.exists(path):
+        sys.exit(f"{path} not found: run sbux-model inside the project")
+    sys.argv = [path]
+    runpy.run_path(path, run_name="__main__")
+
+
+# ---------------------------------------------------------------
+# Subcommands
+# ---------------------------------------------------------------
+def collect(args):
+    from sbux_model import stages
+
+    run_script(stages.STAGE_SCRIPTS["collect"])
+
+
+def stage(args):
+    from sbux_model import stages
+
+    name = STAGE_COMMANDS[args.command]
+    # Cache lookup before the script (and pandas) is loaded; a miss runs the whole stage
+    config = stages.load_config(stages.STAGE_CONFIGS[name])
+    try:
+        key, cached = stages.check(name, config)
+    except FileNotFoundError:
+        key, cached = None, None  # missing input: the stage reports it
+    if cached:
+        print(f"Cache hit, reusing {name} output:")
+        for path in cached:
+            print(f" - {path}")
+        return
+    if key is not None:
+        # The script's own lookup reuses this key rather than hashing its inputs again
+        stages.hand_off(name, key, config)
+    run_script(stages.STAGE_SCRIPTS[name])
+
+
+def clean(args):
+    from sbux_model.clean import TARGETS, select_folders, clean_folders
+
+    targets = [target for target in TARGETS if getattr(args, target)]
+    clean_folders(select_folders(targets), confirm=not args.yes)
+
+
+def status(args):
+    from sbux_model import stages
+
+    print(f"{'stage':<15}{'cache':<15}output")
+    for name in stages.STAGE_CONFIGS:
+        state, paths = stages.status(name)
+        print(f"{name:<15}{state:<15}{paths[0] if paths else '-'}")
+
+
+# ---------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="sbux-model",
+        description="SBUX weekly alpha pipeline",
+        epilog="Runs in the project root (the directory with src/config): the working directory or "
+               "a parent of it, else the checkout sbux-model was installed from.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("collect", help="Fetch new raw data into data/raw").set_defaults(func=collect)
+    for command, help_text in [
+        ("preprocess", "Resample and merge the raw files"),
+        ("features", "Build the features table"),
+        ("train", "Walk-forward evaluation and final model fit"),
+        ("dashboard", "Build the dashboard table"),
+    ]:
+        commands.add_parser(command, help=f"{help_text} (skipped on a cache hit)").set_defaults(func=stage)
+
+    clean_parser = commands.add_parser("clean", help="Empty data folders (all but the store by default)")
+    for target, help_text in [
+        ("preprocessing", "Clean data/preprocessing"),
+        ("features", "Clean data/features and data/features_panel"),
+        ("model", "Clean data/model"),
+        ("dashboard", "Clean data/dashboard"),
+        ("backtest", "Clean data/backtest and data/backtest_sweep"),
+        ("search", "Clean data/search"),
+        ("profile", "Clean data/profile"),
+        ("bench", "Clean data/bench"),
+        ("store", "Clean data/store, the raw time-series store (only with this option)"),
+    ]:
+        clean_parser.add_argument(f"--{target}", action="store_true", help=help_text)
+    clean_parser.add_argument("-y", "--yes", action="store_true", help="Do not ask for confirmation")
+    clean_parser.set_defaults(func=clean)
+
+    commands.add_parser("status", help="Cache state and latest output of each stage").set_defaults(func=status)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    root = project_root()
+    if root is None:
+        sys.exit("Project root not found (no src/config here or in a parent directory): "
+                 "run sbux-model inside the project")
+    os.chdir(root)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,156 @@
 import os
+import time
+import numpy as np
 import pandas as pd
 import yfinance as yf
 from fredapi import Fred
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from sbux_model.frequency import get_frequency, bars
+from sbux_model.store import TimeSeriesStore, store_settings, series_name
+from sbux_model.preprocessing import VINTAGE_KEYS, compact_vintages
 
 RAW_DIR = "data/raw"
 os.makedirs(RAW_DIR, exist_ok=True)
 
 # --- Market / sector tickers ---
 DEFAULT_TICKERS = ["SBUX", "SPY", "XLY", "VIX", "MCD"]
+DEFAULT_START = "2018-01-01"
+# Every collector takes `freq` (from `frequency.get_frequency`) and defaults to weekly bars
+WEEKLY = get_frequency("weekly")
+
+def get_weekly_prices(tickers=None, start=DEFAULT_START, end=None, client=yf, interval="1wk"):
+    """
+    Download adjusted close prices for given tickers, weekly unless `interval` says otherwise.
 
-def get_weekly_prices(tickers=None, start="2018-01-01", end=None):
-    """Download weekly adjusted close prices for given tickers."""
+    `client` is anything with yfinance's `download` signature (e.g. `LocalPriceClient`).
+    """
     if tickers is None:
         tickers = DEFAULT_TICKERS
 
-    df = yf.download(tickers, start=start, end=end, interval="1wk", auto_adjust=True, progress=False)["Close"]
+    df = client.download(tickers, start=start, end=end, interval=interval, auto_adjust=True, progress=False)["Close"]
     if isinstance(df, pd.Series):
-        df = df.to_frame(name=tickers)
-    df.columns = tickers
+        df = df.to_frame(name=tickers[0])
+    # yfinance sorts the columns, so select by name rather than relabel by position
+    return df[tickers]
+
+def collect_prices(tickers=None, start=DEFAULT_START, client=yf, raw_dir=RAW_DIR, overlap_weeks=1, freq=WEEKLY):
+    """
+    Download prices from the earliest last-saved date across `tickers` and
+    append them to each ticker's raw CSV.
+
+    Adjusted closes are rescaled back in time by every new dividend or split, so
+    a ticker whose re-fetched overlap no longer matches its saved closes is
+    downloaded again from `start` and its raw CSV replaced.
+    """
+    if tickers is None:
+        tickers = DEFAULT_TICKERS
+    paths = {ticker: os.path.join(raw_dir, f"{ticker}_{freq['suffix']}.csv") for ticker in tickers}
+    fetch_start = min(incremental_start(path, start, overlap_weeks) for path in paths.values())
+    df = get_weekly_prices(tickers, start=fetch_start, client=client, interval=freq["interval"])
+
+    rescaled = [ticker for ticker in tickers if adjustment_changed(paths[ticker], df[ticker])]
+    save_prices(df.drop(columns=rescaled), raw_dir, freq["suffix"])
+    if rescaled:
+        print(f"Adjusted closes changed for {', '.join(rescaled)}, downloading their full history")
+        full = get_weekly_prices(rescaled, start=start, client=client, interval=freq["interval"])
+        save_prices(full, raw_dir, freq["suffix"], replace=True)
+        df = pd.concat([df.drop(columns=rescaled), full], axis=1)[tickers]
     return df
 
-def save_prices(df, raw_dir=RAW_DIR):
-    """Save individual ticker CSVs in raw dir."""
+def adjustment_changed(path, closes, rtol=1e-6):
+    """
+    True if the adjusted `closes` differ from the ones saved in `path` on the
+    dates both have, except the last saved one (it may have been a partial bar).
+    """
+    if not os.path.exists(path):
+        return False
+    saved = pd.read_csv(path, index_col=0, parse_dates=True).iloc[:-1, 0]
+    both = saved.dropna().index.intersection(closes.dropna().index)
+    return not np.allclose(saved[both], closes[both], rtol=rtol, atol=0.0)
+
+def save_prices(df, raw_dir=RAW_DIR, suffix="weekly", replace=False):
+    """Save individual ticker CSVs in raw dir, appending to any existing history (or replacing it)."""
+    paths = []
     for ticker in df.columns:
-        path = os.path.join(raw_dir, f"{ticker}_weekly.csv")
-        df[[ticker]].to_csv(path)
+        path = os.path.join(raw_dir, f"{ticker}_{suffix}.csv")
+        append_raw(df[[ticker]], path, replace=replace)
         print(f"Saved {path}")
-    return [os.path.join(raw_dir, f"{ticker}_weekly.csv") for ticker in df.columns]
+        paths.append(path)
+    return paths
 
 # --- Macro data via FRED ---
-def get_fred_series(series_ids, api_key, start="2018-01-01"):
+def get_fred_series(series_ids, api_key=None, start=DEFAULT_START, client=None, max_workers=4, raw_dir=RAW_DIR,
+                    freq=WEEKLY):
     """
-    Fetch weekly macroeconomic series from FRED.
-    
+    Fetch macroeconomic series from FRED at the bar frequency, several series at a time.
+
     Args:
         series_ids: dict {name: fred_id}
-        api_key: FRED API key
-        start: start date
+        api_key: FRED API key (not needed if `client` is given)
+        start: start date, used for series with no saved history
+        client: object with fredapi's `get_series(series_id, observation_start=...)`
+        max_workers: number of series fetched concurrently
     Returns:
         dict of DataFrames {name: df}
     """
-    fred = Fred(api_key=api_key)
-    series_data = {}
-    for name, fred_id in series_ids.items():
-        df = fred.get_series(fred_id, observation_start=start)
-        df = df.to_frame(name=name)
-        df.index = pd.to_datetime(df.index)
-        df = df.resample("W-MON").last()  # align to weekly
-        series_data[name] = df
-        path = os.path.join(RAW_DIR, f"{name}_weekly.csv")
-        df.to_csv(path)
-        print(f"Saved {path}")
-    return series_data
+    client = client or Fred(api_key=api_key)
+    tasks = {
+        name: (lambda name=name, fred_id=fred_id: get_fred_one(name, fred_id, client, start, raw_dir, freq=freq))
+        for name, fred_id in series_ids.items()
+    }
+    results = run_collection(tasks, max_workers=max_workers)
+    return {name: df for name, df in results.items() if not isinstance(df, Exception)}
+
+def get_fred_one(name, fred_id, client, start=DEFAULT_START, raw_dir=RAW_DIR, overlap_weeks=13, freq=WEEKLY):
+    """
+    Fetch one FRED series from the last saved date and append it to its raw CSV.
+
+    The last `overlap_weeks` are re-fetched so that recent revisions are picked up.
+    """
+    path = os.path.join(raw_dir, f"{name}_{freq['suffix']}.csv")
+    fetch_start = incremental_start(path, start, overlap_weeks)
+    df = client.get_series(fred_id, observation_start=fetch_start)
+    df = df.to_frame(name=name)
+    df.index = pd.to_datetime(df.index)
+    df = df.resample(freq["rule"]).last()  # align to the bars
+    append_raw(df, path)
+    print(f"Saved {path}")
+    return df
+
+def get_fred_vintages(name, fred_id, client, start=DEFAULT_START, raw_dir=RAW_DIR, overlap_weeks=13):
+    """
+    Fetch every release of a FRED series (ALFRED vintages) and merge it into
+    `{name}_vintages.csv`, so preprocessing can rebuild the series as it was known
+    on each date rather than with today's revisions.
+
+    Releases from `overlap_weeks` before the last saved release on are re-fetched.
+
+    Returns:
+        pd.DataFrame: "realtime_start", "date" and `name` columns, one row per release
+    """
+    path = os.path.join(raw_dir, f"{name}_vintages.csv")
+    since = last_saved_date(path)  # first column is the release date
+    if since is None:
+        df = client.get_series_all_releases(fred_id)
+    else:
+        df = client.get_series_all_releases(
+            fred_id, realtime_start=(since - pd.Timedelta(weeks=overlap_weeks)).strftime("%Y-%m-%d"))
+    df = pd.DataFrame({
+        "realtime_start": pd.to_datetime(df["realtime_start"]),
+        "date": pd.to_datetime(df["date"]),
+        name: pd.to_numeric(df["value"], errors="coerce"),
+    })
+    df = df.loc[df["date"] >= pd.Timestamp(start)]
+    append_vintages(df, path)
+    print(f"Saved {path}")
+    return df
 
 # --- Google Trends from Monthly Data Download ---
-def gt_monthly_to_weekly(filename: str):
+def gt_monthly_to_weekly(filename: str, freq=WEEKLY):
     """
-    Convert a monthly Google Trends CSV to weekly frequency.
+    Convert a monthly Google Trends CSV to weekly (or `freq`) frequency.
     The last day of each month is forward-filled to the weeks until the next month.
     
     Args:
@@ -74,18 +167,64 @@ def gt_monthly_to_weekly(filename: str):
     df = df.rename(columns={interest_col: 'gt_interest'})
     
     # Resample to weekly, using forward fill to propagate monthly value to all weeks in that month
-    df_weekly = df.resample("W-MON").ffill()
+    df_weekly = df.resample(freq["rule"]).ffill()
     
     # Optionally, you can normalize or scale here if needed
-    path = os.path.join(RAW_DIR, f"{filename[:-4]}_weekly.csv")
+    path = os.path.join(RAW_DIR, f"{filename[:-4]}_{freq['suffix']}.csv")
+    df_weekly.to_csv(path)
+    store_raw(df_weekly, path)
+    print(f"Saved {path}")
+
+
+# --- Google Trends via pytrends ---
+def get_google_trends_weekly(keyword, start=DEFAULT_START, client=None, raw_dir=RAW_DIR, freq=WEEKLY, path=None):
+    """
+    Fetch Google Trends interest for `keyword` and save it at weekly (or `freq`) frequency.
+
+    Trends values are rescaled to 0-100 over the requested timeframe, so the full
+    history is always re-fetched rather than appended.
+
+    Args:
+        keyword: search term, e.g. "Starbucks"
+        client: object with pytrends' `build_payload` / `interest_over_time`
+        path: raw CSV to write, e.g. the "gt" file of preprocessing_config.json
+            (default `gt_{keyword}_{suffix}.csv` in `raw_dir`)
+    """
+    if client is None:
+        from pytrends.request import TrendReq
+        client = TrendReq(hl="en-US")
+
+    end = datetime.now().strftime("%Y-%m-%d")
+    client.build_payload([keyword], timeframe=f"{start} {end}")
+    df = client.interest_over_time()
+    df = df[[keyword]].rename(columns={keyword: "gt_interest"})
+    df.index = pd.to_datetime(df.index)
+    df.index.name = "Date"
+
+    # Long timeframes come back monthly: carry each value to the bars it covers
+    df_weekly = df.resample(freq["rule"]).ffill()
+    path = path or os.path.join(raw_dir, f"gt_{keyword.lower()}_{freq['suffix']}.csv")
     df_weekly.to_csv(path)
+    store_raw(df_weekly, path)
     print(f"Saved {path}")
+    return df_weekly
 
 
 # --- Microstructure / Liquidity Data ---
-def get_microstructure_features(ticker="SBUX", start="2018-01-01"):
+def get_microstructure_features(ticker="SBUX", start=DEFAULT_START, client=yf, raw_dir=RAW_DIR, overlap_weeks=6,
+                                freq=WEEKLY):
+    """
+    Weekly (or `freq`) OHLCV microstructure features from daily (hourly) bars.
+
+    Only data from the last saved week (less `overlap_weeks`, enough to refill the
+    4-week volatility window) is downloaded and appended to the saved history.
+    """
+    path = os.path.join(raw_dir, f"microstructure_data_{freq['suffix']}.csv")
+    fetch_start = incremental_start(path, start, overlap_weeks)
+    vol_window = bars(4, freq)
+
     # Download OHLCV
-    df = yf.download([ticker], start=start, auto_adjust=False)
+    df = client.download([ticker], start=fetch_start, interval=freq["ohlcv_interval"], auto_adjust=False)
 
     # Flatten MultiIndex columns from yfinance
     df.columns = ["_".join(col) for col in df.columns.to_flat_index()]
@@ -103,7 +242,7 @@ def get_microstructure_features(ticker="SBUX", start="2018-01-01"):
             raise ValueError(f"Missing required column: {c}")
 
     # Weekly aggregation
-    weekly = df.resample("W-FRI").agg({
+    weekly = df.resample(freq["ohlcv_rule"]).agg({
         open_col: "first",
         high_col: "max",
         low_col: "min",
@@ -115,8 +254,178 @@ def get_microstructure_features(ticker="SBUX", start="2018-01-01"):
     weekly["hl_range"]     = weekly[high_col] - weekly[low_col]
     weekly["vol_norm"]     = weekly[volume_col].pct_change()
     weekly["price_impact"] = (weekly[close_col] - weekly[open_col]) / weekly[volume_col]
-    weekly["volatility"]   = weekly[close_col].pct_change().rolling(4).std()
+    weekly["volatility"]   = weekly[close_col].pct_change().rolling(vol_window).std()
 
-    path = os.path.join(RAW_DIR, f"microstructure_data_weekly.csv")
-    weekly.to_csv(path)
+    if fetch_start != start:
+        # The first bars of the overlap lack history for pct_change/rolling: keep the saved values
+        weekly = weekly.iloc[vol_window + 1:]
+    append_raw(weekly, path)
     print(f"Saved {path}")
+    return weekly
+
+
+# --- Incremental raw files ---
+def last_saved_date(path):
+    """Last date in a raw CSV (first column), read from the end of the file; None if absent."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        # Read backwards until we have the last complete line
+        block = b""
+        while pos > 0 and block.count(b"\n") < 2:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step) + block
+    lines = [line for line in block.decode().splitlines() if line.strip()]
+    if len(lines) < 2 and pos == 0:
+        return None  # header only
+    try:
+        return pd.Timestamp(lines[-1].split(",")[0])
+    except ValueError:
+        return None
+
+def incremental_start(path, start=DEFAULT_START, overlap_weeks=1):
+    """
+    Start date for a fetch: `overlap_weeks` before the last saved date, so the
+    last (possibly partial) week is refreshed, or `start` if nothing is saved.
+    """
+    last = last_saved_date(path)
+    if last is None:
+        return start
+    return (last - pd.Timedelta(weeks=overlap_weeks)).strftime("%Y-%m-%d")
+
+def append_raw(df, path, replace=False):
+    """
+    Merge new rows into a raw CSV; rows for dates already saved are replaced
+    (the whole saved history with `replace`).
+    """
+    new = df
+    if os.path.exists(path) and not replace:
+        old = pd.read_csv(path, index_col=0, parse_dates=True)
+        df = pd.concat([old.loc[~old.index.isin(df.index)], df]).sort_index()
+    df.to_csv(path)
+    store_raw(new, path)
+    return path
+
+def append_vintages(df, path):
+    """
+    Merge new releases into a vintages CSV; releases already saved are replaced,
+    and re-fetched ones that repeat the value in effect are dropped.
+    """
+    new = df
+    if os.path.exists(path):
+        old = pd.read_csv(path, parse_dates=VINTAGE_KEYS)
+        df = pd.concat([old, df])
+    df = compact_vintages(df)
+    df.to_csv(path, index=False)
+    since = new["realtime_start"].min()
+    store_raw(df.loc[df["realtime_start"] >= since], path, vintages=True)
+    return path
+
+def store_raw(df, path, vintages=False):
+    """
+    Upsert new raw rows (or releases, with `vintages`) into the time-series store as well,
+    when `store` is enabled in pipeline_config.json (one connection per call, so
+    collectors can run in threads).
+    """
+    settings = store_settings()
+    if settings["enabled"]:
+        with TimeSeriesStore(settings["path"]) as store:
+            if vintages:
+                store.upsert_vintages(series_name(path), df)
+            else:
+                store.upsert(series_name(path), df)
+
+
+# --- Collection scheduler ---
+def with_retries(func, retries=3, backoff=1.0, exceptions=(Exception,)):
+    """
+    Call `func()`, retrying failures with exponential backoff (backoff, 2*backoff, ...).
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except exceptions as e:
+            if attempt == retries:
+                raise
+            wait = backoff * 2 ** attempt
+            print(f"Attempt {attempt + 1} failed ({e}), retrying in {wait:.1f}s")
+            time.sleep(wait)
+
+def run_collection(tasks, max_workers=4, retries=3, backoff=1.0):
+    """
+    Run collection tasks concurrently with bounded parallelism and retries.
+
+    Args:
+        tasks: dict {name: zero-argument callable}
+        max_workers: maximum number of sources fetched at once
+        retries: retries per task after the first failure
+        backoff: initial retry delay in seconds, doubled on each retry
+    Returns:
+        dict {name: result}, with the raised exception as the result of a task
+        that failed every attempt
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(with_retries, func, retries, backoff)
+            for name, func in tasks.items()
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Failed to collect {name}: {e}")
+                results[name] = e
+    return results
+
+
+# --- Local stand-in clients (offline runs and testing) ---
+class LocalPriceClient:
+    """
+    Stand-in for yfinance serving daily OHLCV frames from memory.
+
+    Args:
+        frames: dict {ticker: DataFrame with Open/High/Low/Close/Volume columns, daily DatetimeIndex}
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def download(self, tickers, start=None, end=None, interval="1d", auto_adjust=True, progress=False):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        parts = {}
+        for ticker in tickers:
+            df = self.frames[ticker].loc[start:end]
+            if interval == "1wk":
+                df = df.resample("W-MON", label="left", closed="left").agg(
+                    {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+                ).dropna(how="all")
+            parts[ticker] = df
+        # yfinance layout: (Price, Ticker) column MultiIndex
+        return pd.concat(parts, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+class LocalFredClient:
+    """
+    Stand-in for fredapi.Fred serving series from memory.
+
+    Args:
+        series: dict {fred_id: pd.Series indexed by date}
+        releases: dict {fred_id: DataFrame with realtime_start, date and value columns}
+    """
+
+    def __init__(self, series, releases=None):
+        self.series = series
+        self.releases = releases or {}
+
+    def get_series(self, series_id, observation_start=None):
+        return self.series[series_id].loc[observation_start:]
+
+    def get_series_all_releases(self, series_id, realtime_start=None, realtime_end=None):
+        df = self.releases[series_id]
+        start = pd.Timestamp(realtime_start) if realtime_start else pd.Timestamp.min
+        end = pd.Timestamp(realtime_end) if realtime_end else pd.Timestamp.max
+        return df.loc[pd.to_datetime(df["realtime_start"]).between(start, end)].reset_index(drop=True)
@@ -1,5 +1,11 @@
+import hashlib
+import json
+import numpy as np
 import pandas as pd
 
+from sbux_model import profiling, rolling
+from sbux_model.profiling import instrument
+
 def compute_forward_returns(df, col, periods=1):
     """Compute forward return for a column"""
     return df[col].pct_change(periods=periods).shift(-periods)
@@ -11,6 +17,17 @@ def compute_excess_return(df, asset_col="SBUX", benchmark_col="SPY"):
     df["excess_ret_fwd_1"] = df[f"{asset_col}_ret_fwd_1"] - df[f"{benchmark_col}_ret_fwd_1"]
     return df
 
+def spec_bars(feat_cfg, key, default=None):
+    """
+    Rows spanned by a window or lag of a feature spec.
+
+    The configured value names the output column; at other than weekly frequency
+    `frequency.scale_feature_defs` stores the row count under the spec's "bars".
+    """
+    return feat_cfg.get("bars", {}).get(key, feat_cfg.get(key, default))
+
+
+@instrument
 def apply_feature(df, feat_cfg):
     """Apply a single feature transformation"""
     col = feat_cfg["column"]
@@ -21,28 +38,30 @@ def apply_feature(df, feat_cfg):
 
     elif ftype == "diff":
         lag = feat_cfg.get("lag", 1)
-        df[f"{col}_diff_{lag}"] = df[col].diff(lag)
+        df[f"{col}_diff_{lag}"] = df[col].diff(spec_bars(feat_cfg, "lag", 1))
 
     elif ftype == "rolling_mean":
         window = feat_cfg["window"]
-        df[f"{col}_rm_{window}"] = df[col].rolling(window).mean()
+        df[f"{col}_rm_{window}"] = df[col].rolling(spec_bars(feat_cfg, "window")).mean()
 
     elif ftype == "zscore":
         window = feat_cfg["window"]
-        mean = df[col].rolling(window).mean()
-        std = df[col].rolling(window).std()
+        rows = spec_bars(feat_cfg, "window")
+        mean = df[col].rolling(rows).mean()
+        std = df[col].rolling(rows).std()
         df[f"{col}_z_{window}"] = (df[col] - mean) / std
 
     elif ftype == "momentum":
         window = feat_cfg["window"]
-        df[f"{col}_mom_{window}"] = df[col].pct_change(window)
+        df[f"{col}_mom_{window}"] = df[col].pct_change(spec_bars(feat_cfg, "window"))
 
     elif ftype == "lagged_alpha":
         df = add_lagged_alpha(
             df,
             alpha_col=feat_cfg.get("alpha_col", "alpha"),
             lags=feat_cfg.get("lags", [1]),
-            mas=feat_cfg.get("mas", [])
+            mas=feat_cfg.get("mas", []),
+            ma_rows=spec_bars(feat_cfg, "mas", [])
         )
     
     elif ftype == "latest_pct_change":
@@ -52,17 +71,31 @@ def apply_feature(df, feat_cfg):
             eps=feat_cfg.get("epsilon", 1e-8)
         )
 
+    elif ftype == "beta_term_structure":
+        terms = beta_term_structure(
+            df[col], df[feat_cfg.get("benchmark_column", "bench_ret")],
+            windows=spec_bars(feat_cfg, "windows", [13, 26, 52, 104]),
+            halflives=spec_bars(feat_cfg, "halflives", []),
+            labels=(feat_cfg.get("windows", [13, 26, 52, 104]), feat_cfg.get("halflives", []))
+        )
+        for name, values in terms.items():
+            df[name] = values
+
     else:
         raise ValueError(f"Unknown feature type: {ftype}")
 
 
-def compute_timevarying_beta(df, asset_col="SBUX", benchmark_col="SPY", window=52):
+@instrument
+def compute_timevarying_beta(df, asset_col="SBUX", benchmark_col="SPY", window=52, asset_ret=None, bench_ret=None):
     """
     Compute rolling beta between asset and benchmark.
     Uses 52-week (1-year) rolling regression by default.
+    Already computed returns can be passed as `asset_ret` / `bench_ret`.
     """
-    asset_ret = df[asset_col].pct_change()
-    bench_ret = df[benchmark_col].pct_change()
+    if asset_ret is None:
+        asset_ret = df[asset_col].pct_change()
+    if bench_ret is None:
+        bench_ret = df[benchmark_col].pct_change()
 
     # Covariance & variance rolling windows
     cov = asset_ret.rolling(window).cov(bench_ret)
@@ -73,18 +106,22 @@ def compute_timevarying_beta(df, asset_col="SBUX", benchmark_col="SPY", window=5
     return df
 
 
+@instrument
 def compute_residual_alpha(df, asset_col="SBUX", benchmark_col="SPY", window=52):
     """
     Compute idiosyncratic alpha_t = r_asset - beta_t * r_bench
     and forward alpha (target).
     """
 
+    # Returns, computed once for the beta and the alpha
+    asset_ret = df[asset_col].pct_change()
+    bench_ret = df[benchmark_col].pct_change()
+
     # Rolling beta first
-    df = compute_timevarying_beta(df, asset_col, benchmark_col, window)
+    df = compute_timevarying_beta(df, asset_col, benchmark_col, window, asset_ret, bench_ret)
 
-    # Returns
-    df["asset_ret"] = df[asset_col].pct_change()
-    df["bench_ret"] = df[benchmark_col].pct_change()
+    df["asset_ret"] = asset_ret
+    df["bench_ret"] = bench_ret
 
     # Residual alpha_t
     df["alpha"] = df["asset_ret"] - df["beta_roll"] * df["bench_ret"]
@@ -95,19 +132,24 @@ def compute_residual_alpha(df, asset_col="SBUX", benchmark_col="SPY", window=52)
     return df
 
 
-def add_lagged_alpha(df, alpha_col="alpha", lags=[1, 2, 4, 8], mas=[4, 12]):
+@instrument
+def add_lagged_alpha(df, alpha_col="alpha", lags=[1, 2, 4, 8], mas=[4, 12], ma_rows=None):
     """
     Adds lagged residual alphas and moving-average alpha features.
+
+    `ma_rows` gives the rows of each moving average when they differ from `mas`
+    (see `spec_bars`).
     """
     for L in lags:
         df[f"{alpha_col}_lag{L}"] = df[alpha_col].shift(L)
 
-    for M in mas:
-        df[f"{alpha_col}_ma{M}"] = df[alpha_col].rolling(M).mean()
+    for M, rows in zip(mas, ma_rows or mas):
+        df[f"{alpha_col}_ma{M}"] = df[alpha_col].rolling(rows).mean()
 
     return df
 
 
+@instrument
 def latest_pct_change(df, column, eps=1e-8):
     """
     Latest non-zero percentage change in `column`, forward-filled.
@@ -126,3 +168,377 @@ def latest_pct_change(df, column, eps=1e-8):
     df[f"{column}_latest_pct_change"] = pct.ffill()
 
     return df
+
+
+def term_structure_columns(windows, halflives=()):
+    """Output names of a `beta_term_structure` feature spec."""
+    names = []
+    for window in windows:
+        names += [f"beta_{window}", f"alpha_{window}"]
+    for halflife in halflives:
+        names += [f"beta_ewm{halflife}", f"alpha_ewm{halflife}"]
+    return names
+
+
+def beta_term_structure(asset_ret, bench_ret, windows=(13, 26, 52, 104), halflives=(), labels=None):
+    """
+    Betas and residual alphas over several rolling windows and EWMA half-lives.
+
+    Every window comes from one set of cumulative sums over the returns and every
+    half-life from one recursive filter pass, instead of a rolling cov/var pair
+    per window. Values match pandas `rolling(w).cov / rolling(w).var` and
+    `ewm(halflife=h).cov / ewm(halflife=h).var` to floating-point rounding.
+
+    Args:
+        asset_ret: (T,) or (T, N) asset returns
+        bench_ret: (T,) benchmark returns
+        windows (list): rolling windows, in rows
+        halflives (list): EWMA half-lives, in rows
+        labels (tuple, optional): (window labels, half-life labels) used in the output
+            names instead of the row counts
+    Returns:
+        dict: "beta_<w>", "alpha_<w>", "beta_ewm<h>", "alpha_ewm<h>" -> arrays shaped like asset_ret
+    """
+    window_labels, halflife_labels = labels or (windows, halflives)
+    x = np.asarray(asset_ret, dtype=float)
+    y = np.asarray(bench_ret, dtype=float)
+    y_b = y[:, None] if x.ndim == 2 and y.ndim == 1 else y
+
+    out = {}
+    for label, beta in zip(window_labels, rolling.multi_window_beta(x, y, windows).values()):
+        out[f"beta_{label}"] = beta
+        out[f"alpha_{label}"] = x - beta * y_b
+    for label, beta in zip(halflife_labels, rolling.ewm_beta(x, y, halflives).values()):
+        out[f"beta_ewm{label}"] = beta
+        out[f"alpha_ewm{label}"] = x - beta * y_b
+    return out
+
+
+# ----------------------------------------------------
+# Fused feature compiler
+# ----------------------------------------------------
+def compile_features(feature_defs):
+    """
+    Compile the `features` block of features_config.json into a single plan.
+
+    Each output column is expressed in terms of shared intermediates, keyed by
+    (operation, column, parameter). Specs that need the same rolling moments,
+    shifts or pct_change (e.g. `rolling_mean` and `zscore` on the same column and
+    window) then reuse one computation.
+
+    Args:
+        feature_defs (dict): The `features` block of features_config.json
+    Returns:
+        list: (output_name, op, column, params) in the order `apply_feature` would
+            add the columns
+    """
+    plan = []
+    for feat_cfg in feature_defs.values():
+        col = feat_cfg["column"]
+        ftype = feat_cfg["type"]
+
+        if ftype == "lag":
+            plan.append((f"{col}_lag_{feat_cfg['lag']}", "shift", col, feat_cfg["lag"]))
+        elif ftype == "diff":
+            lag = feat_cfg.get("lag", 1)
+            plan.append((f"{col}_diff_{lag}", "diff", col, spec_bars(feat_cfg, "lag", 1)))
+        elif ftype == "rolling_mean":
+            window = feat_cfg["window"]
+            plan.append((f"{col}_rm_{window}", "rolling_mean", col, spec_bars(feat_cfg, "window")))
+        elif ftype == "zscore":
+            window = feat_cfg["window"]
+            plan.append((f"{col}_z_{window}", "zscore", col, spec_bars(feat_cfg, "window")))
+        elif ftype == "momentum":
+            window = feat_cfg["window"]
+            plan.append((f"{col}_mom_{window}", "pct_change", col, spec_bars(feat_cfg, "window")))
+        elif ftype == "lagged_alpha":
+            alpha_col = feat_cfg.get("alpha_col", "alpha")
+            for L in feat_cfg.get("lags", [1]):
+                plan.append((f"{alpha_col}_lag{L}", "shift", alpha_col, L))
+            mas = feat_cfg.get("mas", [])
+            for M, rows in zip(mas, spec_bars(feat_cfg, "mas", mas)):
+                plan.append((f"{alpha_col}_ma{M}", "rolling_mean", alpha_col, rows))
+        elif ftype == "latest_pct_change":
+            plan.append((f"{col}_latest_pct_change", "latest_pct_change", col, feat_cfg.get("epsilon", 1e-8)))
+        elif ftype == "beta_term_structure":
+            # Every output shares one param, so the whole term structure is computed once
+            windows = tuple(feat_cfg.get("windows", [13, 26, 52, 104]))
+            halflives = tuple(feat_cfg.get("halflives", []))
+            param = (feat_cfg.get("benchmark_column", "bench_ret"),
+                     tuple(spec_bars(feat_cfg, "windows", windows)),
+                     tuple(spec_bars(feat_cfg, "halflives", halflives)),
+                     (windows, halflives))
+            for name in term_structure_columns(windows, halflives):
+                plan.append((name, "beta_term", col, param))
+        else:
+            raise ValueError(f"Unknown feature type: {ftype}")
+    return plan
+
+
+@instrument
+def compute_features(df, plan):
+    """
+    Evaluate a compiled plan in one pass.
+
+    Shared intermediates are computed once and every output is written into a
+    single preallocated float64 block, so the frame is built in one allocation
+    instead of one column insert per spec. Values are identical to `apply_feature`.
+
+    Args:
+        df (pd.DataFrame): Table with the source columns (after `compute_residual_alpha`)
+        plan (list): Output of `compile_features`
+    Returns:
+        pd.DataFrame: feature columns only, indexed like `df`
+    """
+    names = list(dict.fromkeys(name for name, _, _, _ in plan))
+    position = {name: i for i, name in enumerate(names)}
+    # Column-major, so each feature is written contiguously and pandas adopts the block without a copy
+    block = np.empty((len(df), len(names)), dtype=float, order="F")
+    done = set()
+    memo = {}
+
+    def source(col):
+        # Features may be built on columns produced earlier in the plan
+        if col in done:
+            return pd.Series(block[:, position[col]], index=df.index)
+        return df[col]
+
+    def intermediate(op, col, param):
+        key = (op, col, param)
+        if key not in memo:
+            x = source(col)
+            if op == "shift":
+                memo[key] = x.shift(param)
+            elif op == "diff":
+                memo[key] = x.diff(param)
+            elif op == "rolling_mean":
+                memo[key] = x.rolling(param).mean()
+            elif op == "rolling_std":
+                memo[key] = x.rolling(param).std()
+            elif op == "pct_change":
+                memo[key] = x.pct_change(param)
+            elif op == "beta_term":
+                bench, windows, halflives, labels = param
+                memo[key] = beta_term_structure(x, source(bench), windows, halflives, labels)
+        return memo[key]
+
+    for name, op, col, param in plan:
+        with profiling.span(f"feature:{name}", op=op, column=col, param=param, rows=len(df)):
+            if op == "zscore":
+                mean = intermediate("rolling_mean", col, param)
+                std = intermediate("rolling_std", col, param)
+                values = (source(col) - mean) / std
+            elif op == "latest_pct_change":
+                pct = intermediate("pct_change", col, 1)
+                values = pct.where(pct.abs() > param).ffill()
+            elif op == "beta_term":
+                values = intermediate(op, col, param)[name]
+            else:
+                values = intermediate(op, col, param)
+            block[:, position[name]] = np.asarray(values, dtype=float)
+        done.add(name)
+
+    return pd.DataFrame(block, index=df.index, columns=names)
+
+
+@instrument
+def apply_features(df, feature_defs):
+    """
+    Apply every feature spec at once with the fused compiler.
+
+    Returns:
+        pd.DataFrame: `df` with the feature columns appended (existing columns
+            of the same name are replaced, as `apply_feature` would)
+    """
+    features = compute_features(df, compile_features(feature_defs))
+    return pd.concat([df.drop(columns=features.columns, errors="ignore"), features], axis=1)
+
+
+@instrument
+def build_features(df, feature_defs, asset_col="SBUX", benchmark_col="SPY", window=52):
+    """
+    Residual alpha target plus every feature spec in `feature_defs`.
+
+    Args:
+        df (pd.DataFrame): Preprocessed table indexed by date
+        feature_defs (dict): The `features` block of features_config.json
+    Returns:
+        pd.DataFrame: `df` with the alpha and feature columns added (NaNs kept)
+    """
+    df = compute_residual_alpha(df, asset_col=asset_col, benchmark_col=benchmark_col, window=window)
+    return apply_features(df, feature_defs)
+
+
+# ----------------------------------------------------
+# Incremental (append) mode
+# ----------------------------------------------------
+def feature_lookback(feature_defs, window=52):
+    """
+    Number of trailing input rows needed to recompute the newest rows of every
+    feature exactly: the beta window plus the longest feature window or lag.
+    EWMA features need no rows, their recursion state is carried instead
+    (see `init_feature_state`).
+    """
+    longest = 1
+    for feat_cfg in feature_defs.values():
+        ftype = feat_cfg["type"]
+        if ftype == "lag":
+            longest = max(longest, feat_cfg.get("lag", 1))
+        elif ftype == "diff":
+            longest = max(longest, spec_bars(feat_cfg, "lag", 1))
+        elif ftype in ("rolling_mean", "zscore", "momentum"):
+            longest = max(longest, spec_bars(feat_cfg, "window"))
+        elif ftype == "lagged_alpha":
+            longest = max([longest] + feat_cfg.get("lags", [1]) + spec_bars(feat_cfg, "mas", []))
+        elif ftype == "beta_term_structure":
+            longest = max([longest] + spec_bars(feat_cfg, "windows", [13, 26, 52, 104]))
+    # +1 for the return that feeds the first beta window
+    return window + longest + 1
+
+
+def _feature_defs_hash(feature_defs, asset_col, benchmark_col, window):
+    spec = {"features": feature_defs, "asset_col": asset_col, "benchmark_col": benchmark_col, "window": window}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def _latest_change_columns(feature_defs):
+    return [f"{cfg['column']}_latest_pct_change" for cfg in feature_defs.values()
+            if cfg["type"] == "latest_pct_change"]
+
+
+def _ewm_terms(feature_defs):
+    """(column, benchmark column, half-life in rows, label) of every EWMA beta in the specs."""
+    terms = []
+    for _, op, col, param in compile_features(feature_defs):
+        if op == "beta_term":
+            bench, _, halflives, (_, labels) = param
+            terms += [(col, bench, h, label) for h, label in zip(halflives, labels)]
+    return list(dict.fromkeys(terms))
+
+
+def _rows_hash(df):
+    """Hash of a table's index, columns and values, to detect revised history."""
+    digest = hashlib.sha256(json.dumps(list(map(str, df.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _first_difference(old, new):
+    """Position of the first row where `new` differs from `old` (dates or values), or len(old)."""
+    n = min(len(old), len(new))
+    a = old.iloc[:n].to_numpy(dtype=float)
+    b = new.iloc[:n].to_numpy(dtype=float)
+    same = (old.index[:n] == new.index[:n]) & ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+    changed = np.flatnonzero(~same)
+    return int(changed[0]) if len(changed) else n
+
+
+def _feature_state(df_input, frame, feature_defs, size, ewm_sums):
+    """State fields for the last `size` rows of `df_input`, whose features are `frame`."""
+    return {
+        "tail": df_input.iloc[-size:].copy(),
+        "history_hash": _rows_hash(df_input.iloc[:-size]),
+        "carry": {name: _carry_value(frame[name], size) for name in _latest_change_columns(feature_defs)},
+        "ewm": {term: sums[-size:] for term, sums in ewm_sums.items()},
+    }
+
+
+@instrument
+def init_feature_state(df_input, df_features, feature_defs, asset_col="SBUX", benchmark_col="SPY", window=52,
+                       revisable=0):
+    """
+    Rolling-window state needed to update the features with `update_features`.
+
+    Args:
+        df_input (pd.DataFrame): Preprocessed table the features were computed from
+        df_features (pd.DataFrame): Output of `build_features` on `df_input` (before dropna)
+        feature_defs (dict): The `features` block of features_config.json
+        revisable (int): trailing input rows that may be revised between runs
+            and still be recomputed from the state
+    Returns:
+        dict: the last `feature_lookback` + `revisable` input rows, a hash of the
+            rows before them, each `latest_pct_change` feature's value on the first
+            of them (its change is unknown within the tail) and the running sums of
+            every EWMA beta on each of them
+    """
+    lookback = feature_lookback(feature_defs, window)
+    ewm_sums = {term: rolling.ewm_beta_sums(df_features[term[0]], df_features[term[1]], term[2])
+                for term in _ewm_terms(feature_defs)}
+
+    return {
+        **_feature_state(df_input, df_features, feature_defs, lookback + revisable, ewm_sums),
+        "lookback": lookback,
+        "revisable": revisable,
+        "alpha_args": {"asset_col": asset_col, "benchmark_col": benchmark_col, "window": window},
+        "spec_hash": _feature_defs_hash(feature_defs, asset_col, benchmark_col, window),
+    }
+
+
+def state_matches(state, feature_defs, asset_col="SBUX", benchmark_col="SPY", window=52):
+    """True if `state` was built for these feature specs (otherwise recompute in batch)."""
+    return "ewm" in state and state["spec_hash"] == _feature_defs_hash(feature_defs, asset_col, benchmark_col,
+                                                                         window)
+
+
+def _carry_value(values, lookback):
+    value = values.iloc[-lookback] if len(values) >= lookback else values.iloc[0]
+    return None if pd.isna(value) else float(value)
+
+
+@instrument
+def update_features(state, df, feature_defs):
+    """
+    Recompute the features of revised and newly arrived input rows from the
+    persisted state.
+
+    The stored tail is compared with `df` to find the first changed row; only
+    the rows from the tail on are processed, so the cost does not grow with
+    history length. Rolling windows are recomputed from the tail and EWMA betas
+    continue from their stored running sums, so values match `build_features`
+    on the full history up to floating-point rounding.
+
+    Args:
+        state (dict): From `init_feature_state` or a previous `update_features`
+        df (pd.DataFrame): The whole current preprocessed table
+        feature_defs (dict): The `features` block of features_config.json
+    Returns:
+        (rows, state): feature rows from the one before the first changed or new
+            row (its forward target may have changed) to the end, and the updated
+            state; no rows if nothing changed. (None, state) when rows before the
+            revisable window changed, rows were removed or the columns differ:
+            recompute in batch.
+    """
+    tail = state["tail"]
+    start = int(df.index.searchsorted(tail.index[0]))
+    if list(df.columns) != list(tail.columns) or _rows_hash(df.iloc[:start]) != state["history_hash"]:
+        return None, state
+    current = df.iloc[start:]
+    first = _first_difference(tail, current)
+    if first == len(tail) == len(current):
+        return current.iloc[:0], state
+    # Rows before `lookback` feed rolling windows that are not recomputed (unless the tail is the whole history)
+    if start > 0 and (first < len(tail) - state["revisable"] or len(current) < len(tail)):
+        return None, state
+
+    frame = build_features(current.copy(), feature_defs, **state["alpha_args"])
+
+    # latest_pct_change carries the last change forward from before the tail
+    for name, last in state["carry"].items():
+        if last is not None:
+            frame[name] = frame[name].fillna(last)
+
+    # EWMA betas continue from the running sums on the last unchanged row
+    begin = max(first - 1, 0)
+    ewm_sums = {}
+    for (col, bench, halflife, label), sums in state["ewm"].items():
+        x, y = frame[col].to_numpy(), frame[bench].to_numpy()
+        init = sums[begin - 1] if begin > 0 else None
+        ewm_sums[(col, bench, halflife, label)] = np.vstack(
+            [sums[:begin], rolling.ewm_beta_sums(x[begin:], y[begin:], halflife, init)])
+        beta = rolling.beta_from_ewm_sums(ewm_sums[(col, bench, halflife, label)][begin:])
+        frame.iloc[begin:, frame.columns.get_loc(f"beta_ewm{label}")] = beta
+        frame.iloc[begin:, frame.columns.get_loc(f"alpha_ewm{label}")] = x[begin:] - beta * y[begin:]
+
+    new_state = dict(state)
+    new_state.update(_feature_state(df, frame, feature_defs, state["lookback"] + state["revisable"], ewm_sums))
+    return frame.iloc[begin:], new_state
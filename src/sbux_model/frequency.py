@@ -0,0 +1,112 @@
+import copy
+import json
+import os
+
+PIPELINE_CONFIG = "src/config/pipeline_config.json"
+
+# Bar frequencies the pipeline runs at. Windows, lags and warmups in the configs
+# are in weeks; `bars_per_week` converts them to rows.
+FREQUENCIES = {
+    "weekly": {
+        "rule": "W-MON",          # preprocessing buckets (pandas offset alias)
+        "interval": "1wk",        # yfinance price bars
+        "ohlcv_rule": "W-FRI",    # microstructure aggregation of the OHLCV bars
+        "ohlcv_interval": "1d",
+        "bars_per_week": 1,
+        "suffix": "weekly",       # raw file names, e.g. data/raw/SBUX_weekly.csv
+    },
+    "daily": {
+        "rule": "B",
+        "interval": "1d",
+        "ohlcv_rule": "B",
+        "ohlcv_interval": "1d",
+        "bars_per_week": 5,
+        "suffix": "daily",
+    },
+    "hourly": {
+        "rule": "h",
+        "interval": "1h",
+        "ohlcv_rule": "h",
+        "ohlcv_interval": "1h",
+        "bars_per_week": 35,      # 7 trading hours a day
+        "suffix": "hourly",
+    },
+}
+
+# Spec parameters measured in weeks, per feature type. Pure shifts ("lag",
+# lagged_alpha "lags") stay in bars: lag 1 is always the previous bar.
+SCALED_PARAMS = {
+    "diff": ["lag"],
+    "rolling_mean": ["window"],
+    "zscore": ["window"],
+    "momentum": ["window"],
+    "lagged_alpha": ["mas"],
+    "beta_term_structure": ["windows", "halflives"],
+}
+# Values used by `features` when a spec leaves the parameter out
+PARAM_DEFAULTS = {"lag": 1, "mas": [], "windows": [13, 26, 52, 104], "halflives": []}
+
+
+def get_frequency(name=None, path=PIPELINE_CONFIG):
+    """
+    Settings of a bar frequency.
+
+    Args:
+        name (str, optional): "weekly", "daily" or "hourly"; by default the
+            `frequency` of pipeline_config.json (weekly if unset)
+    Returns:
+        dict: the FREQUENCIES entry, plus its "name"
+    """
+    if name is None:
+        name = "weekly"
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                name = json.load(f).get("frequency", "weekly")
+    if name not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {name} (expected one of {', '.join(FREQUENCIES)})")
+    return {"name": name, **FREQUENCIES[name]}
+
+
+def bars(weeks, freq):
+    """Rows spanning `weeks` weeks at frequency `freq`: an int, rounded, at least 1."""
+    return max(1, int(round(weeks * freq["bars_per_week"])))
+
+
+def halflife_bars(weeks, freq):
+    """An EWMA half-life of `weeks` weeks in rows at frequency `freq`; unlike a window it need not be whole."""
+    return weeks * freq["bars_per_week"]
+
+
+def scale_feature_defs(feature_defs, freq):
+    """
+    Feature specs with their week-based windows converted to rows.
+
+    The configured values are kept, so output columns keep their names
+    (e.g. "SBUX_mom_4" is 4-week momentum at any frequency); the row counts go in
+    each spec's "bars" entry, which `features.spec_bars` reads.
+
+    Args:
+        feature_defs (dict): a `features` block of features_config.json
+        freq (dict): from `get_frequency`
+    Returns:
+        dict: scaled copy (the input itself at weekly frequency)
+    """
+    if freq["bars_per_week"] == 1:
+        return feature_defs
+    scaled = copy.deepcopy(feature_defs)
+    for feat_cfg in scaled.values():
+        counts = {}
+        for key in SCALED_PARAMS.get(feat_cfg["type"], []):
+            value = feat_cfg.get(key, PARAM_DEFAULTS.get(key))
+            if value is None:
+                continue
+            scale = halflife_bars if key == "halflives" else bars
+            counts[key] = [scale(v, freq) for v in value] if isinstance(value, list) else scale(value, freq)
+        if counts:
+            feat_cfg["bars"] = counts
+    return scaled
+
+
+def raw_path(path, freq):
+    """Raw file path with any "{frequency}" placeholder filled in (e.g. data/raw/SBUX_{frequency}.csv)."""
+    return path.format(frequency=freq["suffix"])
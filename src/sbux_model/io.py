@@ -1,52 +1,241 @@
 import os
+import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from sbux_model.profiling import instrument
+from sbux_model.paths import TABLE_EXTENSIONS, MATRIX_SUFFIX, resolve_table_path, resolve_matrix_path, matrix_files
+
+
+# ---------------------------------------------------------------
+# Storage backends
+# ---------------------------------------------------------------
+def _write_csv(df, path):
+    df.to_csv(path, index=True)
+
+
+def _read_csv(path, columns=None):
+    usecols = None
+    if columns is not None:
+        # Always keep the index column (first in the file)
+        index_col = pd.read_csv(path, nrows=0).columns[0]
+        usecols = [index_col] + list(columns)
+    df = pd.read_csv(path, parse_dates=True, index_col=0, usecols=usecols)
+    return df if columns is None else df[list(columns)]
+
+
+def _write_parquet(df, path):
+    df.to_parquet(path, index=True)
+
+
+def _read_parquet(path, columns=None):
+    return pd.read_parquet(path, columns=None if columns is None else list(columns))
+
+
+def _write_feather(df, path):
+    # Feather only stores a default RangeIndex, so the index goes in as the first column
+    index_name = df.index.name or "index"
+    df.rename_axis(index_name).reset_index().to_feather(path)
+
+
+def _read_feather(path, columns=None):
+    if columns is not None:
+        import pyarrow.feather as feather
+        index_col = feather.read_table(path, columns=[0]).column_names[0]
+        columns = [index_col] + list(columns)
+    df = pd.read_feather(path, columns=columns)
+    return df.set_index(df.columns[0])
+
+
+# format name -> (file extension, writer(df, path), reader(path, columns=None))
+STORAGE_BACKENDS = {
+    "csv": (".csv", _write_csv, _read_csv),
+    "parquet": (".parquet", _write_parquet, _read_parquet),
+    "feather": (".feather", _write_feather, _read_feather),
+}
+
+
+def register_backend(name: str, extension: str, writer, reader):
+    """
+    Register a storage backend usable as `"format"` in a stage config.
+
+    Args:
+        name (str): Format name used in config, e.g. "parquet"
+        extension (str): File extension including the dot, e.g. ".parquet"
+        writer (callable): writer(df, path)
+        reader (callable): reader(path, columns=None) -> pd.DataFrame indexed like the saved table
+    """
+    STORAGE_BACKENDS[name] = (extension, writer, reader)
+    TABLE_EXTENSIONS[name] = extension
+
+
+def _backend_for_path(path: str):
+    for name, (extension, _, _) in STORAGE_BACKENDS.items():
+        if path.endswith(extension):
+            return name
+    raise ValueError(f"No storage backend registered for {path}")
+
+
+@instrument
 def save_table(df: pd.DataFrame, stage_name: str, config: dict = None):
     """
     Save a DataFrame to a stage folder with a timestamp, unless overridden by config filename.
 
     Args:
         df (pd.DataFrame): Table to save
-        stage_dir (str): Directory for this stage
-        stage_name (str): Name of the stage, used as default filename
-        config (dict, optional): If contains 'filename', use it instead of timestamped default
+        stage_name (str): Name of the stage, used as folder and default filename
+        config (dict, optional): If contains 'filename', use it instead of timestamped default.
+            'format' selects the storage backend ("csv", "parquet", "feather"); defaults to
+            the filename's extension, else "csv".
     """
     stage_dir = "data/" + stage_name
 
     os.makedirs(stage_dir, exist_ok=True)
+    fmt = (config or {}).get("format")
     if config and config["filename"]:
         filename = config["filename"]
+        fmt = fmt or _backend_for_path(filename)
     else:
+        fmt = fmt or "csv"
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{stage_name}_{timestamp}.csv"
+        filename = f"{stage_name}_{timestamp}{STORAGE_BACKENDS[fmt][0]}"
     path = os.path.join(stage_dir, filename)
-    df.to_csv(path, index=True)
+    STORAGE_BACKENDS[fmt][1](df, path)
     return path
 
 
-def read_table(stage_name: str, config: dict = None):
+@instrument
+def read_table(stage_name: str, config: dict = None, columns: list = None):
     """
     Read the latest file in a stage folder, unless overridden by config filename.
 
     Args:
-        stage_dir (str): Directory for this stage
         stage_name (str): Name of the stage
         config (dict, optional): If contains 'filename', use it instead
+        columns (list, optional): Only load these columns (the index is always loaded)
+    """
+    path = resolve_table_path(stage_name, config)
+    return STORAGE_BACKENDS[_backend_for_path(path)][2](path, columns)
+
+
+# ---------------------------------------------------------------
+# Memory-mapped feature matrix
+# ---------------------------------------------------------------
+class FeatureMatrix:
     """
+    A saved numeric table opened as a memory-mapped (n_rows, n_columns) array.
+
+    Values are stored column-major, so single columns and runs of adjacent
+    columns are zero-copy views, and pandas wraps them without copying. The
+    model's feature columns are written first and in order (see `save_matrix`),
+    so training reads them as one view.
+
+    Attributes:
+        values (np.memmap): (n_rows, n_columns) matrix, float32 or float64
+        index (pd.Index): row labels
+        columns (list): column names
+    """
+
+    def __init__(self, values, index, columns):
+        self.values = values
+        self.index = index
+        self.columns = list(columns)
+
+    def __len__(self):
+        return len(self.index)
+
+    def column(self, name) -> pd.Series:
+        """One column as a Series viewing the matrix."""
+        return pd.Series(self.values[:, self.columns.index(name)], index=self.index, name=name, copy=False)
+
+    def frame(self, columns=None) -> pd.DataFrame:
+        """
+        Columns as a DataFrame: a view when they are adjacent in the matrix
+        (in file order), otherwise a single copy of just those columns.
+        """
+        columns = self.columns if columns is None else list(columns)
+        idx = [self.columns.index(c) for c in columns]
+        if not idx:
+            return pd.DataFrame(index=self.index)
+        if idx == list(range(idx[0], idx[0] + len(idx))):
+            values = self.values[:, idx[0]:idx[0] + len(idx)]
+        else:
+            values = self.values[:, idx]
+        return pd.DataFrame(values, index=self.index, columns=columns, copy=False)
+
+
+@instrument
+def save_matrix(df: pd.DataFrame, stage_name: str, config: dict = None, leading: list = None):
+    """
+    Save a numeric table as a memory-mappable matrix.
+
+    Writes `<name>.npy` (column-major values), `<name>.index.npy` (row labels,
+    numeric or datetime64, so they load without pickle) and a `<name>.matrix.json`
+    manifest with the columns, dtype and shape.
+
+    Args:
+        df (pd.DataFrame): Numeric table
+        stage_name (str): Name of the stage, used as folder and default filename
+        config (dict, optional): 'filename' (of the manifest) instead of the timestamped
+            default, and 'dtype' ("float64" or "float32")
+        leading (list, optional): columns written first, in this order, so that
+            `FeatureMatrix.frame(leading)` is a view (e.g. the model's feature columns)
+    Returns:
+        list: [manifest path, values path, index path]
+    """
+    config = config or {}
+    index = df.index.to_numpy()
+    if index.dtype == object:
+        raise ValueError(f"Matrix index must be numeric or datetime64, not {df.index.dtype}")
+    if leading:
+        leading = [c for c in leading if c in df.columns]
+        df = df[leading + [c for c in df.columns if c not in leading]]
     stage_dir = "data/" + stage_name
+    os.makedirs(stage_dir, exist_ok=True)
 
-    if config and config["filename"]:
-        filename = config["filename"]
-        path = os.path.join(stage_dir, filename)
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"{path} does not exist")
-        return pd.read_csv(path, parse_dates=True, index_col=0)
-
-    # Find latest file in folder matching stage_name prefix
-    all_files = [f for f in os.listdir(stage_dir) if f.startswith(stage_name) and f.endswith(".csv")]
-    if not all_files:
-        raise FileNotFoundError(f"No files found in {stage_dir} starting with {stage_name}")
-    latest_file = max(all_files)  # timestamped files sort lexicographically
-    path = os.path.join(stage_dir, latest_file)
-    return pd.read_csv(path, parse_dates=True, index_col=0)
+    if config.get("filename"):
+        manifest_path = os.path.join(stage_dir, config["filename"])
+    else:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        manifest_path = os.path.join(stage_dir, f"{stage_name}_{timestamp}{MATRIX_SUFFIX}")
+    values_path, index_path = matrix_files(manifest_path)
+
+    dtype = np.dtype(config.get("dtype", "float64"))
+    values = np.lib.format.open_memmap(values_path, mode="w+", dtype=dtype, shape=df.shape, fortran_order=True)
+    for j in range(df.shape[1]):
+        values[:, j] = df.iloc[:, j].to_numpy(dtype=dtype)
+    values.flush()
+    del values
+
+    np.save(index_path, index)
+    with open(manifest_path, "w") as f:
+        json.dump({
+            "columns": list(df.columns),
+            "dtype": dtype.name,
+            "shape": list(df.shape),
+            "index_name": df.index.name,
+        }, f, indent=4)
+    return [manifest_path, values_path, index_path]
+
+
+@instrument
+def read_matrix(stage_name: str, config: dict = None, mmap_mode: str = "r"):
+    """
+    Open the latest matrix saved by `save_matrix` without loading it into memory.
+
+    Args:
+        stage_name (str): Name of the stage
+        config (dict, optional): If contains 'filename' (of the manifest), use it instead
+        mmap_mode (str): numpy memmap mode, "r" (read-only) by default
+    Returns:
+        FeatureMatrix
+    """
+    manifest_path = resolve_matrix_path(stage_name, config)
+    values_path, index_path = matrix_files(manifest_path)
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+
+    values = np.load(values_path, mmap_mode=mmap_mode)
+    index = pd.Index(np.load(index_path, allow_pickle=False), name=manifest["index_name"])
+    return FeatureMatrix(values, index, manifest["columns"])
@@ -1,16 +1,96 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+
 import pandas as pd
 import numpy as np
+from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.metrics import mean_squared_error
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from sbux_model import profiling
+from sbux_model.profiling import instrument
+
+
+def build_pipeline(model_cfg):
+    """
+    Build the StandardScaler + linear model pipeline described by a ``model`` config block.
+
+    Args:
+        model_cfg (dict): e.g. {"type": "ridge", "alpha": 20.0, "fit_intercept": true}
+    Returns:
+        sklearn.pipeline.Pipeline
+    """
+    model_type = model_cfg.get("type", "ridge").lower()
+
+    if model_type == "linear":
+        base_model = LinearRegression(fit_intercept=model_cfg.get("fit_intercept", True))
+    elif model_type == "ridge":
+        base_model = Ridge(alpha=model_cfg.get("alpha", 1.0),
+                           fit_intercept=model_cfg.get("fit_intercept", True))
+    elif model_type == "lasso":
+        base_model = Lasso(alpha=model_cfg.get("alpha", 1.0),
+                           fit_intercept=model_cfg.get("fit_intercept", True))
+    else:
+        raise ValueError(f"Unknown model type: {model_type}")
+
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("model", base_model)
+    ])
+
+
+def walk_forward_windows(n, train_window, horizon, expanding=False):
+    """
+    Yield the positional bounds of each walk-forward window.
+
+    Yields
+    ------
+    tuple of int
+        (train_start, test_start, test_end), so that training uses rows
+        [train_start, test_start) and testing uses rows [test_start, test_end).
+    """
+    start = train_window
+    while start + horizon <= n:
+        tr_start = 0 if expanding else start - train_window
+        yield tr_start, start, start + horizon
+        start += horizon
+
 
-def walk_forward_eval(X, y, pipeline, train_window, horizon, expanding=False):
+def oos_metrics(truths, preds):
+    """Aggregate out-of-sample r2, rmse and observation count."""
+    mse = mean_squared_error(truths, preds)
+    r2 = 1 - mse / np.var(truths, ddof=0)
+    rmse = np.sqrt(mse)
+
+    return {
+        "r2_oos": float(r2),
+        "rmse_oos": float(rmse),
+        "n_oos": int(len(truths))
+    }
+
+def _as_pandas(X, y):
+    """Wrap ndarrays (e.g. views of a memory-mapped feature matrix) in pandas without copying."""
+    if not isinstance(X, pd.DataFrame):
+        X = pd.DataFrame(X, copy=False)
+    if not isinstance(y, pd.Series):
+        y = pd.Series(y, index=X.index, copy=False)
+    return X, y
+
+
+@instrument
+def walk_forward_eval(X, y, pipeline, train_window, horizon, expanding=False, alphas=None, n_jobs=1):
     """
     Perform walk-forward (rolling or expanding window) evaluation for a regression model.
 
     Parameters
     ----------
-    X : pd.DataFrame
-        Feature matrix with shape (n_samples, n_features), indexed by time.
-    y : pd.Series
+    X : pd.DataFrame or np.ndarray
+        Feature matrix with shape (n_samples, n_features), indexed by time. Arrays
+        (including memory-mapped ones) are used without copying.
+    y : pd.Series or np.ndarray
         Target vector with shape (n_samples,), indexed by time.
     pipeline : sklearn.pipeline.Pipeline
         A scikit-learn pipeline containing preprocessing and regression model.
@@ -20,6 +100,18 @@ def walk_forward_eval(X, y, pipeline, train_window, horizon, expanding=False):
         Number of observations to predict in each out-of-sample window.
     expanding : bool, default=False
         If True, the training window expands with each iteration; otherwise, a fixed-size rolling window is used.
+    alphas : sequence of float, optional
+        Grid of distinct Ridge regularization strengths. When given, the pipeline must
+        be a StandardScaler + Ridge pipeline and every alpha is evaluated in a single
+        pass with :func:`walk_forward_eval_linear`; ``preds`` is then a DataFrame with
+        one column per alpha and ``metrics`` a dict keyed by alpha. This is a sweep:
+        the best of its metrics is not out-of-sample for the alpha it picks (see
+        :func:`walk_forward_eval_nested`).
+    n_jobs : int, default=1
+        Number of worker processes. Windows are independent, so with n_jobs > 1 they
+        are fitted in a process pool that reads X and y from shared memory. Results
+        are identical to the serial path, and ``pipeline`` is left fitted on the last
+        training window in both cases. -1 uses every CPU.
 
     Returns
     -------
@@ -40,52 +132,426 @@ def walk_forward_eval(X, y, pipeline, train_window, horizon, expanding=False):
     - Assumes that X and y are aligned and indexed by time, typically in chronological order.
     - Useful for time series regression where standard cross-validation would introduce lookahead bias.
     """
-    n = len(X)
-    preds = pd.Series(index=X.index, dtype=float)
-    truths = pd.Series(index=X.index, dtype=float)
+    X, y = _as_pandas(X, y)
+    if alphas is not None:
+        model = pipeline.named_steps.get("model")
+        if not isinstance(model, Ridge) or not isinstance(pipeline.named_steps.get("scaler"), StandardScaler):
+            raise ValueError("alphas requires a StandardScaler + Ridge pipeline")
+        return walk_forward_eval_linear(
+            X, y, train_window, horizon, expanding,
+            alpha=list(alpha_grid(alphas)),
+            fit_intercept=model.fit_intercept
+        )
 
-    start = train_window
-    while start + horizon <= n:
+    n_jobs = _resolve_n_jobs(n_jobs)
+    if n_jobs > 1:
+        windows = list(walk_forward_windows(len(X), train_window, horizon, expanding))
+        with SharedArrays(X=X.to_numpy(dtype=float), y=y.to_numpy(dtype=float)) as shared:
+            with shared.executor(n_jobs) as executor:
+                results = list(executor.map(
+                    _fit_predict_window, repeat(pipeline), windows,
+                    chunksize=max(1, len(windows) // (4 * n_jobs))
+                ))
 
-        # Train indices
-        if expanding:
-            tr_idx = range(0, start)
-        else:
-            tr_idx = range(start - train_window, start)
+        preds = np.full(len(X), np.nan)
+        for (_, te_start, te_end), y_pred in zip(windows, results):
+            preds[te_start:te_end] = y_pred
+        preds = pd.Series(preds, index=X.index)
+        truths = y.astype(float).where(preds.notna())
 
-        te_idx = range(start, start + horizon)
+        if windows:
+            tr_start, te_start, _ = windows[-1]
+            pipeline.fit(X.iloc[tr_start:te_start], y.iloc[tr_start:te_start])
+        valid = truths.dropna().index
+        return preds.loc[valid], truths.loc[valid], oos_metrics(truths.loc[valid], preds.loc[valid])
 
-        X_tr = X.iloc[list(tr_idx)]
-        y_tr = y.iloc[list(tr_idx)]
-        X_te = X.iloc[list(te_idx)]
-        y_te = y.iloc[list(te_idx)]
+    preds = pd.Series(index=X.index, dtype=float)
+    truths = pd.Series(index=X.index, dtype=float)
 
-        pipeline.fit(X_tr, y_tr)
-        y_pred = pipeline.predict(X_te)
+    for tr_start, te_start, te_end in walk_forward_windows(len(X), train_window, horizon, expanding):
+        X_tr = X.iloc[tr_start:te_start]
+        y_tr = y.iloc[tr_start:te_start]
+        X_te = X.iloc[te_start:te_end]
+        y_te = y.iloc[te_start:te_end]
 
-        preds.iloc[list(te_idx)] = y_pred
-        truths.iloc[list(te_idx)] = y_te.values
+        with profiling.span("model.fit_window", rows=te_start - tr_start):
+            pipeline.fit(X_tr, y_tr)
+            y_pred = pipeline.predict(X_te)
 
-        start += horizon
+        preds.iloc[te_start:te_end] = y_pred
+        truths.iloc[te_start:te_end] = y_te.values
 
     # Clean NA (initial training period)
     valid = truths.dropna().index
     preds = preds.loc[valid]
     truths = truths.loc[valid]
 
-    mse = mean_squared_error(truths, preds)
-    r2 = 1 - mse / np.var(truths, ddof=0)
-    rmse = np.sqrt(mse)
+    metrics = oos_metrics(truths, preds)
+
+    return preds, truths, metrics
 
-    metrics = {
-        "r2_oos": float(r2),
-        "rmse_oos": float(rmse),
-        "n_oos": int(len(valid))
-    }
 
+@instrument
+def walk_forward_eval_linear(X, y, train_window, horizon, expanding=False,
+                             alpha=0.0, fit_intercept=True, refresh=100):
+    """
+    Closed-form walk-forward evaluation for StandardScaler + LinearRegression/Ridge.
+
+    Instead of refitting a pipeline on every window, running sufficient statistics
+    (sums of X, y, XᵀX and Xᵀy) are updated with the rows entering the window and
+    the rows leaving it. Each step then standardises the statistics and solves the
+    small (n_features × n_features) normal-equation system, which gives the same
+    predictions as refitting ``Pipeline([StandardScaler(), Ridge(alpha)])``.
+
+    Parameters
+    ----------
+    X : pd.DataFrame or np.ndarray
+        Feature matrix with shape (n_samples, n_features), indexed by time. Arrays
+        (including memory-mapped ones) are used without copying.
+    y : pd.Series or np.ndarray
+        Target vector with shape (n_samples,), indexed by time.
+    train_window : int
+        Number of observations to use for training in each window.
+    horizon : int
+        Number of observations to predict in each out-of-sample window.
+    expanding : bool, default=False
+        If True, the training window expands with each iteration; otherwise, a fixed-size rolling window is used.
+    alpha : float or sequence of float, default=0.0
+        Ridge penalty on the standardised coefficients. 0 reproduces LinearRegression
+        (minimum-norm least squares). A sequence evaluates the whole regularization
+        path from one eigendecomposition per window.
+    fit_intercept : bool, default=True
+        Matches the ``fit_intercept`` argument of the sklearn model.
+    refresh : int or None, default=100
+        Recompute the statistics from scratch every ``refresh`` windows to stop
+        floating-point drift from repeated add/subtract updates. None disables it.
+
+    Returns
+    -------
+    preds, truths, metrics
+        Same as :func:`walk_forward_eval`. For a sequence of alphas, ``preds`` is a
+        DataFrame with one column per alpha and ``metrics`` maps alpha to its metrics.
+    """
+    alphas = alpha_grid(alpha) if np.ndim(alpha) else np.atleast_1d(np.asarray(alpha, dtype=float))
+    X, y = _as_pandas(X, y)
+
+    Xv = np.asarray(X, dtype=float)
+    y_raw = np.asarray(y, dtype=float)
+
+    # Shift by the full-sample means so the running sums stay well conditioned.
+    # Centred statistics are shift-invariant, so this does not leak information.
+    Xv = Xv - Xv.mean(axis=0)
+    y_offset = float(y_raw.mean())
+    yv = y_raw - y_offset
+
+    preds = np.full((len(Xv), len(alphas)), np.nan)
+    truths = pd.Series(index=X.index, dtype=float)
+
+    stats = None
+    lo = hi = 0
+    for step, (tr_start, te_start, te_end) in enumerate(
+            walk_forward_windows(len(Xv), train_window, horizon, expanding)):
+        if stats is None or (refresh and step % refresh == 0):
+            stats = _suff_stats(Xv[tr_start:te_start], yv[tr_start:te_start])
+        else:
+            _update_suff_stats(stats, Xv[hi:te_start], yv[hi:te_start], sign=1.0)
+            _update_suff_stats(stats, Xv[lo:tr_start], yv[lo:tr_start], sign=-1.0)
+        lo, hi = tr_start, te_start
+
+        y_pred = _predict_from_stats(stats, Xv[te_start:te_end], alphas, fit_intercept)
+        if fit_intercept:
+            y_pred = y_pred + y_offset
+
+        preds[te_start:te_end] = y_pred
+        truths.iloc[te_start:te_end] = y_raw[te_start:te_end]
+
+    valid = truths.notna().values
+    truths = truths.loc[valid]
+
+    if np.ndim(alpha) == 0:
+        preds = pd.Series(preds[valid, 0], index=truths.index)
+        return preds, truths, oos_metrics(truths, preds)
+
+    preds = pd.DataFrame(preds[valid], index=truths.index, columns=list(alphas))
+    metrics = {a: oos_metrics(truths, preds[a]) for a in preds.columns}
     return preds, truths, metrics
 
 
+def alpha_grid(alphas):
+    """Validate a Ridge alpha grid: non-empty, non-negative and without duplicates."""
+    grid = np.atleast_1d(np.asarray(alphas, dtype=float))
+    if grid.size == 0:
+        raise ValueError("Empty alpha grid")
+    if (grid < 0).any():
+        raise ValueError(f"Negative alpha in grid: {grid.tolist()}")
+    if len(np.unique(grid)) != len(grid):
+        raise ValueError(f"Duplicate alphas in grid: {grid.tolist()}")
+    return grid
+
+
+@instrument
+def walk_forward_eval_nested(X, y, train_window, horizon, alphas, validation, expanding=False,
+                             fit_intercept=True):
+    """
+    Walk-forward evaluation of StandardScaler + Ridge with alpha chosen inside each training window.
+
+    In every window each alpha is fitted on the training rows except the last
+    ``validation`` ones and scored on those; the alpha with the lowest validation
+    MSE is refitted on the whole training window and predicts the test rows. The
+    test rows take no part in the choice, so the metrics are out-of-sample for the
+    whole procedure, unlike the best column of a sweep over the same rows.
+
+    Parameters
+    ----------
+    X, y, train_window, horizon, expanding, fit_intercept
+        As in :func:`walk_forward_eval_linear`.
+    alphas : sequence of float
+        Grid of distinct Ridge regularization strengths.
+    validation : int
+        Rows at the end of each training window used to choose alpha
+        (0 < validation < train_window).
+
+    Returns
+    -------
+    preds, truths, metrics
+        Same as :func:`walk_forward_eval`.
+    chosen : pd.Series
+        Alpha chosen in each window, indexed by the window's first test row.
+    """
+    alphas = alpha_grid(alphas)
+    if not 0 < validation < train_window:
+        raise ValueError(f"validation must be between 0 and train_window ({train_window}), got {validation}")
+    X, y = _as_pandas(X, y)
+
+    # Same shift as walk_forward_eval_linear: centred statistics do not depend on it
+    Xv = np.asarray(X, dtype=float)
+    Xv = Xv - Xv.mean(axis=0)
+    y_raw = np.asarray(y, dtype=float)
+    y_offset = float(y_raw.mean())
+    yv = y_raw - y_offset
+    offset = y_offset if fit_intercept else 0.0
+
+    preds = np.full(len(Xv), np.nan)
+    truths = pd.Series(index=X.index, dtype=float)
+    chosen = {}
+    for tr_start, te_start, te_end in walk_forward_windows(len(Xv), train_window, horizon, expanding):
+        va_start = te_start - validation
+        stats = _suff_stats(Xv[tr_start:va_start], yv[tr_start:va_start])
+        val_pred = _predict_from_stats(stats, Xv[va_start:te_start], alphas, fit_intercept) + offset
+        best = int(np.argmin(((val_pred - y_raw[va_start:te_start, None]) ** 2).mean(axis=0)))
+
+        _update_suff_stats(stats, Xv[va_start:te_start], yv[va_start:te_start], sign=1.0)
+        preds[te_start:te_end] = _predict_from_stats(stats, Xv[te_start:te_end], alphas[[best]],
+                                                     fit_intercept)[:, 0] + offset
+        truths.iloc[te_start:te_end] = y_raw[te_start:te_end]
+        chosen[X.index[te_start]] = float(alphas[best])
+
+    valid = truths.notna().values
+    truths = truths.loc[valid]
+    preds = pd.Series(preds[valid], index=truths.index)
+    return preds, truths, oos_metrics(truths, preds), pd.Series(chosen, dtype=float, name="alpha")
+
+
+def _suff_stats(X, y):
+    """Sufficient statistics of a block of rows."""
+    return {
+        "n": len(X),
+        "sx": X.sum(axis=0),
+        "sy": float(y.sum()),
+        "sxx": X.T @ X,
+        "sxy": X.T @ y,
+    }
+
+
+def _update_suff_stats(stats, X, y, sign):
+    """Add (sign=1) or remove (sign=-1) a block of rows in place."""
+    if len(X) == 0:
+        return
+    stats["n"] += int(sign) * len(X)
+    stats["sx"] += sign * X.sum(axis=0)
+    stats["sy"] += sign * float(y.sum())
+    stats["sxx"] += sign * (X.T @ X)
+    stats["sxy"] += sign * (X.T @ y)
+
+
+def _predict_from_stats(stats, X_te, alphas, fit_intercept):
+    """
+    Solve the standardised ridge system from sufficient statistics and predict X_te.
+
+    Returns an array of shape (len(X_te), len(alphas)).
+    """
+    n = stats["n"]
+    x_mean = stats["sx"] / n
+    y_mean = stats["sy"] / n
+    cxx = stats["sxx"] - n * np.outer(x_mean, x_mean)
+    cxy = stats["sxy"] - n * x_mean * y_mean
+
+    # StandardScaler: population std, constant features keep a scale of 1
+    scale = np.sqrt(np.clip(np.diag(cxx) / n, 0.0, None))
+    scale[scale < 10 * np.finfo(float).eps * np.maximum(np.abs(x_mean), 1.0)] = 1.0
+
+    # Scaled features are centred, so Xᵀy is the same with or without an intercept
+    gram = cxx / np.outer(scale, scale)
+    rhs = cxy / scale
+
+    # One eigendecomposition serves every alpha: coef(a) = V diag(1 / (λ + a)) Vᵀ rhs
+    evals, evecs = np.linalg.eigh(gram)
+    proj = evecs.T @ rhs
+    denom = evals[:, None] + alphas[None, :]
+    # alpha = 0 is minimum-norm least squares, as in LinearRegression
+    tol = max(evals.max(), 0.0) * len(evals) * np.finfo(float).eps
+    keep = (alphas[None, :] > 0) | (evals[:, None] > tol)
+    inv = np.where(keep, 1.0 / np.where(keep, denom, 1.0), 0.0)
+    coef = evecs @ (inv * proj[:, None])
+
+    y_pred = ((X_te - x_mean) / scale) @ coef
+    if fit_intercept:
+        y_pred = y_pred + y_mean
+    return y_pred
+
+
+@instrument
+def walk_forward_configs(X, y, configs, n_jobs=1):
+    """
+    Run walk-forward evaluation for several model configurations.
+
+    Parameters
+    ----------
+    X : pd.DataFrame or np.ndarray
+        Feature matrix, indexed by time.
+    y : pd.Series or np.ndarray
+        Target vector, indexed by time.
+    configs : list of dict
+        Each with keys "model" (a model config block, see :func:`build_pipeline`),
+        "train_window", "horizon", optional "expanding" and optional "features"
+        (a subset of X's columns).
+    n_jobs : int, default=1
+        Number of worker processes. Whole configurations are spread across a process
+        pool that reads X and y from shared memory. -1 uses every CPU.
+
+    Returns
+    -------
+    list of (preds, truths, metrics)
+        One entry per config, in the same order as ``configs``.
+    """
+    X, y = _as_pandas(X, y)
+    columns = list(X.columns)
+    tasks = [
+        {
+            "model": cfg["model"],
+            "train_window": cfg["train_window"],
+            "horizon": cfg["horizon"],
+            "expanding": cfg.get("expanding", False),
+            "features": [columns.index(c) for c in cfg.get("features", columns)],
+        }
+        for cfg in configs
+    ]
+
+    n_jobs = _resolve_n_jobs(n_jobs)
+    Xv = X.to_numpy(dtype=float)
+    yv = y.to_numpy(dtype=float)
+    if n_jobs > 1:
+        with SharedArrays(X=Xv, y=yv) as shared:
+            with shared.executor(n_jobs) as executor:
+                results = list(executor.map(_run_config, tasks))
+    else:
+        results = [_run_config(task, Xv, yv) for task in tasks]
+
+    out = []
+    for preds in results:
+        preds = pd.Series(preds, index=X.index).dropna()
+        truths = y.loc[preds.index].astype(float)
+        out.append((preds, truths, oos_metrics(truths, preds)))
+    return out
+
+
+def _resolve_n_jobs(n_jobs):
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+class SharedArrays:
+    """
+    Place NumPy arrays in shared memory for a process pool.
+
+    Workers created through :meth:`executor` attach to the blocks once, in their
+    initializer, so the arrays are never pickled per task.
+
+    Example:
+        with SharedArrays(X=X, y=y) as shared:
+            with shared.executor(4) as ex:
+                ex.map(task, ...)   # tasks read _WORKER_ARRAYS["X"]
+    """
+
+    def __init__(self, **arrays):
+        self._blocks = []
+        self.specs = {}
+        for name, arr in arrays.items():
+            # Keep the memory layout (a DataFrame's values are usually column-major)
+            # so BLAS sums in the same order and results match the serial path bit for bit
+            order = "F" if arr.flags.f_contiguous and not arr.flags.c_contiguous else "C"
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf, order=order)[...] = arr
+            self._blocks.append(shm)
+            self.specs[name] = (shm.name, arr.shape, arr.dtype.str, order)
+
+    def executor(self, n_jobs):
+        return ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_attach_shared_arrays,
+            initargs=(self.specs,)
+        )
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Arrays attached by each pool worker (see SharedArrays)
+_WORKER_ARRAYS = {}
+_WORKER_BLOCKS = []
+
+
+def _attach_shared_arrays(specs):
+    for name, (shm_name, shape, dtype, order) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _WORKER_BLOCKS.append(shm)
+        _WORKER_ARRAYS[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, order=order)
+
+
+def _fit_predict_window(pipeline, window):
+    tr_start, te_start, te_end = window
+    X, y = _WORKER_ARRAYS["X"], _WORKER_ARRAYS["y"]
+    pipeline.fit(X[tr_start:te_start], y[tr_start:te_start])
+    return pipeline.predict(X[te_start:te_end])
+
+
+def _run_config(task, X=None, y=None):
+    if X is None:
+        X, y = _WORKER_ARRAYS["X"], _WORKER_ARRAYS["y"]
+    if task["features"] != list(range(X.shape[1])):
+        X = X[:, task["features"]]
+    pipeline = build_pipeline(task["model"])
+
+    preds = np.full(len(X), np.nan)
+    for tr_start, te_start, te_end in walk_forward_windows(
+            len(X), task["train_window"], task["horizon"], task["expanding"]):
+        pipeline.fit(X[tr_start:te_start], y[tr_start:te_start])
+        preds[te_start:te_end] = pipeline.predict(X[te_start:te_end])
+    return preds
+
+
 def zero_predictor_baseline(y, oos_index):
     """
     Zero predictor baseline for alpha.
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from sbux_model import rolling
+from sbux_model.features import beta_term_structure, spec_bars
+from sbux_model.profiling import instrument
+
+
+@instrument
+def panel_residual_alpha(prices, bench, window=52):
+    """
+    Rolling beta and residual alpha for N assets against one benchmark in a single pass.
+
+    The panel version of `features.compute_residual_alpha`: returns, rolling
+    betas and alphas are computed for every asset at once on (T, N) arrays,
+    without a Python loop over tickers.
+
+    Args:
+        prices (np.ndarray): (T, N) asset prices
+        bench (np.ndarray): (T,) benchmark prices
+        window (int): rolling beta window
+    Returns:
+        dict: (T, N) arrays "price", "asset_ret", "beta_roll", "alpha", "alpha_fwd_1"
+            and the (T,) array "bench_ret"
+    """
+    prices = np.asarray(prices, dtype=float)
+    asset_ret = rolling.pct_change(prices)
+    bench_ret = rolling.pct_change(np.asarray(bench, dtype=float))
+
+    beta = rolling.rolling_beta(asset_ret, bench_ret, window)
+    alpha = asset_ret - beta * bench_ret[:, None]
+
+    return {
+        "price": prices,
+        "asset_ret": asset_ret,
+        "bench_ret": bench_ret,
+        "beta_roll": beta,
+        "alpha": alpha,
+        "alpha_fwd_1": rolling.shift(alpha, -1),
+    }
+
+
+@instrument
+def panel_features(panel, feature_defs):
+    """
+    Apply feature specs to every asset of a panel at once.
+
+    Specs use the same types as features_config.json, with "column" naming a
+    panel field ("price", "alpha", ...) instead of a table column.
+
+    Args:
+        panel (dict): name -> (T, N) array, e.g. from `panel_residual_alpha`
+        feature_defs (dict): feature specs
+    Returns:
+        dict: feature name -> (T, N) array
+    """
+    out = {}
+    for feat_cfg in feature_defs.values():
+        ftype = feat_cfg["type"]
+        col = feat_cfg.get("column", "alpha")
+        x = panel[col] if col in panel else out[col]
+
+        if ftype == "lag":
+            out[f"{col}_lag_{feat_cfg['lag']}"] = rolling.shift(x, feat_cfg["lag"])
+        elif ftype == "diff":
+            lag = feat_cfg.get("lag", 1)
+            out[f"{col}_diff_{lag}"] = x - rolling.shift(x, spec_bars(feat_cfg, "lag", 1))
+        elif ftype == "rolling_mean":
+            window = feat_cfg["window"]
+            out[f"{col}_rm_{window}"] = rolling.rolling_mean(x, spec_bars(feat_cfg, "window"))
+        elif ftype == "zscore":
+            window = feat_cfg["window"]
+            rows = spec_bars(feat_cfg, "window")
+            out[f"{col}_z_{window}"] = (x - rolling.rolling_mean(x, rows)) / rolling.rolling_std(x, rows)
+        elif ftype == "momentum":
+            window = feat_cfg["window"]
+            out[f"{col}_mom_{window}"] = rolling.pct_change(x, spec_bars(feat_cfg, "window"))
+        elif ftype == "lagged_alpha":
+            alpha_col = feat_cfg.get("alpha_col", "alpha")
+            a = panel[alpha_col]
+            for L in feat_cfg.get("lags", [1]):
+                out[f"{alpha_col}_lag{L}"] = rolling.shift(a, L)
+            mas = feat_cfg.get("mas", [])
+            for M, rows in zip(mas, spec_bars(feat_cfg, "mas", mas)):
+                out[f"{alpha_col}_ma{M}"] = rolling.rolling_mean(a, rows)
+        elif ftype == "latest_pct_change":
+            pct = rolling.pct_change(x)
+            eps = feat_cfg.get("epsilon", 1e-8)
+            out[f"{col}_latest_pct_change"] = rolling.ffill(np.where(np.abs(pct) > eps, pct, np.nan))
+        elif ftype == "beta_term_structure":
+            out.update(beta_term_structure(
+                x, panel[feat_cfg.get("benchmark_column", "bench_ret")],
+                windows=spec_bars(feat_cfg, "windows", [13, 26, 52, 104]),
+                halflives=spec_bars(feat_cfg, "halflives", []),
+                labels=(feat_cfg.get("windows", [13, 26, 52, 104]), feat_cfg.get("halflives", []))
+            ))
+        else:
+            raise ValueError(f"Unknown feature type: {ftype}")
+    return out
+
+
+def panel_memory_bytes(n_rows, n_assets, n_outputs, itemsize=8):
+    """
+    Approximate peak memory of a panel pass.
+
+    Every output is one (T, N) array, and each rolling kernel holds a handful of
+    (T, N) temporaries, so memory grows linearly in rows × assets.
+    """
+    return (n_outputs + 8) * n_rows * n_assets * itemsize
+
+
+@instrument
+def build_panel(prices_df, benchmark, feature_defs, window=52, chunk_size=None):
+    """
+    Residual alpha and features for a universe of assets, as a long table.
+
+    Each chunk of assets is written straight into its columns of one
+    preallocated (T, N, K) output, already in (date, asset) order, so there is
+    no concatenation or sort of the whole panel afterwards.
+
+    Args:
+        prices_df (pd.DataFrame): Wide price table, one column per asset, indexed by date
+        benchmark (pd.Series): Benchmark prices on the same index
+        feature_defs (dict): Panel feature specs (see `panel_features`)
+        window (int): rolling beta window
+        chunk_size (int, optional): Process this many assets at a time, so memory beyond
+            the output table is bounded by `panel_memory_bytes(T, chunk_size, ...)`
+            instead of the universe size
+    Returns:
+        pd.DataFrame: indexed by (Date, asset), one column per output
+    """
+    assets = list(prices_df.columns)
+    chunk_size = chunk_size or len(assets)
+    bench = benchmark.to_numpy(dtype=float)
+
+    out = names = None
+    for start in range(0, len(assets), chunk_size):
+        cols = assets[start:start + chunk_size]
+        panel = panel_residual_alpha(prices_df[cols].to_numpy(dtype=float), bench, window)
+        panel.update(panel_features(panel, feature_defs))
+        bench_ret = panel.pop("bench_ret")
+
+        if out is None:
+            names = list(panel) + ["bench_ret"]
+            out = np.empty((len(prices_df), len(assets), len(names)))
+            out[:, :, -1] = bench_ret[:, None]
+        for k, name in enumerate(names[:-1]):
+            out[:, start:start + len(cols), k] = panel[name]
+
+    index = pd.MultiIndex.from_product([prices_df.index, assets], names=[prices_df.index.name or "Date", "asset"])
+    # (T, N, K) -> rows ordered by date then asset, without a copy
+    return pd.DataFrame(out.reshape(-1, len(names)), index=index, columns=names, copy=False)
@@ -0,0 +1,59 @@
+import os
+
+# Stage outputs are found by name and extension only, so this module stays free
+# of pandas: the CLI resolves stage inputs for cache lookups without loading it.
+
+# format name -> file extension of each storage backend (`io.register_backend` adds to it)
+TABLE_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+MATRIX_SUFFIX = ".matrix.json"
+
+
+def resolve_table_path(stage_name: str, config: dict = None):
+    """
+    Path of the table `read_table` would load, without reading it.
+
+    Args:
+        stage_name (str): Name of the stage
+        config (dict, optional): If contains 'filename', use it instead
+    """
+    stage_dir = "data/" + stage_name
+
+    if config and config["filename"]:
+        path = os.path.join(stage_dir, config["filename"])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} does not exist")
+        return path
+
+    # Find latest file in folder matching stage_name prefix, in any registered format
+    extensions = tuple(TABLE_EXTENSIONS.values())
+    all_files = [f for f in os.listdir(stage_dir) if f.startswith(stage_name) and f.endswith(extensions)]
+    if not all_files:
+        raise FileNotFoundError(f"No files found in {stage_dir} starting with {stage_name}")
+    latest_file = max(all_files)  # timestamped files sort lexicographically
+    return os.path.join(stage_dir, latest_file)
+
+
+def matrix_files(manifest_path: str):
+    """Values and index paths of a matrix manifest."""
+    # Values and index are named after the manifest, so renaming all three together keeps them linked
+    stem = manifest_path[:-len(MATRIX_SUFFIX)]
+    return stem + ".npy", stem + ".index.npy"
+
+
+def resolve_matrix_path(stage_name: str, config: dict = None):
+    """Manifest path of the matrix `read_matrix` would open (the latest one unless 'filename' is set)."""
+    stage_dir = "data/" + stage_name
+    if config and config.get("filename"):
+        path = os.path.join(stage_dir, config["filename"])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} does not exist")
+        return path
+
+    all_files = [f for f in os.listdir(stage_dir) if f.startswith(stage_name) and f.endswith(MATRIX_SUFFIX)]
+    if not all_files:
+        raise FileNotFoundError(f"No matrix found in {stage_dir} starting with {stage_name}")
+    return os.path.join(stage_dir, max(all_files))
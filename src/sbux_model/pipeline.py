@@ -0,0 +1,626 @@
+import os
+import json
+import pickle
+import threading
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+from sbux_model import preprocessing as pp
+from sbux_model import features as ft
+from sbux_model import panel as pn
+from sbux_model import profiling
+from sbux_model import quality
+from sbux_model.frequency import PIPELINE_CONFIG, get_frequency, bars, scale_feature_defs
+from sbux_model.store import open_store, series_name
+from sbux_model.stages import STAGE_CONFIGS, load_config, store_settings, raw_sources, vintage_sources
+from sbux_model.io import read_table, save_table, save_matrix, FeatureMatrix
+
+ALPHA_ARGS = {"asset_col": "SBUX", "benchmark_col": "SPY", "window": 52}
+
+
+def alpha_args(freq=None):
+    """ALPHA_ARGS with the 52-week beta window in rows of `freq` (the pipeline frequency by default)."""
+    freq = freq or get_frequency()
+    return {**ALPHA_ARGS, "window": bars(ALPHA_ARGS["window"], freq)}
+
+
+def _read_vintages(key, path, store=None):
+    if store is None:
+        print(path)
+        with profiling.span(f"read_vintages:{key}", path=path):
+            return pd.read_csv(path, parse_dates=pp.VINTAGE_KEYS)
+    print(f"{store.path}: {series_name(path)}")
+    with profiling.span(f"read_vintages:{key}", series=series_name(path)):
+        return store.read_vintages(series_name(path))
+
+
+def _join_vintages(df, vintages, columns):
+    """Add the point-in-time columns of `vintages` on the bars of `df`, in `columns` order."""
+    if not vintages:
+        return df
+    with profiling.span("asof_vintages", sources=len(vintages)):
+        pit = pp.asof_vintages(pd.concat(vintages, ignore_index=True), df.index)
+    return pd.concat([df, pit], axis=1)[columns]
+
+
+# ---------------------------------------------------------------
+# Stages: DataFrames in, DataFrames out, no files written
+# ---------------------------------------------------------------
+def preprocess(config):
+    """
+    Read the raw files listed in preprocessing_config.json (or their series in the
+    time-series store, when `store` is enabled in pipeline_config.json), resample
+    each to the pipeline frequency and merge on date.
+
+    With `point_in_time` enabled, sources with release-date vintages are instead
+    as-of joined on the bars: each bar sees the latest release available on its
+    date, not the revised history.
+
+    Returns:
+        pd.DataFrame: table with one row per bar, rows missing any source dropped
+    """
+    if config.get("streaming", {}).get("enabled", False):
+        return preprocess_streaming(config)
+
+    freq = get_frequency()
+    preprocessed_dfs = []
+    point_in_time = vintage_sources(config)
+    vintages, columns = [], []
+    # Raw series from the time-series store instead of the CSVs, when enabled
+    store = open_store()
+
+    for key, path, func_name in raw_sources(config, freq):
+        if key in point_in_time:
+            vintages.append(_read_vintages(key, point_in_time[key], store))
+            columns += [c for c in vintages[-1].columns if c not in pp.VINTAGE_KEYS]
+            continue
+        if store is None:
+            print(path)
+            with profiling.span(f"read_raw:{key}", path=path):
+                df = pd.read_csv(path, parse_dates=True)
+        else:
+            print(f"{store.path}: {series_name(path)}")
+            with profiling.span(f"read_store:{key}", series=series_name(path)):
+                df = store.read(series_name(path)).reset_index()
+
+        preprocessed_dfs.append(pp.resample(df, func_name, freq["rule"]))
+        columns += list(preprocessed_dfs[-1].columns)
+    if store is not None:
+        store.close()
+
+    # Merge all tables on Date
+    with profiling.span("merge_sources", sources=len(preprocessed_dfs)):
+        preprocessed_df = pd.concat(preprocessed_dfs, axis=1)
+        preprocessed_df = preprocessed_df.loc[~preprocessed_df.index.duplicated(keep='last')]
+    preprocessed_df = _join_vintages(preprocessed_df, vintages, columns)
+    report_quality(config, preprocessed_df)
+    preprocessed_df.dropna(inplace=True)
+    return preprocessed_df
+
+
+def _raw_chunks(key, path, chunksize):
+    with profiling.span(f"read_raw:{key}", path=path, chunksize=chunksize):
+        reader = pd.read_csv(path, chunksize=chunksize)
+    while True:
+        with profiling.span(f"read_raw:{key}", path=path, chunksize=chunksize):
+            chunk = next(reader, None)
+        if chunk is None:
+            reader.close()
+            return
+        yield chunk
+
+
+def preprocess_streaming(config):
+    """
+    `preprocess` for raw files too large to load whole (the `streaming` block of
+    preprocessing_config.json): each file is read in chunks of `chunksize` rows,
+    which must be in date order, resampled chunk by chunk and k-way merged on
+    date, so memory is bounded by the chunk size rather than the history.
+
+    Streaming reads the raw CSVs, so it cannot be combined with the time-series
+    store (`store` in pipeline_config.json), which is already read by date range.
+
+    Returns:
+        pd.DataFrame: the same table as `preprocess`
+    """
+    if store_settings()["enabled"]:
+        raise ValueError("preprocessing `streaming` reads the raw CSVs: disable it or the "
+                         "time-series `store` in pipeline_config.json")
+    chunksize = config["streaming"].get("chunksize", 100_000)
+    freq = get_frequency()
+    point_in_time = vintage_sources(config)
+    streams, vintages, columns = [], [], []
+    for key, path, func_name in raw_sources(config, freq):
+        if key in point_in_time:
+            # Vintages are release-level and small: read whole, joined after the merge
+            vintages.append(_read_vintages(key, point_in_time[key]))
+            columns += [c for c in vintages[-1].columns if c not in pp.VINTAGE_KEYS]
+            continue
+        print(path)
+        columns += list(pd.read_csv(path, nrows=0).columns[1:])
+        streams.append(pp.stream_resampled(_raw_chunks(key, path, chunksize), func_name, freq["rule"]))
+
+    with profiling.span("merge_sources", sources=len(streams), streaming=True):
+        merged = pp.merge_streams(streams, dropna=False)
+    merged = _join_vintages(merged, vintages, columns)
+    report_quality(config, merged)
+    return merged.dropna()
+
+
+def report_quality(config, df, warmup=0):
+    """
+    Print the data-quality report of a stage table (the `quality` block of the stage
+    config: `enabled`, `outlier_z`, `stale_min`, `max_rows`).
+    """
+    quality_cfg = config.get("quality", {})
+    if not quality_cfg.get("enabled", True):
+        return None
+    report = quality.quality_report(df, warmup=warmup, outlier_z=quality_cfg.get("outlier_z", 8.0),
+                                    max_rows=quality_cfg.get("max_rows", 20))
+    quality.print_report(report, stale_min=quality_cfg.get("stale_min", 4))
+    return report
+
+
+def features(config, df, return_state=False):
+    """
+    Residual alpha target and the configured features for a preprocessed table.
+
+    Args:
+        config (dict): features_config.json
+        df (pd.DataFrame): preprocessed table
+        return_state (bool): also return the incremental feature state
+    Returns:
+        pd.DataFrame (and the state dict if `return_state`): rows with NaNs dropped
+    """
+    # Windows in the specs are in weeks; convert them to rows at the pipeline frequency
+    freq = get_frequency()
+    feature_defs = scale_feature_defs(config.get("features", {}), freq)
+    args = alpha_args(freq)
+    df_input = df
+
+    # 1. Compute RETURNS and TARGET (Expected Excess Return)
+    df = ft.compute_residual_alpha(df.copy(), **args)
+
+    # 2. Apply feature engineering from JSON specs (compiled into one pass)
+    df = ft.apply_features(df, feature_defs)
+
+    # 3. Drop NA generated by rolling/lag + final rows with no target
+    report_quality(config, df, warmup=args["window"])
+
+    if return_state:
+        # Trailing weeks the preprocessed table may revise between runs (e.g. restated macro data)
+        revisable = bars(config.get("incremental", {}).get("revisable_weeks", 13), freq)
+        state = ft.init_feature_state(df_input, df, feature_defs, revisable=revisable, **args)
+    else:
+        state = None
+    df = df.dropna()
+    return (df, state) if return_state else df
+
+
+def matrix_leading_columns():
+    """Feature columns of train_config.json, written first in the feature matrix so training reads a view."""
+    return load_config(STAGE_CONFIGS["model"])["feature_columns"]
+
+
+def feature_panel(config, df):
+    """Panel features for the configured universe, or None when panel mode is off."""
+    panel_cfg = config.get("panel", {})
+    if not panel_cfg.get("enabled", False):
+        return None
+    freq = get_frequency()
+    return pn.build_panel(
+        df[panel_cfg["assets"]], df[panel_cfg.get("benchmark", "SPY")],
+        scale_feature_defs(panel_cfg.get("features", {}), freq),
+        window=bars(panel_cfg.get("window", 52), freq),
+        chunk_size=panel_cfg.get("chunk_size")
+    )
+
+
+def print_top_correlated_features(df, top_n=10):
+    corr_matrix = df.corr().abs()  # absolute correlations
+    # Mask lower triangle
+    mask = np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
+    corr_matrix_triu = corr_matrix.where(mask)
+    # Stack and sort
+    sorted_pairs = corr_matrix_triu.stack().sort_values(ascending=False)
+    print(f"\nTop {top_n} most correlated feature pairs:\n")
+    print(sorted_pairs.head(top_n))
+
+
+def train(config, df):
+    """
+    Walk-forward evaluation and final fit of the configured model.
+
+    Args:
+        config (dict): train_config.json
+        df (pd.DataFrame or FeatureMatrix): features table (extra columns are ignored);
+            a memory-mapped matrix is used through views (the feature columns are adjacent
+            when it was saved with `matrix_leading_columns`, otherwise only they are copied)
+    Returns:
+        dict: "predictions" (target, prediction, walk-forward prediction and feature columns), the fitted
+            "pipeline", "metrics" and "coefficients"
+    """
+    # Imported here so the other stages don't pay for sklearn
+    from sbux_model.model import (build_pipeline, walk_forward_eval, walk_forward_eval_linear,
+                                  walk_forward_eval_nested, walk_forward_windows, zero_predictor_baseline)
+
+    # Walk-forward parameters, in weeks, as rows at the pipeline frequency
+    freq = get_frequency()
+    wf_cfg = config.get("test", {})
+    train_window = bars(wf_cfg.get("train_window", 156), freq)
+    horizon = bars(wf_cfg.get("horizon", 4), freq)
+    expanding = wf_cfg.get("expanding", False)
+    engine = wf_cfg.get("engine", "sklearn")
+    n_jobs = wf_cfg.get("n_jobs", 1)
+
+    target_col = config["target"]
+    feature_cols = config["feature_columns"]
+    if isinstance(df, FeatureMatrix):
+        X = df.frame(feature_cols)
+        y = df.column(target_col)
+    else:
+        X = df[feature_cols].copy()
+        y = df[target_col].copy()
+
+    print_top_correlated_features(X, top_n=10)
+
+    # Model selection
+    model_cfg = config.get("model", {"type": "ridge"})
+    model_type = model_cfg.get("type", "ridge").lower()
+
+    # A list of Ridge alphas: each walk-forward window picks one on the end of its own training rows
+    alpha_grid = model_cfg.get("alpha") if isinstance(model_cfg.get("alpha"), list) else None
+    if alpha_grid is not None and model_type != "ridge":
+        raise ValueError(f"An alpha grid is only supported for ridge, not {model_type}")
+
+    pipeline = build_pipeline(
+        {**model_cfg, "alpha": alpha_grid[0]} if alpha_grid else model_cfg
+    )
+
+    # Walk-Forward Evaluation
+    print("Running walk-forward evaluation...\n")
+    alpha_sweep = alpha_chosen = None
+    if alpha_grid is not None:
+        # Reported metrics come from the nested choice, which never sees the test rows
+        validation = bars(wf_cfg.get("validation", 52), freq)
+        preds_oos, truths_oos, oos_metrics, alpha_chosen = walk_forward_eval_nested(
+            X, y,
+            train_window=train_window,
+            horizon=horizon,
+            alphas=alpha_grid,
+            validation=validation,
+            expanding=expanding,
+            fit_intercept=model_cfg.get("fit_intercept", True)
+        )
+        print(f"Alpha chosen per window (last {validation} training rows): "
+              + ", ".join(f"{a:g} x{n}" for a, n in alpha_chosen.value_counts().sort_index().items()))
+
+        # Every alpha fixed over all windows, for reference only: picking the best of
+        # these would be selected on the same rows it is scored on
+        _, _, alpha_sweep = walk_forward_eval(
+            X, y, pipeline,
+            train_window=train_window,
+            horizon=horizon,
+            expanding=expanding,
+            alphas=alpha_grid
+        )
+        print("Fixed-alpha sweep (in-sample for the choice of alpha, not OOS):")
+        for a, m in alpha_sweep.items():
+            print(f"alpha={a}: r2={m['r2_oos']:.5f}, rmse={m['rmse_oos']:.6f}")
+
+        # The final model uses the alpha chosen in the latest window
+        best_alpha = float(alpha_chosen.iloc[-1])
+        print(f"\nFinal model alpha = {best_alpha}\n")
+        pipeline.set_params(model__alpha=best_alpha)
+
+        tr_start, te_start, _ = list(walk_forward_windows(len(X), train_window, horizon, expanding))[-1]
+        pipeline.fit(X.iloc[tr_start:te_start], y.iloc[tr_start:te_start])
+    elif engine == "closed_form":
+        # Sufficient-statistics engine: only valid for the scaler + linear/ridge pipelines
+        if model_type not in ("linear", "ridge"):
+            raise ValueError(f"closed_form engine does not support model type: {model_type}")
+        preds_oos, truths_oos, oos_metrics = walk_forward_eval_linear(
+            X, y,
+            train_window=train_window,
+            horizon=horizon,
+            expanding=expanding,
+            alpha=model_cfg.get("alpha", 1.0) if model_type == "ridge" else 0.0,
+            fit_intercept=model_cfg.get("fit_intercept", True)
+        )
+        # Leave the pipeline fitted on the last training window, as the sklearn loop does
+        tr_start, te_start, _ = list(walk_forward_windows(len(X), train_window, horizon, expanding))[-1]
+        pipeline.fit(X.iloc[tr_start:te_start], y.iloc[tr_start:te_start])
+    elif engine == "sklearn":
+        preds_oos, truths_oos, oos_metrics = walk_forward_eval(
+            X, y, pipeline,
+            train_window=train_window,
+            horizon=horizon,
+            expanding=expanding,
+            n_jobs=n_jobs
+        )
+    else:
+        raise ValueError(f"Unknown walk-forward engine: {engine}")
+
+    # Zero-predictor baseline (alpha = 0)
+    zero_metrics = zero_predictor_baseline(y, truths_oos.index)
+
+    print("\nZero-predictor baseline (alpha = 0):")
+    for k, v in zero_metrics.items():
+        print(f"{k}: {v}")
+
+    print("OOS Metrics:")
+    for k, v in oos_metrics.items():
+        print(f"{k}: {v}")
+
+    # Is the edge over the zero predictor more than noise? Only on walk-forward predictions,
+    # whose alpha (if a grid is given) was chosen inside each training window, never on the sweep
+    sig_cfg = config.get("significance", {})
+    significance = None
+    if sig_cfg.get("enabled", False):
+        from sbux_model import significance as sg
+        significance = sg.significance(
+            truths_oos, preds_oos,
+            n_resamples=sig_cfg.get("n_resamples", 10_000),
+            block=bars(sig_cfg["block"], freq) if sig_cfg.get("block") else None,
+            alpha=sig_cfg.get("alpha", 0.05),
+            seed=sig_cfg.get("seed", 0),
+            n_jobs=sig_cfg.get("n_jobs", 1),
+        )
+        sg.print_significance(significance)
+
+    # Predictions of full data (train & oos)
+    pred = pd.Series(pipeline.predict(X), index=X.index, name="pred_" + target_col)
+    # Walk-forward predictions, each made by a model that never saw its row (NaN before the first test window)
+    pred_oos = pd.Series(preds_oos, dtype=float).reindex(X.index).rename("pred_oos_" + target_col)
+
+    # Fit final model on full dataset
+    with profiling.span("model.final_fit", rows=len(X)):
+        pipeline.fit(X, y)
+
+    # Determine OOS cutoff date
+    if expanding:
+        oos_start_idx = train_window
+    else:
+        oos_start_idx = len(X) - len(truths_oos)  # first OOS row
+    oos_cutoff_date = X.index[oos_start_idx - 1]
+
+    # Print feature coefficients
+    model_coefs = pipeline.named_steps["model"].coef_
+    coef_df = pd.DataFrame({
+        "feature": feature_cols,
+        "coefficient": model_coefs
+    }).sort_values(by="coefficient", key=abs, ascending=False)
+
+    print("\nFeature coefficients (sorted by absolute value):\n")
+    print(coef_df)
+
+    metrics = {
+        "walk_forward": oos_metrics,
+        "zero_baseline": zero_metrics,
+        "model_type": model_type,
+        "model_params": model_cfg if alpha_grid is None else {**model_cfg, "alpha": best_alpha, "alpha_grid": alpha_grid},
+        "n_rows": len(X),
+        "train_window": train_window,
+        "horizon": horizon,
+        "features_used": feature_cols,
+        "target_col": target_col,
+        "predicted_col": "pred_" + target_col,
+        "oos_predicted_col": "pred_oos_" + target_col,
+        "oos_cutoff_date": str(oos_cutoff_date)
+    }
+    if significance is not None:
+        metrics["significance"] = significance
+    if alpha_chosen is not None:
+        metrics["alpha_validation"] = validation
+        metrics["alpha_chosen"] = {str(d): a for d, a in alpha_chosen.items()}
+        # Fixed-alpha metrics over the same rows: a sweep, not out-of-sample for a chosen alpha
+        metrics["alpha_sweep"] = {str(a): {"r2": m["r2_oos"], "rmse": m["rmse_oos"], "n": m["n_oos"]}
+                                  for a, m in alpha_sweep.items()}
+
+    return {
+        "predictions": pd.concat([y.rename(target_col), pred, pred_oos, X], axis=1),
+        "pipeline": pipeline,
+        "metrics": metrics,
+        "coefficients": coef_df,
+    }
+
+
+def dashboard(config, model_df, preproc_df):
+    """Join the model predictions with the configured preprocessing columns."""
+    # Columns from the preprocessing table to include (all if empty)
+    preproc_cols = config.get("preproc_columns", [])
+    if preproc_cols:
+        preproc_df = preproc_df[preproc_cols]
+
+    # Remove any columns that overlap with model_df
+    preproc_df = preproc_df.loc[:, ~preproc_df.columns.isin(model_df.columns)]
+
+    # Merge on index (Date)
+    return model_df.join(preproc_df, how="left")
+
+
+# ---------------------------------------------------------------
+# Stage outputs
+# ---------------------------------------------------------------
+def write_model(config, result):
+    """
+    Save the predictions table, pickled pipeline and metrics JSON of `train`, and
+    the weights bundle when `output_model.artifact` is set.
+
+    Returns:
+        list: [predictions path, model path, metrics path, (artifact manifest, arrays)]
+    """
+    stage_name = config["stage_name"]
+    pred_output_path = save_table(result["predictions"], stage_name, config.get("output_predictions"))
+    print(f"\nSaved predictions → {pred_output_path}")
+
+    model_dir = f"data/{stage_name}"
+    os.makedirs(model_dir, exist_ok=True)
+
+    if config.get("output_model") and config["output_model"].get("filename"):
+        model_path = os.path.join(model_dir, config["output_model"]["filename"])
+    else:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        model_path = os.path.join(model_dir, f"{stage_name}_{timestamp}.pkl")
+
+    with open(model_path, "wb") as f:
+        pickle.dump(result["pipeline"], f)
+    print(f"Saved model → {model_path}")
+
+    metrics_path = model_path.replace(".pkl", "_metrics.json")
+    with open(metrics_path, "w") as f:
+        json.dump(result["metrics"], f, indent=4)
+    print(f"Saved metrics → {metrics_path}")
+    paths = [pred_output_path, model_path, metrics_path]
+
+    # Pickle-free weights bundle for scoring without sklearn (see sbux_model.artifact)
+    if config.get("output_model", {}).get("artifact", False):
+        from sbux_model.artifact import export_linear
+        artifact_paths = export_linear(result["pipeline"], os.path.splitext(model_path)[0],
+                                       config["feature_columns"], config["target"],
+                                       metrics=result["metrics"], model_cfg=config.get("model"))
+        print(f"Saved model artifact → {artifact_paths[0]}")
+        paths += artifact_paths
+
+    return paths
+
+
+def write_stage(name, config, result, inputs=None):
+    """
+    Write a stage result where its config says.
+
+    Args:
+        inputs (dict, optional): the stage's input tables, needed for the features panel
+    Returns:
+        list: paths written
+    """
+    if name == "model":
+        return write_model(config, result)
+
+    paths = [save_table(result, config["stage_name"], config.get("output"))]
+    if name == "features" and config.get("panel", {}).get("enabled", False):
+        panel_cfg = config["panel"]
+        panel_df = feature_panel(config, inputs["df"])
+        paths.append(save_table(panel_df, panel_cfg.get("stage_name", "features_panel"), panel_cfg.get("output")))
+    if name == "features" and config.get("matrix", {}).get("enabled", False):
+        paths += save_matrix(result, config["stage_name"], config["matrix"], leading=matrix_leading_columns())
+    print(f"Saved {name} table → {paths[0]}")
+    return paths
+
+
+# ---------------------------------------------------------------
+# DAG runner
+# ---------------------------------------------------------------
+def stage_inputs(name, config):
+    """
+    Upstream tables a stage needs: {argument: (stage_name, input config key)}.
+    """
+    if name == "preprocessing":
+        return {}
+    if name in ("features", "model"):
+        return {"df": (config["input_stage"], "input")}
+    if name == "dashboard":
+        return {
+            "model_df": (config["model_stage"], "input_model"),
+            "preproc_df": (config["preproc_stage"], "input_preproc"),
+        }
+    raise ValueError(f"Unknown stage: {name}")
+
+
+STAGE_FUNCTIONS = {
+    "preprocessing": preprocess,
+    "features": features,
+    "model": train,
+    "dashboard": dashboard,
+}
+
+
+def _output_table(name, result):
+    # The model stage hands its predictions table downstream
+    return result["predictions"] if name == "model" else result
+
+
+def run_pipeline(stages=None, write=(), max_workers=1, configs=None):
+    """
+    Run a subset of stages in one process, passing tables in memory.
+
+    Stages run as soon as their upstream stages are done, up to `max_workers`
+    at a time. Inputs from stages outside the subset are read from disk with
+    `read_table`, as the stage scripts do. Only stages listed in `write` save
+    their outputs; the stage cache and incremental features are left to the
+    stage scripts.
+
+    Args:
+        stages (list, optional): stage names to run, all by default
+        write (iterable): stage names whose outputs are saved
+        max_workers (int): stages run concurrently
+        configs (dict, optional): {stage: config}, defaults to the JSON files in STAGE_CONFIGS
+    Returns:
+        dict: {stage: result}
+    """
+    configs = configs or {name: load_config(path) for name, path in STAGE_CONFIGS.items()}
+    stages = list(stages or STAGE_FUNCTIONS)
+    by_stage_name = {configs[name]["stage_name"]: name for name in configs}
+
+    deps = {}
+    for name in stages:
+        deps[name] = {
+            arg: (by_stage_name.get(upstream, upstream), key)
+            for arg, (upstream, key) in stage_inputs(name, configs[name]).items()
+        }
+
+    # {stage: Future of its output table}, shared by the worker threads
+    tables = {}
+    tables_lock = threading.Lock()
+    results = {}
+
+    def upstream_table(upstream, key, config):
+        with tables_lock:
+            table = tables.get(upstream)
+            owner = table is None
+            if owner:
+                table = tables[upstream] = Future()
+        if owner:
+            # Not part of this run: the latest saved table, read once for every stage that needs it
+            try:
+                table.set_result(read_table(stage_name=configs[upstream]["stage_name"], config=config.get(key)))
+            except Exception as e:
+                table.set_exception(e)
+        return table.result()
+
+    def run(name):
+        config = configs[name]
+        with profiling.span(f"stage:{name}"):
+            inputs = {arg: upstream_table(up, key, config) for arg, (up, key) in deps[name].items()}
+            result = STAGE_FUNCTIONS[name](config, **inputs)
+            if name in write:
+                write_stage(name, config, result, inputs)
+        return result
+
+    pending = set(stages)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            ready = [
+                name for name in stages
+                if name in pending and all(up not in pending and up not in running.values()
+                                           for up, _ in deps[name].values())
+            ]
+            for name in ready:
+                pending.discard(name)
+                running[executor.submit(run, name)] = name
+            if not running:
+                raise ValueError(f"Unresolvable stage dependencies: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                output = Future()
+                output.set_result(_output_table(name, results[name]))
+                with tables_lock:
+                    tables[name] = output
+    return results
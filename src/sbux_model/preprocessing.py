@@ -1,20 +1,26 @@
+import numpy as np
 import pandas as pd
 import os
 
-def resample_weekly_last(df):
+from sbux_model.profiling import instrument
+
+@instrument
+def resample_weekly_last(df, rule="W-MON"):
     df = df.rename(columns={df.columns[0]: "Date"})
     df["Date"] = pd.to_datetime(df["Date"])
     df = df.set_index("Date")
-    df = df.resample("W-MON").last()
+    df = df.resample(rule).last()
     return df
 
-def resample_weekly_mean(df):
+@instrument
+def resample_weekly_mean(df, rule="W-MON"):
     df = df.rename(columns={df.columns[0]: "Date"})
     df["Date"] = pd.to_datetime(df["Date"])
     df = df.set_index("Date")
-    df = df.resample("W-MON").mean()
+    df = df.resample(rule).mean()
     return df
 
+@instrument
 def resample_weekly_ffill(df):
     df = df.rename(columns={df.columns[0]: "Date"})
     df["Date"] = pd.to_datetime(df["Date"])
@@ -25,6 +31,7 @@ def resample_weekly_ffill(df):
 
     return df
 
+@instrument
 def impute_low_freq_ffill(df: pd.DataFrame) -> pd.DataFrame:
     """
     Impute low-frequency series after resampling to higher frequency (weekly).
@@ -41,3 +48,201 @@ def impute_low_freq_ffill(df: pd.DataFrame) -> pd.DataFrame:
             df_imputed[col] = df_imputed[col].ffill()
     return df_imputed
 
+
+
+# ---------------------------------------------------------------
+# Point-in-time: revised series as they were known on each bar
+# ---------------------------------------------------------------
+VINTAGE_KEYS = ["realtime_start", "date"]
+
+
+def _seconds(values):
+    return pd.DatetimeIndex(values).values.astype("datetime64[s]").astype(np.int64)
+
+
+def compact_vintages(vintages):
+    """
+    Drop releases that repeat the value already in effect for their observation
+    (e.g. overlapping fetches), keeping vintages sorted by release then date.
+    """
+    value_cols = [c for c in vintages.columns if c not in VINTAGE_KEYS]
+    df = vintages.sort_values(["date", "realtime_start"], kind="stable")
+    df = df.loc[~df.duplicated(VINTAGE_KEYS, keep="last")]
+    same_date = df["date"].eq(df["date"].shift())
+    unchanged = df[value_cols].eq(df[value_cols].shift()) | (df[value_cols].isna() & df[value_cols].shift().isna())
+    df = df.loc[~(same_date & unchanged.all(axis=1))]
+    return df.sort_values(VINTAGE_KEYS, kind="stable").reset_index(drop=True)
+
+
+@instrument
+def asof_vintages(vintages, dates):
+    """
+    Point-in-time values of revised series on each of `dates`: the latest
+    observation released by that date, at its value as of that date (later
+    revisions are not seen).
+
+    All series are joined at once with two sorted searches: one for the latest
+    observation released by each date, one for its latest release by that date.
+
+    Args:
+        vintages (pd.DataFrame): one row per release, with "realtime_start" (release
+            date), "date" (observation date) and one column per series (NaN where
+            a row is not a release of that series)
+        dates (DatetimeIndex): bar dates
+    Returns:
+        pd.DataFrame: indexed by `dates`, one column per series, NaN before its first release
+    """
+    value_cols = [c for c in vintages.columns if c not in VINTAGE_KEYS]
+    at = _seconds(dates)
+    out = np.full((len(at), len(value_cols)), np.nan)
+    values = vintages[value_cols].to_numpy(dtype=float)
+    # Long rows (series g, observation o, release s, value v), missing values dropped
+    g, rows = np.nonzero(~np.isnan(values.T))
+    if len(g) and len(at):
+        o = _seconds(vintages["date"])[rows]
+        s = _seconds(vintages["realtime_start"])[rows]
+        v = values[rows, g]
+
+        # Offsets keep each series in its own range of a single sorted int64 key
+        o_base, o_span = o.min(), np.ptp(o) + 1
+        s_base = min(s.min(), at.min())
+        s_span = max(s.max(), at.max()) - s_base + 1
+        G, N = len(value_cols), len(at)
+        qg = np.repeat(np.arange(G), N)
+        qt = np.tile(at - s_base, G)
+
+        # Latest observation released by each date: running max of the observation
+        # date over releases in release order, per series
+        by_release = np.lexsort((s, g))
+        release_key = g[by_release] * s_span + (s[by_release] - s_base)
+        latest_obs = np.maximum.accumulate(g[by_release] * o_span + (o[by_release] - o_base))
+        i = np.searchsorted(release_key, qg * s_span + qt, side="right") - 1
+        known = i >= 0
+        known[known] = g[by_release][i[known]] == qg[known]
+
+        # Its value as of that date: last release by then of that observation
+        by_obs = np.lexsort((s, o, g))
+        obs_key = g[by_obs] * o_span + (o[by_obs] - o_base)
+        obs_rank = np.cumsum(np.r_[True, obs_key[1:] != obs_key[:-1]]) - 1
+        unique_obs = obs_key[np.r_[True, obs_key[1:] != obs_key[:-1]]]
+        target = np.searchsorted(unique_obs, latest_obs[i[known]])
+        j = np.searchsorted(obs_rank * s_span + (s[by_obs] - s_base), target * s_span + qt[known], side="right") - 1
+
+        filled = np.full(G * N, np.nan)
+        filled[known] = v[by_obs][j]
+        out = filled.reshape(G, N).T
+    return pd.DataFrame(out, index=pd.DatetimeIndex(dates), columns=value_cols)
+
+
+# ---------------------------------------------------------------
+# Streaming: chunked resampling and a k-way merge on date
+# ---------------------------------------------------------------
+# Functions that aggregate rows into buckets (W-MON, or the `rule` of the bar
+# frequency); the others keep every row
+BUCKETED = {"resample_weekly_last", "resample_weekly_mean"}
+
+
+def resample(df, func_name="resample_weekly_last", rule="W-MON"):
+    """Apply a preprocessing function by name, bucketing by `rule` where it resamples."""
+    func = globals()[func_name]
+    return func(df, rule=rule) if func_name in BUCKETED else func(df)
+
+
+def _in_last_bucket(dates, last_label, rule):
+    # Weekly bins are closed on the right and cover whole days, so intraday rows go by calendar date;
+    # daily and intraday bins are closed on the left
+    if rule.startswith("W"):
+        return dates.dt.normalize() > last_label - pd.Timedelta(weeks=1)
+    return dates >= last_label
+
+
+def stream_resampled(chunks, func_name="resample_weekly_last", rule="W-MON"):
+    """
+    Apply a `resample_weekly_*` function to raw rows arriving in time-ordered chunks.
+
+    For bucketed functions the raw rows of the last (possibly incomplete) bucket
+    of each chunk are held back and resampled again with the next chunk, so a
+    bucket spanning two chunks gets the same value as in one pass. For
+    `resample_weekly_ffill` the last filled row is carried instead.
+
+    Args:
+        chunks: iterable of raw DataFrames (first column is the date), in date order
+        func_name (str): name of the resampling function in this module
+        rule (str): bucket rule of the bucketed functions
+    Yields:
+        pd.DataFrame: finished rows, indexed by date
+    """
+    carry = None
+    for chunk in chunks:
+        raw = chunk if carry is None else pd.concat([carry.set_axis(chunk.columns, axis=1), chunk], ignore_index=True)
+        if func_name in BUCKETED:
+            out = resample(raw.copy(), func_name, rule)
+            if out.empty:
+                continue
+            # The raw rows of the last bucket, which may continue in the next chunk
+            carry = raw[_in_last_bucket(pd.to_datetime(raw.iloc[:, 0]), out.index[-1], rule)]
+            yield out.iloc[:-1]
+        else:
+            out = resample(raw, func_name, rule)
+            if carry is not None:
+                out = out.iloc[1:]
+            if out.empty:
+                continue
+            # The filled last row seeds the fill of the next chunk
+            carry = out.iloc[[-1]].reset_index()
+            yield out
+
+    if carry is not None and func_name in BUCKETED:
+        yield resample(carry.copy(), func_name, rule)
+
+
+def merge_streams(streams, dropna=True):
+    """
+    Outer-join date-indexed streams, drop duplicate dates (keeping the last) and
+    rows with NaNs, like `pd.concat(axis=1)` + `dropna` on the full tables.
+
+    A k-way merge: the stream whose latest date is furthest behind is advanced
+    next, and rows up to the earliest latest date across streams (after which no
+    stream can add rows) are joined and released, so only about one chunk per
+    stream is buffered.
+
+    Args:
+        streams (list): iterators of DataFrames sorted by date, as from `stream_resampled`
+        dropna (bool): drop rows with NaNs; False keeps them, e.g. for a quality report
+    Returns:
+        pd.DataFrame: merged table
+    """
+    pending = [None] * len(streams)
+    latest = [None] * len(streams)
+    active = set(range(len(streams)))
+    merged = []
+
+    def release(upto=None):
+        parts = []
+        for i, buf in enumerate(pending):
+            ready = buf if upto is None else buf.loc[:upto]
+            pending[i] = buf.iloc[len(ready):]
+            parts.append(ready)
+        block = pd.concat(parts, axis=1)
+        block = block.loc[~block.index.duplicated(keep='last')]
+        merged.append(block.dropna() if dropna else block)
+
+    while active:
+        # Advance the stream that is furthest behind
+        i = min(active, key=lambda j: pd.Timestamp.min if latest[j] is None else latest[j])
+        chunk = next(streams[i], None)
+        if chunk is None:
+            active.discard(i)
+        else:
+            pending[i] = chunk if pending[i] is None else pd.concat([pending[i], chunk])
+            if len(chunk):
+                latest[i] = chunk.index[-1]
+
+        watermarks = [latest[j] for j in active]
+        if active and all(buf is not None for buf in pending) and None not in watermarks:
+            release(min(watermarks))
+
+    if any(buf is None for buf in pending):
+        raise ValueError("A source produced no rows")
+    release()
+    return pd.concat(merged)
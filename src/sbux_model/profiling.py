@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import atexit
+import threading
+import functools
+import tracemalloc
+from datetime import datetime
+
+PROFILE_DIR = "data/profile"
+PROFILE_ENV = "SBUX_PROFILE"
+
+# Module state: a single flag check is all a disabled hook costs
+_enabled = False
+_memory = False
+_events = []
+_lock = threading.Lock()
+_origin = time.perf_counter()
+
+
+# ---------------------------------------------------------------
+# Switches
+# ---------------------------------------------------------------
+def enable(memory=False):
+    """
+    Start recording spans.
+
+    Args:
+        memory: also trace Python allocations with tracemalloc (slower)
+    """
+    global _enabled, _memory
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global _enabled, _memory
+    _enabled = False
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable_from_env():
+    """Enable profiling if SBUX_PROFILE is set ("1"/"true"/"on", or "memory" to trace allocations)."""
+    value = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if value in ("1", "true", "on", "yes"):
+        enable()
+    elif value == "memory":
+        enable(memory=True)
+    return _enabled
+
+
+def reset():
+    """Drop every recorded event."""
+    with _lock:
+        _events.clear()
+
+
+# ---------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------
+def _count_rows(obj):
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    shape = getattr(obj, "shape", None)
+    return int(shape[0]) if shape else None
+
+
+class _Span:
+    """Times a block and records it as one event; extra fields can be set on `args`."""
+
+    __slots__ = ("name", "args", "_start", "_mem")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        if _memory:
+            self._mem = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        args = self.args
+        if _memory:
+            current, peak = tracemalloc.get_traced_memory()
+            args["mem_delta_mb"] = (current - self._mem) / 2**20
+            args["mem_peak_mb"] = peak / 2**20
+        event = {
+            "name": self.name,
+            "ts": (self._start - _origin) * 1e6,
+            "dur": (end - self._start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with _lock:
+            _events.append(event)
+        return False
+
+
+class _NullSpan:
+    """Shared no-op span returned while profiling is disabled."""
+
+    __slots__ = ()
+    args = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """
+    Context manager timing a block of code, e.g. one feature spec or one refit.
+
+    Keyword arguments (rows, column, window, ...) are stored with the event. While
+    profiling is disabled this returns a shared no-op object.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def instrument(func=None, *, name=None):
+    """
+    Decorator recording calls, wall time and rows in/out of a function.
+
+    Rows are taken from the length of the first argument and of the result when
+    they have a `shape` (DataFrames, Series, arrays). Usable bare or as
+    `@instrument(name="...")`.
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+    label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with _Span(label, {}) as s:
+            if args:
+                rows_in = _count_rows(args[0])
+                if rows_in is not None:
+                    s.args["rows_in"] = rows_in
+            result = func(*args, **kwargs)
+            rows_out = _count_rows(result)
+            if rows_out is not None:
+                s.args["rows_out"] = rows_out
+        return result
+
+    return wrapper
+
+
+# ---------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------
+def events():
+    with _lock:
+        return list(_events)
+
+
+def summary():
+    """
+    Aggregate recorded events by name.
+
+    Returns:
+        dict {name: {"calls", "total_s", "max_s", "rows_in"}}, slowest first
+    """
+    stats = {}
+    for event in events():
+        s = stats.setdefault(event["name"], {"calls": 0, "total_s": 0.0, "max_s": 0.0, "rows_in": 0})
+        dur = event["dur"] / 1e6
+        s["calls"] += 1
+        s["total_s"] += dur
+        s["max_s"] = max(s["max_s"], dur)
+        s["rows_in"] += event["args"].get("rows_in", event["args"].get("rows", 0)) or 0
+    return dict(sorted(stats.items(), key=lambda kv: kv[1]["total_s"], reverse=True))
+
+
+def print_summary(top_n=15):
+    print(f"\n{'span':45s} {'calls':>6s} {'total_s':>9s} {'max_s':>9s}")
+    for name, s in list(summary().items())[:top_n]:
+        print(f"{name:45s} {s['calls']:6d} {s['total_s']:9.4f} {s['max_s']:9.4f}")
+
+
+def write_trace(path=None, stage_name="pipeline", fmt="chrome"):
+    """
+    Write recorded events to JSON.
+
+    Args:
+        path: output file, default data/profile/<stage_name>_<timestamp>.json
+        fmt: "chrome" for the Trace Event format (chrome://tracing, Perfetto) or
+            "json" for a plain list of events
+    Returns:
+        str: path written
+    """
+    if path is None:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(PROFILE_DIR, f"{stage_name}_{timestamp}.json")
+
+    recorded = events()
+    if fmt == "chrome":
+        trace = {
+            "traceEvents": [{**e, "ph": "X", "cat": stage_name} for e in recorded],
+            "displayTimeUnit": "ms",
+            "otherData": {"stage": stage_name, "summary": summary()},
+        }
+    elif fmt == "json":
+        trace = {"stage": stage_name, "events": recorded, "summary": summary()}
+    else:
+        raise ValueError(f"Unknown trace format: {fmt}")
+
+    with open(path, "w") as f:
+        json.dump(trace, f)
+    return path
+
+
+def start_run(stage_name, fmt="chrome"):
+    """
+    Enable profiling from SBUX_PROFILE for a pipeline run.
+
+    When enabled, the trace is written and a summary printed when the process
+    exits, including early exits such as cache hits.
+    """
+    if not enable_from_env():
+        return False
+
+    def _finish():
+        if events():
+            print_summary()
+            print(f"Saved profile trace → {write_trace(stage_name=stage_name, fmt=fmt)}")
+
+    atexit.register(_finish)
+    return True
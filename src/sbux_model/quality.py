@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+from sbux_model.profiling import instrument
+
+
+# ---------------------------------------------------------------
+# Run lengths of a (T, C) boolean mask, all columns at once
+# ---------------------------------------------------------------
+def mask_runs(mask):
+    """
+    Runs of True down each column of a boolean (T, C) mask.
+
+    Returns:
+        (cols, starts, lengths): one entry per run, sorted by column then start row
+    """
+    T, C = mask.shape
+    padded = np.zeros((C, T + 2), dtype=bool)
+    padded[:, 1:-1] = mask.T
+    # Edges alternate start, end within each column since every run is closed by the padding
+    cols, edges = np.nonzero(padded[:, 1:] != padded[:, :-1])
+    return cols[::2], edges[::2], edges[1::2] - edges[::2]
+
+
+def longest_runs(mask):
+    """
+    Longest run of True in each column and the row it starts on (-1 where there is none),
+    plus the number of runs.
+
+    Returns:
+        (longest, start, n_runs): arrays of length C
+    """
+    C = mask.shape[1]
+    cols, starts, lengths = mask_runs(mask)
+    longest = np.zeros(C, dtype=np.int64)
+    start = np.full(C, -1, dtype=np.int64)
+    if len(lengths):
+        # Runs come grouped by column: max over each group, then the first run reaching it
+        first = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+        longest[cols[first]] = np.maximum.reduceat(lengths, first)
+        hit = np.flatnonzero(lengths == longest[cols])
+        hit = hit[np.r_[True, cols[hit][1:] != cols[hit][:-1]]]
+        start[cols[hit]] = starts[hit]
+    return longest, start, np.bincount(cols, minlength=C)
+
+
+def robust_center_scale(values):
+    """
+    Median and IQR-based scale (IQR / 1.349, the standard deviation for normal data)
+    of each column, ignoring NaNs, from a single sort.
+    """
+    if not len(values):
+        empty = np.full(values.shape[1], np.nan)
+        return empty, empty
+    ordered = np.sort(values.T, axis=1)  # NaNs sort last
+    n = (~np.isnan(ordered)).sum(axis=1)
+    rows = np.arange(len(ordered))
+
+    def quantile(q):
+        pos = np.maximum(n - 1, 0) * q
+        lo, hi = np.floor(pos).astype(int), np.ceil(pos).astype(int)
+        return ordered[rows, lo] + (ordered[rows, hi] - ordered[rows, lo]) * (pos - lo)
+
+    with np.errstate(invalid="ignore"):
+        median = np.where(n > 0, quantile(0.5), np.nan)
+        scale = np.where(n > 0, (quantile(0.75) - quantile(0.25)) / 1.349, np.nan)
+    return median, scale
+
+
+def _first_true(mask):
+    """Row of the first True in each column, -1 where there is none."""
+    if not len(mask):
+        return np.full(mask.shape[1], -1)
+    return np.where(mask.any(axis=0), mask.argmax(axis=0), -1)
+
+
+def _labels(index):
+    """Index labels as strings, dates without a time part when every label is midnight."""
+    if isinstance(index, pd.DatetimeIndex) and (index == index.normalize()).all():
+        return list(index.strftime("%Y-%m-%d"))
+    return [str(i) for i in index]
+
+
+# ---------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------
+@instrument
+def quality_report(df, warmup=0, outlier_z=8.0, max_rows=20):
+    """
+    Data-quality summary of a table, computed with column-wise boolean masks.
+
+    Per column: NaN count, number and longest NaN run, first and last valid dates,
+    the longest streak of an unchanged value (e.g. a forward-filled CPI or fed funds
+    series that stopped updating) and the count of robust outliers
+    (|x - median| > `outlier_z` * IQR / 1.349). Per table: the rows after the first
+    `warmup` with any NaN, and for the first `max_rows` of them which columns.
+
+    Args:
+        df (pd.DataFrame): any stage table indexed by date (non-numeric columns are skipped)
+        warmup (int): leading rows expected to have NaNs (rolling windows filling up)
+    Returns:
+        dict: {"rows", "warmup", "columns": {name: {...}}, "rows_with_nans": {...}}
+    """
+    numeric = df.select_dtypes(include="number")
+    names = list(numeric.columns)
+    values = numeric.to_numpy(dtype=float)
+    T = len(values)
+
+    nan = np.isnan(values)
+    valid = ~nan
+    nan_count = nan.sum(axis=0)
+    nan_longest, nan_start, nan_runs = longest_runs(nan)
+    first_valid = _first_true(valid)
+    last_valid = np.where(valid.any(axis=0), T - 1 - _first_true(valid[::-1]), -1)
+
+    # Streaks of an unchanged value: True where a row equals the previous one
+    same = np.zeros_like(nan)
+    same[1:] = values[1:] == values[:-1]
+    stale_longest, stale_start, _ = longest_runs(same)
+
+    # Robust z-scores (columns without spread are skipped)
+    median, scale = robust_center_scale(values)
+    with np.errstate(invalid="ignore"):
+        outliers = (np.abs(values - median) > outlier_z * np.where(scale > 0, scale, np.nan)).sum(axis=0)
+
+    labels = _labels(df.index)
+
+    def date(i):
+        return None if i < 0 else labels[i]
+
+    columns = {}
+    for j, name in enumerate(names):
+        columns[name] = {
+            "nan_count": int(nan_count[j]),
+            "nan_runs": int(nan_runs[j]),
+            "longest_nan_run": int(nan_longest[j]),
+            "longest_nan_run_start": date(nan_start[j]),
+            "first_valid": date(first_valid[j]),
+            "last_valid": date(last_valid[j]),
+            # A streak of n equal rows has n - 1 repeats
+            "longest_stale_run": int(stale_longest[j] + 1) if stale_longest[j] else 0,
+            "longest_stale_run_start": date(stale_start[j] - 1) if stale_longest[j] else None,
+            "outliers": int(outliers[j]),
+        }
+
+    # Rows past the warmup with NaNs, and their NaN columns (only the first `max_rows`)
+    late = nan[warmup:]
+    rows = np.flatnonzero(late.any(axis=1))
+    r, c = np.nonzero(late[rows[:max_rows]])
+    listed = {labels[warmup + rows[i]]: [] for i in range(min(len(rows), max_rows))}
+    keys = list(listed)
+    for i, j in zip(r, c):
+        listed[keys[i]].append(names[j])
+
+    return {
+        "rows": T,
+        "warmup": warmup,
+        "columns": columns,
+        "rows_with_nans": {"count": int(len(rows)), "dates": listed},
+    }
+
+
+def report_frame(report):
+    """The per-column part of a report as a DataFrame, one row per column."""
+    return pd.DataFrame.from_dict(report["columns"], orient="index")
+
+
+def print_report(report, stale_min=4):
+    """
+    Print the parts of a report worth looking at: columns with NaNs, stale streaks
+    of at least `stale_min` rows or outliers, and the rows with NaNs after the warmup.
+    """
+    frame = report_frame(report)
+    if frame.empty:
+        print("\nNo numeric columns to check.")
+        return
+
+    nans = frame[frame["nan_count"] > 0]
+    if len(nans):
+        print("\nNaN count per column:")
+        print(nans[["nan_count", "nan_runs", "longest_nan_run", "first_valid", "last_valid"]]
+              .sort_values("nan_count", ascending=False).to_string())
+
+    stale = frame[frame["longest_stale_run"] >= stale_min]
+    if len(stale):
+        print(f"\nColumns unchanged for {stale_min}+ consecutive rows:")
+        print(stale[["longest_stale_run", "longest_stale_run_start"]].sort_values("longest_stale_run", ascending=False)
+              .to_string())
+
+    outliers = frame[frame["outliers"] > 0]
+    if len(outliers):
+        print("\nRobust outliers per column:")
+        print(outliers["outliers"].sort_values(ascending=False).to_string())
+
+    late = report["rows_with_nans"]
+    warmup = report["warmup"]
+    if late["count"]:
+        print(f"\n{late['count']} dates with NaNs (excluding first {warmup} warmup rows), first {len(late['dates'])}:")
+        for date, cols in late["dates"].items():
+            print(f"  {date}: {len(cols)} NaNs {cols}")
+    else:
+        print(f"\nNo NaNs found after first {warmup} rows.")
@@ -0,0 +1,277 @@
+import numpy as np
+
+
+def _window_sums(a, window):
+    """
+    Rolling sums and valid-value counts along axis 0 via cumulative sums.
+
+    Returns arrays shaped like `a`; the first window - 1 rows are meaningless.
+    """
+    valid = ~np.isnan(a)
+    filled = np.where(valid, a, 0.0)
+
+    csum = np.cumsum(filled, axis=0)
+    count = np.cumsum(valid, axis=0, dtype=np.int64)
+    sums = csum.copy()
+    counts = count.copy()
+    sums[window:] -= csum[:-window]
+    counts[window:] -= count[:-window]
+    return sums, counts
+
+
+def rolling_sum(a, window):
+    """
+    Rolling sum along axis 0 of a 1-D or 2-D array.
+
+    Like pandas `rolling(window).sum()`: NaN unless the whole window is valid.
+    """
+    a = np.asarray(a, dtype=float)
+    sums, counts = _window_sums(a, window)
+    out = np.where(counts == window, sums, np.nan)
+    out[:window - 1] = np.nan
+    return out
+
+
+def rolling_mean(a, window):
+    """Rolling mean along axis 0, NaN unless the whole window is valid."""
+    a = np.asarray(a, dtype=float)
+    # Centre each column first so the cumulative sums stay small
+    shift = np.nanmean(a, axis=0) if len(a) else 0.0
+    return rolling_sum(a - shift, window) / window + shift
+
+
+def rolling_std(a, window):
+    """Rolling sample standard deviation (ddof=1) along axis 0."""
+    a = np.asarray(a, dtype=float)
+    centred = a - (np.nanmean(a, axis=0) if len(a) else 0.0)
+    s1 = rolling_sum(centred, window)
+    s2 = rolling_sum(centred * centred, window)
+    var = (s2 - s1 * s1 / window) / (window - 1)
+    return np.sqrt(np.clip(var, 0.0, None))
+
+
+def rolling_beta(x, y, window):
+    """
+    Rolling regression slope cov(x, y) / var(y) along axis 0.
+
+    Args:
+        x (np.ndarray): (T,) or (T, N) asset returns
+        y (np.ndarray): (T,) or (T, 1) benchmark returns, broadcast against x
+        window (int): rolling window length
+    Returns:
+        np.ndarray: shaped like x; NaN unless both series are valid over the whole window
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.ndim == 2 and y.ndim == 1:
+        y = y[:, None]
+    y = np.broadcast_to(y, x.shape)
+
+    # Pairwise-complete windows only, as pandas rolling cov
+    both = ~(np.isnan(x) | np.isnan(y))
+    xc = np.where(both, x - np.nanmean(x, axis=0), np.nan)
+    yc = np.where(both, y - np.nanmean(y, axis=0), np.nan)
+
+    sx = rolling_sum(xc, window)
+    sy = rolling_sum(yc, window)
+    sxy = rolling_sum(xc * yc, window)
+    syy = rolling_sum(yc * yc, window)
+
+    # (W Sxy - Sx Sy) / (W Syy - Sy^2): the (W - 1) normalisation cancels
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (window * sxy - sx * sy) / (window * syy - sy * sy)
+
+
+def shift(a, periods):
+    """Shift along axis 0 (positive = lag), padding with NaN."""
+    a = np.asarray(a, dtype=float)
+    out = np.full_like(a, np.nan)
+    if periods > 0:
+        out[periods:] = a[:-periods]
+    elif periods < 0:
+        out[:periods] = a[-periods:]
+    else:
+        out[:] = a
+    return out
+
+
+def pct_change(a, periods=1):
+    """Percentage change along axis 0 (no forward fill of missing values)."""
+    a = np.asarray(a, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return a / shift(a, periods) - 1
+
+
+def ffill(a):
+    """Forward-fill NaNs along axis 0."""
+    a = np.asarray(a, dtype=float)
+    idx = np.where(~np.isnan(a), np.arange(len(a)).reshape((-1,) + (1,) * (a.ndim - 1)), 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return np.take_along_axis(a, idx, axis=0)
+
+
+def _paired(x, y):
+    """Broadcast benchmark y against x and centre both on their pairwise-complete means."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.ndim == 2 and y.ndim == 1:
+        y = y[:, None]
+    y = np.broadcast_to(y, x.shape)
+    both = ~(np.isnan(x) | np.isnan(y))
+    xc = np.where(both, x - np.nanmean(np.where(both, x, np.nan), axis=0), 0.0)
+    yc = np.where(both, y - np.nanmean(np.where(both, y, np.nan), axis=0), 0.0)
+    return xc, yc, both
+
+
+def multi_window_beta(x, y, windows):
+    """
+    Rolling regression slopes cov(x, y) / var(y) for several windows at once.
+
+    The cumulative sums of x, y, xy and y² are computed once and every window is
+    a difference of them at a different offset, so adding a window costs a few
+    vector subtractions instead of another pass over the data.
+
+    Args:
+        x (np.ndarray): (T,) or (T, N) asset returns
+        y (np.ndarray): (T,) benchmark returns (or broadcastable to x)
+        windows (list): window lengths
+    Returns:
+        dict: window -> array shaped like x; NaN unless both series are valid over the whole window
+    """
+    xc, yc, both = _paired(x, y)
+    zero = np.zeros((1,) + xc.shape[1:])
+    cums = [np.concatenate([zero, np.cumsum(a, axis=0)]) for a in (xc, yc, xc * yc, yc * yc)]
+    count = np.concatenate([zero, np.cumsum(both, axis=0, dtype=float)])
+
+    out = {}
+    for window in windows:
+        beta = np.full(xc.shape, np.nan)
+        if window <= len(xc):
+            sx, sy, sxy, syy = (c[window:] - c[:-window] for c in cums)
+            complete = (count[window:] - count[:-window]) == window
+            with np.errstate(invalid="ignore", divide="ignore"):
+                b = (window * sxy - sx * sy) / (window * syy - sy * sy)
+            beta[window - 1:] = np.where(complete, b, np.nan)
+        out[window] = beta
+    return out
+
+
+def _ewm_sum(a, decay):
+    """sum_i decay^(t - i) * a_i along axis 0: a first-order recursion run by lfilter."""
+    from scipy.signal import lfilter
+    return lfilter([1.0], [1.0, -decay], a, axis=0)
+
+
+def _ewm_decay(halflife):
+    return np.exp(-np.log(2) / halflife)
+
+
+def ewm_mean(a, halflife):
+    """
+    Exponentially weighted mean along axis 0, as pandas `ewm(halflife=...).mean()`
+    (adjust=True, NaNs skipped but still decaying the older weights).
+
+    Numerator and normalising weight are both first-order linear recursions, run
+    with `scipy.signal.lfilter` in compiled code.
+    """
+    a = np.asarray(a, dtype=float)
+    decay = _ewm_decay(halflife)
+    valid = ~np.isnan(a)
+    num = _ewm_sum(np.where(valid, a, 0.0), decay)
+    den = _ewm_sum(valid.astype(float), decay)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(np.cumsum(valid, axis=0) > 0, num / den, np.nan)
+
+
+def _ewm_bias(valid, decay):
+    # pandas' unbiased ewm (co)variance factor (sum w)^2 / ((sum w)^2 - sum w^2); NaN before two observations
+    w = _ewm_sum(valid.astype(float), decay)
+    w2 = _ewm_sum(valid.astype(float), decay * decay)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(np.cumsum(valid, axis=0) >= 2, w * w / (w * w - w2), np.nan)
+
+
+def ewm_beta(x, y, halflives):
+    """
+    Exponentially weighted regression slopes, as pandas `ewm(halflife=h).cov(y) / ewm(halflife=h).var()`.
+
+    The covariance uses pairwise-complete observations and the variance every
+    valid benchmark observation, each with pandas' bias correction.
+
+    Args:
+        x (np.ndarray): (T,) or (T, N) asset returns
+        y (np.ndarray): (T,) benchmark returns (or broadcastable to x)
+        halflives (list): half-lives in rows
+    Returns:
+        dict: half-life -> array shaped like x; NaN until two paired observations
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.ndim == 2 and y.ndim == 1:
+        y = y[:, None]
+    y = np.broadcast_to(y, x.shape)
+
+    valid_y = ~np.isnan(y)
+    both = valid_y & ~np.isnan(x)
+    # Centre for precision; (co)variances are shift-invariant
+    xc = x - np.nanmean(np.where(both, x, np.nan), axis=0)
+    yc = y - np.nanmean(y, axis=0)
+    pair = [np.where(both, a, np.nan) for a in (xc, yc, xc * yc)]
+
+    out = {}
+    for halflife in halflives:
+        decay = _ewm_decay(halflife)
+        mx, my, mxy = (ewm_mean(a, halflife) for a in pair)
+        cov = (mxy - mx * my) * _ewm_bias(both, decay)
+        my_all = ewm_mean(yc, halflife)
+        var = (ewm_mean(yc * yc, halflife) - my_all * my_all) * _ewm_bias(valid_y, decay)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[halflife] = cov / var
+    return out
+
+
+# Per-row decay of each running sum of `ewm_beta_sums`: weights decay by d, squared weights by d²
+_EWM_SUM_POWERS = np.array([1, 2, 1, 1, 1, 1, 2, 1, 1])
+
+
+def ewm_beta_sums(x, y, halflife, init=None):
+    """
+    Running sums behind an exponentially weighted beta, row by row: weight,
+    squared weight and weighted x, y and xy over paired observations, then
+    weight, squared weight and weighted y and y² over valid benchmark rows.
+
+    A series can be continued exactly from its last row of sums (`init`), so
+    `beta_from_ewm_sums` matches `ewm_beta` on the whole history without it.
+
+    Args:
+        x, y (np.ndarray): (T,) asset and benchmark returns
+        halflife (float): half-life in rows
+        init (np.ndarray, optional): (9,) sums on the row before x[0]
+    Returns:
+        np.ndarray: (T, 9) sums
+    """
+    from scipy.signal import lfilter
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid_y = ~np.isnan(y)
+    both = valid_y & ~np.isnan(x)
+    terms = [both, both, np.where(both, x, 0.0), np.where(both, y, 0.0), np.where(both, x * y, 0.0),
+             valid_y, valid_y, np.where(valid_y, y, 0.0), np.where(valid_y, y * y, 0.0)]
+    decays = _ewm_decay(halflife) ** _EWM_SUM_POWERS
+    out = np.empty((len(x), len(terms)))
+    for j, (term, decay) in enumerate(zip(terms, decays)):
+        if init is None:
+            out[:, j] = lfilter([1.0], [1.0, -decay], term.astype(float))
+        else:
+            out[:, j] = lfilter([1.0], [1.0, -decay], term.astype(float), zi=[decay * init[j]])[0]
+    return out
+
+
+def beta_from_ewm_sums(sums):
+    """Exponentially weighted beta (with pandas' bias correction) from `ewm_beta_sums` rows."""
+    w, w2, sx, sy, sxy, v, v2, vy, vyy = np.asarray(sums, dtype=float).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = (sxy / w - sx * sy / w ** 2) * w ** 2 / (w ** 2 - w2)
+        var = (vyy / v - (vy / v) ** 2) * v ** 2 / (v ** 2 - v2)
+        return cov / var
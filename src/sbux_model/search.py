@@ -0,0 +1,333 @@
+import os
+import json
+import itertools
+from datetime import datetime
+
+import numpy as np
+
+from sbux_model import model as model_module
+from sbux_model import profiling
+from sbux_model.artifact import fold_scaler
+from sbux_model.frequency import get_frequency, bars
+from sbux_model.model import build_pipeline, oos_metrics, SharedArrays, _resolve_n_jobs
+
+STRATEGIES = ("grid", "random", "halving")
+
+
+# ---------------------------------------------------------------
+# Search space
+# ---------------------------------------------------------------
+def baseline_candidate(train_cfg):
+    """The candidate train_config.json trains: what "*" stands for in a search space."""
+    test_cfg = train_cfg.get("test", {})
+    return {
+        "features": list(train_cfg["feature_columns"]),
+        "train_window": test_cfg.get("train_window", 156),
+        "horizon": test_cfg.get("horizon", 4),
+        "expanding": test_cfg.get("expanding", False),
+        "model": train_cfg.get("model", {"type": "ridge"}),
+    }
+
+
+def expand_space(space, train_cfg):
+    """
+    Every candidate of a search space.
+
+    Args:
+        space (dict): lists of values for "feature_columns" (each a list of columns),
+            "train_window", "horizon" (in weeks), "model" (model config blocks) and
+            optional "expanding"; "*" in any list is the value of train_config.json
+        train_cfg (dict): train_config.json
+    Returns:
+        list of dict: {"features", "train_window", "horizon", "expanding", "model"}, without duplicates
+    """
+    baseline = baseline_candidate(train_cfg)
+
+    def values(key, field, default):
+        return [baseline[field] if v == "*" else v for v in space.get(key, default)]
+
+    candidates = [
+        {"features": list(features), "train_window": tw, "horizon": h, "expanding": expanding, "model": model_cfg}
+        for features, tw, h, expanding, model_cfg in itertools.product(
+            values("feature_columns", "features", ["*"]),
+            values("train_window", "train_window", ["*"]),
+            values("horizon", "horizon", ["*"]),
+            values("expanding", "expanding", [False]),
+            values("model", "model", ["*"]),
+        )
+    ]
+    unique = {json.dumps(cand, sort_keys=True): cand for cand in candidates}
+    return list(unique.values())
+
+
+def sample_candidates(candidates, n, seed=0):
+    """`n` candidates drawn without replacement (all of them if there are fewer)."""
+    if n is None or n >= len(candidates):
+        return list(candidates)
+    rng = np.random.default_rng(seed)
+    return [candidates[i] for i in sorted(rng.choice(len(candidates), size=n, replace=False))]
+
+
+# ---------------------------------------------------------------
+# Memoised fold fits
+# ---------------------------------------------------------------
+def _fit_key(model_cfg, features):
+    return json.dumps(model_cfg, sort_keys=True), tuple(features)
+
+
+class FoldCache:
+    """
+    Folded (w, b) weights of each fit, keyed by model, feature subset and training rows.
+
+    Candidates that share a fit (e.g. the same window and features with a longer
+    horizon, or a later successive-halving rung over more of the OOS period) reuse
+    it instead of refitting.
+    """
+
+    def __init__(self):
+        self.weights = {}
+        self.hits = 0
+        self.fits = 0
+
+    def missing(self, needed):
+        """Keys of `needed` not fitted yet, deduplicated, counting the rest as hits."""
+        todo = [key for key in dict.fromkeys(needed) if key not in self.weights]
+        self.hits += len(needed) - len(todo)
+        return todo
+
+    def fill(self, X, y, todo, n_jobs=1):
+        """Fit every (model, features, tr_start, tr_end) key of `todo`, in parallel for n_jobs > 1."""
+        groups = {}
+        for model_key, features, tr_start, tr_end in todo:
+            groups.setdefault((model_key, features), []).append((tr_start, tr_end))
+
+        # Split each group into batches so the pool stays busy
+        n_jobs = _resolve_n_jobs(n_jobs)
+        batch = max(1, -(-len(todo) // (4 * n_jobs)))
+        tasks = [
+            (model_key, list(features), slices[i:i + batch])
+            for (model_key, features), slices in groups.items()
+            for i in range(0, len(slices), batch)
+        ]
+
+        with profiling.span("search.fit_folds", fits=len(todo), tasks=len(tasks), n_jobs=n_jobs):
+            if n_jobs > 1 and len(tasks) > 1:
+                with SharedArrays(X=X, y=y) as shared:
+                    with shared.executor(n_jobs) as executor:
+                        results = list(executor.map(_fit_slices, tasks))
+            else:
+                results = [_fit_slices(task, X, y) for task in tasks]
+
+        for (model_key, features, slices), weights in zip(tasks, results):
+            for (tr_start, tr_end), wb in zip(slices, weights):
+                self.weights[(model_key, tuple(features), tr_start, tr_end)] = wb
+        self.fits += len(todo)
+
+
+def _fit_slices(task, X=None, y=None):
+    if X is None:
+        X, y = model_module._WORKER_ARRAYS["X"], model_module._WORKER_ARRAYS["y"]
+    model_key, features, slices = task
+    pipeline = build_pipeline(json.loads(model_key))
+    Xf = X[:, features]
+    out = []
+    for tr_start, tr_end in slices:
+        pipeline.fit(Xf[tr_start:tr_end], y[tr_start:tr_end])
+        scaler, model = pipeline.named_steps["scaler"], pipeline.named_steps["model"]
+        out.append(fold_scaler(scaler.mean_, scaler.scale_, model.coef_, model.intercept_))
+    return out
+
+
+# ---------------------------------------------------------------
+# Walk-forward evaluation of candidates on common OOS rows
+# ---------------------------------------------------------------
+def candidate_windows(candidate, n, oos_start, oos_end, freq):
+    """
+    Walk-forward (tr_start, te_start, te_end) of a candidate, testing from `oos_start`
+    so every candidate is scored on the same period, up to `oos_end`.
+    """
+    train_window = bars(candidate["train_window"], freq)
+    horizon = bars(candidate["horizon"], freq)
+    windows = []
+    start = oos_start
+    while start < min(oos_end, n):
+        tr_start = 0 if candidate["expanding"] else start - train_window
+        windows.append((tr_start, start, min(start + horizon, oos_end, n)))
+        start += horizon
+    return windows
+
+
+def evaluate(candidates, X, y, columns, oos_start, oos_end, cache, freq, n_jobs=1):
+    """
+    OOS predictions of each candidate over rows [oos_start, oos_end), fitting only
+    the folds missing from `cache`.
+
+    Returns:
+        list of np.ndarray: predictions, NaN outside the OOS rows
+    """
+    position = {c: i for i, c in enumerate(columns)}
+    plans = []
+    needed = []
+    for cand in candidates:
+        model_key, features = _fit_key(cand["model"], [position[c] for c in cand["features"]])
+        windows = candidate_windows(cand, len(X), oos_start, oos_end, freq)
+        keys = [(model_key, features, tr_start, te_start) for tr_start, te_start, _ in windows]
+        plans.append((features, windows, keys))
+        needed += keys
+
+    cache.fill(X, y, cache.missing(needed), n_jobs=n_jobs)
+
+    preds = []
+    for features, windows, keys in plans:
+        pred = np.full(len(X), np.nan)
+        Xf = X[:, list(features)]
+        for (_, te_start, te_end), key in zip(windows, keys):
+            w, b = cache.weights[key]
+            pred[te_start:te_end] = Xf[te_start:te_end] @ w + b
+        preds.append(pred)
+    return preds
+
+
+# ---------------------------------------------------------------
+# Strategies
+# ---------------------------------------------------------------
+def run_search(X, y, candidates, strategy="grid", n_jobs=1, metric="r2_oos", factor=3, min_fraction=None,
+               freq=None):
+    """
+    Evaluate candidates with a grid (every candidate on the full OOS period) or
+    successive halving (all candidates on the first part of the OOS period, the
+    best 1/`factor` kept on a `factor` times longer part, until the full period).
+
+    Args:
+        X (pd.DataFrame): every column any candidate uses, indexed by date
+        y (pd.Series): target
+        candidates (list): from `expand_space` / `sample_candidates` ("random"
+            is a sampled grid)
+        metric (str): key of `model.oos_metrics` to rank by (higher is better, except rmse)
+    Returns:
+        (leaderboard, info): ranked rows, and the OOS period and fold-cache counts
+    """
+    freq = freq or get_frequency()
+    columns = list(X.columns)
+    Xv = X.to_numpy(dtype=float)
+    yv = y.to_numpy(dtype=float)
+    n = len(Xv)
+
+    # Every candidate has enough history before the first OOS row
+    oos_start = max(bars(c["train_window"], freq) for c in candidates)
+    if oos_start >= n:
+        raise ValueError(f"Longest train_window ({oos_start} rows) leaves no OOS rows out of {n}")
+
+    sign = -1 if metric.startswith("rmse") else 1
+    cache = FoldCache()
+    alive = list(range(len(candidates)))
+    results = {}
+
+    rungs = 1
+    if strategy == "halving":
+        rungs = max(1, int(np.ceil(np.log(len(candidates)) / np.log(factor))))
+        if min_fraction:
+            # No rung on less than `min_fraction` of the OOS period
+            rungs = min(rungs, 1 + int(np.floor(np.log(1 / min_fraction) / np.log(factor) + 1e-9)))
+    for rung in range(rungs):
+        # The last rung covers the whole OOS period
+        fraction = float(factor) ** (rung - rungs + 1)
+        oos_end = oos_start + int(np.ceil(fraction * (n - oos_start)))
+
+        with profiling.span("search.rung", rung=rung, candidates=len(alive), rows=oos_end - oos_start):
+            preds = evaluate([candidates[i] for i in alive], Xv, yv, columns, oos_start, oos_end, cache, freq, n_jobs)
+        rows = np.arange(oos_start, oos_end)
+        # Score on rows every candidate predicted (and with a known target)
+        rows = rows[~np.isnan(yv[rows]) & np.all([~np.isnan(p[rows]) for p in preds], axis=0)]
+        for i, pred in zip(alive, preds):
+            results[i] = {**oos_metrics(yv[rows], pred[rows]), "rung": rung, "fraction": fraction}
+
+        ranked = sorted(alive, key=lambda i: -sign * results[i][metric])
+        print(f"Rung {rung}: {len(alive)} candidates on {len(rows)} OOS rows, best {metric} "
+              f"{results[ranked[0]][metric]:.6f}")
+        if rung < rungs - 1:
+            alive = ranked[:max(1, len(alive) // factor)]
+
+    order = sorted(results, key=lambda i: (-results[i]["rung"], -sign * results[i][metric]))
+    leaderboard = []
+    for rank, i in enumerate(order, start=1):
+        cand = candidates[i]
+        leaderboard.append({
+            "rank": rank,
+            **results[i],
+            "train_window": cand["train_window"],
+            "horizon": cand["horizon"],
+            "expanding": cand["expanding"],
+            "model": cand["model"],
+            "n_features": len(cand["features"]),
+            "features": cand["features"],
+        })
+
+    zero = oos_metrics(yv[rows], np.zeros(len(rows)))
+    info = {
+        "oos_start": str(X.index[oos_start]),
+        "oos_end": str(X.index[rows[-1]]) if len(rows) else None,
+        "zero_baseline": zero,
+        "fits": {"computed": cache.fits, "reused": cache.hits},
+    }
+    return leaderboard, info
+
+
+def best_config(entry):
+    """train_config.json settings of a leaderboard entry."""
+    return {
+        "feature_columns": entry["features"],
+        "test": {"train_window": entry["train_window"], "horizon": entry["horizon"], "expanding": entry["expanding"]},
+        "model": entry["model"],
+    }
+
+
+def write_leaderboard(leaderboard, info, search_cfg, train_cfg):
+    """
+    Save the ranked leaderboard as data/<search stage>/<stage>_<timestamp>_leaderboard.json
+    (the `stage_name` of search_config.json, "search" by default).
+    """
+    stage_name = search_cfg.get("stage_name", "search")
+    out_dir = f"data/{stage_name}"
+    os.makedirs(out_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(out_dir, f"{stage_name}_{timestamp}_leaderboard.json")
+    with open(path, "w") as f:
+        json.dump({
+            "strategy": search_cfg.get("strategy", "grid"),
+            "metric": search_cfg.get("metric", "r2_oos"),
+            "target": train_cfg["target"],
+            **info,
+            "best": best_config(leaderboard[0]),
+            "leaderboard": leaderboard,
+        }, f, indent=4)
+    return path
+
+
+def search(search_cfg, train_cfg, df, n_jobs=None):
+    """
+    Run the search described by search_config.json on a features table.
+
+    Returns:
+        (leaderboard, info)
+    """
+    strategy = search_cfg.get("strategy", "grid")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {strategy} (expected one of {', '.join(STRATEGIES)})")
+
+    candidates = expand_space(search_cfg["space"], train_cfg)
+    if strategy in ("random", "halving"):
+        candidates = sample_candidates(candidates, search_cfg.get("n_candidates"), search_cfg.get("seed", 0))
+    print(f"{strategy} search over {len(candidates)} candidates")
+
+    columns = list(dict.fromkeys(c for cand in candidates for c in cand["features"]))
+    target = train_cfg["target"]
+    halving = search_cfg.get("halving", {})
+    return run_search(
+        df[columns], df[target], candidates,
+        strategy=strategy,
+        n_jobs=search_cfg.get("n_jobs", 1) if n_jobs is None else n_jobs,
+        metric=search_cfg.get("metric", "r2_oos"),
+        factor=halving.get("factor", 3),
+        min_fraction=halving.get("min_fraction"),
+    )
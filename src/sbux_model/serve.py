@@ -0,0 +1,319 @@
+import os
+import json
+import pickle
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from sbux_model import features as ft
+from sbux_model.artifact import LinearPredictor, fold_scaler, latest_artifact_path
+
+
+# ---------------------------------------------------------------
+# Online features: the newest row only, from a ring buffer
+# ---------------------------------------------------------------
+class OnlineFeatures:
+    """
+    Residual alpha and the compiled feature plan, evaluated one bar at a time.
+
+    The last `feature_lookback` rows of every input and derived column are kept
+    in a mirrored ring buffer of 2 * lookback rows: each bar is written at its
+    slot and again `lookback` rows later, so the newest n rows of a column are
+    always one contiguous slice and a bar costs a few small NumPy reductions,
+    with no shifting of the buffer or pass over the history. Values match
+    `features.build_features` on the full table.
+
+    Args:
+        feature_defs (dict): The `features` block of features_config.json
+        asset_col, benchmark_col, window: as in `features.compute_residual_alpha`
+    """
+
+    def __init__(self, feature_defs, asset_col="SBUX", benchmark_col="SPY", window=52):
+        self.plan = ft.compile_features(feature_defs)
+        self.asset_col = asset_col
+        self.benchmark_col = benchmark_col
+        self.window = window
+        self.lookback = ft.feature_lookback(feature_defs, window)
+
+        derived = ["beta_roll", "asset_ret", "bench_ret", "alpha"]
+        outputs = list(dict.fromkeys(name for name, _, _, _ in self.plan))
+        used = [col for _, _, col, _ in self.plan] + [param[0] for _, op, _, param in self.plan if op == "beta_term"]
+        sources = [col for col in used if col not in derived and col not in outputs]
+        self.input_columns = list(dict.fromkeys([asset_col, benchmark_col] + sources))
+        self.columns = self.input_columns + derived + [c for c in outputs if c not in self.input_columns]
+        self.position = {name: i for i, name in enumerate(self.columns)}
+
+        self.buffer = np.full((2 * self.lookback, len(self.columns)), np.nan)
+        # Row of the newest bar, always in the upper half (its mirror is `lookback` rows above)
+        self.top = 2 * self.lookback - 1
+        # Last change of each latest_pct_change feature, carried forward
+        self.carry = {name: np.nan for name, op, _, _ in self.plan if op == "latest_pct_change"}
+        # Running exponentially weighted sums of each beta term structure EWMA
+        self.ewm = {}
+        self.last_date = None
+
+    def snapshot(self):
+        return (self.buffer.copy(), dict(self.carry), {k: v.copy() for k, v in self.ewm.items()}, self.last_date,
+                self.top)
+
+    def restore(self, snapshot):
+        self.buffer, self.carry, self.last_date, self.top = snapshot[0], dict(snapshot[1]), snapshot[3], snapshot[4]
+        self.ewm = {k: v.copy() for k, v in snapshot[2].items()}
+
+    def _term_structure(self, col, param):
+        """Newest row of `features.beta_term_structure` for one spec."""
+        bench, windows, halflives, (window_labels, halflife_labels) = param
+        pos = self.position
+        x, y = self.buffer[self.top, pos[col]], self.buffer[self.top, pos[bench]]
+        out = {}
+        for window, label in zip(windows, window_labels):
+            hx, hy = self._history(col, window), self._history(bench, window)
+            hxc, hyc = hx - hx.mean(), hy - hy.mean()
+            beta = (hxc @ hyc) / (hyc @ hyc)
+            out[f"beta_{label}"], out[f"alpha_{label}"] = beta, x - beta * y
+        for halflife, label in zip(halflives, halflife_labels):
+            # Sums of weights, squared weights, x, y, xy over paired observations, then the same for y alone
+            s = self.ewm.setdefault((col, param, halflife), np.zeros(9))
+            s *= np.exp(-np.log(2) / halflife) ** np.array([1, 2, 1, 1, 1, 1, 2, 1, 1])
+            if not np.isnan(y):
+                s[5:] += [1.0, 1.0, y, y * y]
+                if not np.isnan(x):
+                    s[:5] += [1.0, 1.0, x, y, x * y]
+            w, w2, sx, sy, sxy, v, v2, vy, vyy = s
+            cov = (sxy / w - sx * sy / w ** 2) * w ** 2 / (w ** 2 - w2)
+            var = (vyy / v - (vy / v) ** 2) * v ** 2 / (v ** 2 - v2)
+            beta = cov / var
+            out[f"beta_ewm{label}"], out[f"alpha_ewm{label}"] = beta, x - beta * y
+        return out
+
+    def _history(self, col, n):
+        return self.buffer[self.top - n + 1:self.top + 1, self.position[col]]
+
+    def push(self, values, date):
+        """
+        Append one bar and compute its features.
+
+        Args:
+            values (dict): input column -> value (missing columns are NaN)
+            date: bar timestamp (or anything `pd.Timestamp` parses), must be after the previous bar's
+        Returns:
+            np.ndarray: a copy of the new row, one value per entry of `columns`
+        """
+        if date is None:
+            raise ValueError("Bar has no date")
+        date = pd.Timestamp(date)
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Bar dated {date} is not after the last bar ({self.last_date})")
+
+        buf = self.buffer
+        self.top = top = (self.top + 1 - self.lookback) % self.lookback + self.lookback
+        row = buf[top]
+        row[:] = np.nan
+        for col in self.input_columns:
+            row[self.position[col]] = values.get(col, np.nan)
+
+        pos = self.position
+        with np.errstate(invalid="ignore", divide="ignore"):
+            row[pos["asset_ret"]] = row[pos[self.asset_col]] / buf[top - 1, pos[self.asset_col]] - 1
+            row[pos["bench_ret"]] = row[pos[self.benchmark_col]] / buf[top - 1, pos[self.benchmark_col]] - 1
+
+            # Rolling cov / var over the last `window` returns
+            x = self._history("asset_ret", self.window)
+            y = self._history("bench_ret", self.window)
+            xc, yc = x - x.mean(), y - y.mean()
+            beta = (xc @ yc) / (yc @ yc)
+            row[pos["beta_roll"]] = beta
+            row[pos["alpha"]] = row[pos["asset_ret"]] - beta * row[pos["bench_ret"]]
+
+            terms = {}
+            for name, op, col, param in self.plan:
+                if op == "shift":
+                    value = buf[top - param, pos[col]]
+                elif op == "diff":
+                    value = row[pos[col]] - buf[top - param, pos[col]]
+                elif op == "rolling_mean":
+                    value = self._history(col, param).mean()
+                elif op == "zscore":
+                    h = self._history(col, param)
+                    value = (h[-1] - h.mean()) / h.std(ddof=1)
+                elif op == "pct_change":
+                    value = row[pos[col]] / buf[top - param, pos[col]] - 1
+                elif op == "latest_pct_change":
+                    pct = row[pos[col]] / buf[top - 1, pos[col]] - 1
+                    if abs(pct) > param:
+                        self.carry[name] = pct
+                    value = self.carry[name]
+                elif op == "beta_term":
+                    if param not in terms:
+                        terms[param] = self._term_structure(col, param)
+                    value = terms[param][name]
+                else:
+                    raise ValueError(f"Unsupported operation for online features: {op}")
+                row[pos[name]] = value
+
+        # Mirror the row into the lower half, where windows of later bars read it
+        buf[top - self.lookback] = row
+        self.last_date = date
+        return row.copy()
+
+
+# ---------------------------------------------------------------
+# Scorer
+# ---------------------------------------------------------------
+def linear_weights(pipeline):
+    """
+    Fold a fitted StandardScaler + linear model pipeline into (w, b) with
+    prediction = x @ w + b. An `artifact.LinearPredictor` is already folded.
+    """
+    if isinstance(pipeline, LinearPredictor):
+        return pipeline.weights, pipeline.intercept
+    scaler = pipeline.named_steps["scaler"]
+    model = pipeline.named_steps["model"]
+    return fold_scaler(scaler.mean_, scaler.scale_, model.coef_, model.intercept_)
+
+
+class Scorer:
+    """
+    Keeps the feature state and model weights, and scores new bars.
+
+    Args:
+        pipeline: fitted pipeline from `model.build_pipeline` (pickled by 04_train.py),
+            or an `artifact.LinearPredictor`
+        feature_defs (dict): The `features` block of features_config.json
+        feature_columns (list): Model inputs, in training order
+        target (str): Target column name; predictions are returned as "pred_<target>"
+        alpha_args (dict): asset_col, benchmark_col and window of the residual alpha
+    """
+
+    def __init__(self, pipeline, feature_defs, feature_columns, target="alpha_fwd_1", alpha_args=None):
+        self.features = OnlineFeatures(feature_defs, **(alpha_args or {}))
+        self.weights, self.intercept = linear_weights(pipeline)
+        self.feature_idx = np.array([self.features.position[c] for c in feature_columns])
+        self.pred_name = "pred_" + target
+
+    def warm_up(self, df):
+        """Push historical input rows (a preprocessed table indexed by date) without scoring."""
+        for date, values in zip(df.index, df[self.features.input_columns].to_numpy(dtype=float)):
+            self.features.push(dict(zip(self.features.input_columns, values)), date=date)
+
+    def score(self, bar, commit=True):
+        """
+        Score one bar.
+
+        Args:
+            bar (dict): {"Date": ..., <input column>: value, ...}
+            commit (bool): keep the bar in the state; False scores a provisional bar
+                (e.g. the current, unfinished week) and leaves the state as it was
+        Returns:
+            dict: {"Date": ..., "pred_<target>": float or None while features are incomplete}
+        """
+        snapshot = None if commit else self.features.snapshot()
+        row = self.features.push(bar, date=bar["Date"])
+        pred = float(row[self.feature_idx] @ self.weights + self.intercept)
+        if snapshot is not None:
+            self.features.restore(snapshot)
+        return {"Date": bar.get("Date"), self.pred_name: None if np.isnan(pred) else pred}
+
+    def score_batch(self, bars, commit=True):
+        """Score consecutive bars in date order (all or none are kept, per `commit`)."""
+        snapshot = self.features.snapshot()
+        try:
+            out = [self.score(bar) for bar in bars]
+        except Exception:
+            self.features.restore(snapshot)
+            raise
+        if not commit:
+            self.features.restore(snapshot)
+        return out
+
+
+def latest_model_path(stage_name="model"):
+    model_dir = os.path.join("data", stage_name)
+    models = [f for f in os.listdir(model_dir) if f.startswith(stage_name) and f.endswith(".pkl")]
+    if not models:
+        raise FileNotFoundError(f"No pickled model found in {model_dir}")
+    return os.path.join(model_dir, max(models))
+
+
+def load_scorer(model_path=None, features_config="src/config/features_config.json",
+                train_config="src/config/train_config.json"):
+    """
+    Scorer for the latest trained model, warmed up on the latest preprocessed table.
+
+    `model_path` may be a weights bundle manifest (`*_artifact.json`) or a pickled
+    pipeline; by default the latest bundle is used, falling back to the latest pickle.
+    """
+    from sbux_model.io import read_table
+    from sbux_model.frequency import get_frequency, scale_feature_defs
+    from sbux_model.pipeline import alpha_args, load_config
+
+    feat_cfg = load_config(features_config)
+    train_cfg = load_config(train_config)
+    model = None
+    if model_path is None:
+        try:
+            model_path = latest_artifact_path(train_cfg["stage_name"])
+            model = LinearPredictor.load(model_path)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"No usable weights bundle ({e}), loading the latest pickled model")
+            model_path = latest_model_path(train_cfg["stage_name"])
+    elif model_path.endswith(".json"):
+        model = LinearPredictor.load(model_path)
+
+    if model is not None:
+        feature_columns, target = model.feature_columns, model.target
+    else:
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+        feature_columns, target = train_cfg["feature_columns"], train_cfg["target"]
+
+    freq = get_frequency()
+    scorer = Scorer(model, scale_feature_defs(feat_cfg.get("features", {}), freq), feature_columns, target,
+                    alpha_args(freq))
+    history = read_table(stage_name=feat_cfg["input_stage"], config=feat_cfg.get("input"))
+    scorer.warm_up(history)
+    return scorer
+
+
+# ---------------------------------------------------------------
+# JSON-lines socket API
+# ---------------------------------------------------------------
+def handle_request(scorer, request):
+    """
+    One request -> one response.
+
+    {"bar": {...}} scores a bar, {"bars": [...]} a batch of consecutive bars;
+    "commit": false scores without keeping the bars.
+    """
+    try:
+        commit = request.get("commit", True)
+        if "bars" in request:
+            return {"predictions": scorer.score_batch(request["bars"], commit=commit)}
+        return scorer.score(request["bar"], commit=commit)
+    except KeyError as e:
+        return {"error": f"Missing key: {e}"}
+    except (TypeError, ValueError) as e:
+        return {"error": str(e)}
+
+
+async def _serve_client(scorer, reader, writer):
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        try:
+            response = handle_request(scorer, json.loads(line))
+        except json.JSONDecodeError as e:
+            response = {"error": f"Invalid JSON: {e}"}
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+    writer.close()
+
+
+async def serve(scorer, host="127.0.0.1", port=8765):
+    """Serve JSON-lines requests on a local TCP socket until cancelled."""
+    server = await asyncio.start_server(lambda r, w: _serve_client(scorer, r, w), host, port)
+    print(f"Scoring on {host}:{port}")
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,203 @@
+import numpy as np
+
+from sbux_model import model as model_module
+from sbux_model import profiling
+from sbux_model.model import SharedArrays, _resolve_n_jobs
+
+
+# ---------------------------------------------------------------
+# Resample index arrays, (n_resamples, n) at once
+# ---------------------------------------------------------------
+def stationary_bootstrap_indices(n, n_resamples, mean_block, rng):
+    """
+    Stationary bootstrap (Politis & Romano): blocks of geometric length with mean
+    `mean_block` starting at random rows, wrapping around the end.
+
+    Row t continues the block of the previous row, unless a new block starts there
+    (probability 1 / mean_block); it is then the block's first row plus its offset.
+    """
+    t = np.arange(n)
+    new = rng.random((n_resamples, n)) < 1.0 / mean_block
+    new[:, 0] = True
+    # Each block's random first row minus the position it starts at, read back per row
+    block_t = np.broadcast_to(t, new.shape)[new]
+    offset = rng.integers(0, n, size=len(block_t)) - block_t
+    idx = offset[np.cumsum(new, axis=None).reshape(new.shape) - 1] + t
+    idx[idx >= n] -= n
+    return idx
+
+
+def block_permutation_indices(n, n_resamples, block, rng):
+    """Permutations of the rows that shuffle whole blocks of `block` rows (single rows for block=1)."""
+    n_blocks = -(-n // block)
+    order = np.argsort(rng.random((n_resamples, n_blocks)), axis=1)
+    idx = (order[:, :, None] * block + np.arange(block)).reshape(n_resamples, -1)
+    # Every row keeps n of its indices: the short last block leaves the same gap in each
+    return idx[idx < n].reshape(n_resamples, n)
+
+
+# ---------------------------------------------------------------
+# Metrics over the last axis
+# ---------------------------------------------------------------
+def batch_metrics(truths, preds):
+    """
+    Walk-forward metrics of each row of (..., n) truths and predictions.
+
+    Returns:
+        dict of arrays: r2_oos and rmse_oos as in `model.oos_metrics`, r2_gain over
+        the zero predictor (r2_oos minus the zero baseline's r2) and hit_rate
+        (share of predictions with the sign of the truth)
+    """
+    var = truths.var(axis=-1)
+    mse = ((truths - preds) ** 2).mean(axis=-1)
+    mse_zero = (truths ** 2).mean(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "r2_oos": 1 - mse / var,
+            "rmse_oos": np.sqrt(mse),
+            "r2_gain": (mse_zero - mse) / var,
+            "hit_rate": (np.sign(truths) == np.sign(preds)).mean(axis=-1),
+        }
+
+
+METRICS = ("r2_oos", "rmse_oos", "r2_gain", "hit_rate")
+LOWER_IS_BETTER = {"rmse_oos"}
+
+
+def _from_moments(mean_y, mean_y2, mse, hit_rate):
+    var = mean_y2 - mean_y ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "r2_oos": 1 - mse / var,
+            "rmse_oos": np.sqrt(np.clip(mse, 0.0, None)),
+            "r2_gain": (mean_y2 - mse) / var,
+            "hit_rate": hit_rate,
+        }
+
+
+def _resample_batch(task, truths=None, preds=None):
+    """Metrics of one batch of resamples, with its own random stream."""
+    if truths is None:
+        truths, preds = model_module._WORKER_ARRAYS["truths"], model_module._WORKER_ARRAYS["preds"]
+    kind, seed, size, block = task
+    rng = np.random.default_rng(seed)
+    n = len(truths)
+    agree = np.sign(truths) == np.sign(preds)
+
+    if kind == "bootstrap":
+        # Pairs are resampled together, keeping each prediction with its truth. The
+        # metrics only need means of per-row values, i.e. resample counts @ values
+        idx = stationary_bootstrap_indices(n, size, block, rng)
+        counts = np.bincount((idx + n * np.arange(size)[:, None]).ravel(), minlength=size * n).reshape(size, n)
+        rows = np.column_stack([truths, truths ** 2, (truths - preds) ** 2, agree])
+        m = counts @ rows / n
+        return _from_moments(m[:, 0], m[:, 1], m[:, 2], m[:, 3])
+
+    # Predictions are shuffled against fixed truths (no relation under the null):
+    # only the cross term of the squared error changes
+    idx = block_permutation_indices(n, size, block, rng)
+    cross = preds[idx] @ truths / n
+    mean_y2 = np.mean(truths ** 2)
+    mse = mean_y2 - 2 * cross + np.mean(preds ** 2)
+    hit_rate = (np.sign(preds)[idx] == np.sign(truths)).mean(axis=1)
+    return _from_moments(np.full(size, truths.mean()), np.full(size, mean_y2), mse, hit_rate)
+
+
+def resample_metrics(truths, preds, kind, n_resamples=10_000, block=1, seed=0, batch_size=500, n_jobs=1):
+    """
+    Metrics of `n_resamples` bootstrap ("bootstrap") or permutation ("permutation")
+    resamples, generated and scored `batch_size` at a time, in parallel for n_jobs > 1.
+
+    Each batch draws from its own child of `SeedSequence(seed)`, so the results are
+    the same for any n_jobs.
+
+    Returns:
+        dict of (n_resamples,) arrays, keyed like `batch_metrics`
+    """
+    truths = np.asarray(truths, dtype=float)
+    preds = np.asarray(preds, dtype=float)
+    sizes = [min(batch_size, n_resamples - i) for i in range(0, n_resamples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(kind, s, size, block) for s, size in zip(seeds, sizes)]
+
+    n_jobs = _resolve_n_jobs(n_jobs)
+    with profiling.span(f"significance.{kind}", resamples=n_resamples, rows=len(truths), n_jobs=n_jobs):
+        if n_jobs > 1 and len(tasks) > 1:
+            with SharedArrays(truths=truths, preds=preds) as shared:
+                with shared.executor(n_jobs) as executor:
+                    results = list(executor.map(_resample_batch, tasks))
+        else:
+            results = [_resample_batch(task, truths, preds) for task in tasks]
+    return {k: np.concatenate([r[k] for r in results]) for k in METRICS}
+
+
+# ---------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------
+def default_block(n):
+    """Rule-of-thumb block length for n autocorrelated rows, ~n^(1/3)."""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def significance(truths, preds, n_resamples=10_000, block=None, alpha=0.05, seed=0, batch_size=500, n_jobs=1):
+    """
+    Confidence intervals and p-values of the walk-forward metrics.
+
+    Bootstrap: stationary block bootstrap of (truth, prediction) pairs with mean
+    block `block` rows, giving (1 - alpha) percentile intervals of each metric
+    and the share of resamples where the model does no better than predicting
+    zero (r2_gain <= 0). Permutation: predictions shuffled in blocks of `block`
+    rows against the truths, giving one-sided p-values of each observed metric.
+
+    The two answer different questions. The permutation null is a predictor
+    unrelated to the truths but with the same values, which loses to zero by
+    its own variance, so a small permutation p only says the predictions carry
+    some information. Whether the model beats predicting zero is `p_no_gain`
+    (with the r2_gain interval): a small permutation p next to a large
+    p_no_gain means signal, but no reliable gain.
+
+    Args:
+        truths, preds: OOS truths and walk-forward predictions (as returned by
+            `model.walk_forward_eval`)
+        block (int, optional): rows per block, ~n^(1/3) by default
+    Returns:
+        dict: "observed", "bootstrap" and "permutation" results
+    """
+    truths = np.asarray(truths, dtype=float)
+    preds = np.asarray(preds, dtype=float)
+    block = block or default_block(len(truths))
+    observed = {k: float(v) for k, v in batch_metrics(truths, preds).items()}
+
+    boot = resample_metrics(truths, preds, "bootstrap", n_resamples, block, seed, batch_size, n_jobs)
+    # A different stream from the bootstrap's
+    perm = resample_metrics(truths, preds, "permutation", n_resamples, block, seed + 1, batch_size, n_jobs)
+
+    intervals = {k: [float(q) for q in np.nanquantile(boot[k], [alpha / 2, 1 - alpha / 2])] for k in METRICS}
+    p_values = {}
+    for k in METRICS:
+        at_least = perm[k] <= observed[k] if k in LOWER_IS_BETTER else perm[k] >= observed[k]
+        p_values[k] = float((1 + at_least.sum()) / (1 + n_resamples))
+
+    return {
+        "n_oos": int(len(truths)),
+        "n_resamples": int(n_resamples),
+        "block": int(block),
+        "alpha": alpha,
+        "observed": observed,
+        "bootstrap": {
+            "intervals": intervals,
+            "p_no_gain": float(np.mean(boot["r2_gain"] <= 0)),
+        },
+        "permutation": {"p_values": p_values},
+    }
+
+
+def print_significance(result):
+    level = int(round(100 * (1 - result["alpha"])))
+    print(f"\nSignificance ({result['n_resamples']} resamples, blocks of {result['block']} rows):")
+    for k in METRICS:
+        lo, hi = result["bootstrap"]["intervals"][k]
+        print(f"{k}: {result['observed'][k]:.6f}  {level}% CI [{lo:.6f}, {hi:.6f}]  "
+              f"permutation p = {result['permutation']['p_values'][k]:.4f}")
+    # The test of the edge over zero; permutation p-values only test for any association
+    print(f"Bootstrap share with no gain over the zero predictor (p_no_gain): {result['bootstrap']['p_no_gain']:.4f}")
@@ -0,0 +1,208 @@
+import os
+import re
+import json
+
+from sbux_model.cache import check_stage
+from sbux_model.frequency import PIPELINE_CONFIG, get_frequency, raw_path
+from sbux_model.paths import resolve_table_path, resolve_matrix_path, matrix_files
+
+# What each stage reads and runs, with only standard-library imports: the CLI
+# looks up stage caches and prints status without loading pandas or sklearn.
+
+STAGE_CONFIGS = {
+    "preprocessing": "src/config/preprocessing_config.json",
+    "features": "src/config/features_config.json",
+    "model": "src/config/train_config.json",
+    "dashboard": "src/config/dashboard_config.json",
+}
+STAGE_SCRIPTS = {
+    "collect": "src/01_collect.py",
+    "preprocessing": "src/02_preprocessing.py",
+    "features": "src/03_features.py",
+    "model": "src/04_train.py",
+    "dashboard": "src/05_dashboard_data.py",
+}
+STORE_PATH = "data/store/timeseries.sqlite"
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# sbux_model modules a stage imports inside functions rather than at module level
+# (pipeline.train keeps sklearn out of the other stages); see `stage_sources`
+STAGE_LAZY_IMPORTS = {"model": ["model", "significance", "artifact"]}
+MODULE_IMPORT_RE = re.compile(r"^(?:from sbux_model(?:\.(\w+))? import ([^#\n]+)|import sbux_model\.(\w+))", re.M)
+# Keys the CLI computed just before running a stage script on a miss (see `hand_off`)
+_HANDED_OFF = {}
+
+
+def _imported_modules(path):
+    """sbux_model modules imported at module level (unindented import statements) of a file."""
+    with open(path, "r") as f:
+        text = f.read()
+    names = set()
+    for match in MODULE_IMPORT_RE.finditer(text):
+        module, imported, plain = match.groups()
+        if module or plain:
+            names.add(module or plain)
+            continue
+        # from sbux_model import a as x, b (possibly over several lines in parentheses)
+        if imported.strip().startswith("("):
+            imported = text[match.start(2):text.index(")", match.start(2))]
+        names.update(part.split()[0] for part in imported.strip("( \n").replace("\n", ",").split(",") if part.strip())
+    return {name for name in names if os.path.exists(os.path.join(PACKAGE_DIR, f"{name}.py"))}
+
+
+def stage_sources(name):
+    """
+    The stage script and every sbux_model module it imports, directly or through
+    other modules, plus its STAGE_LAZY_IMPORTS: the code hashed into the stage's
+    cache key. Editing a module no stage imports (e.g. serve, cli or backtest)
+    keeps the caches.
+    """
+    script = STAGE_SCRIPTS[name]
+    modules = set(STAGE_LAZY_IMPORTS.get(name, []))
+    todo = [script] + [os.path.join(PACKAGE_DIR, f"{module}.py") for module in modules]
+    while todo:
+        for module in _imported_modules(todo.pop()) - modules:
+            modules.add(module)
+            todo.append(os.path.join(PACKAGE_DIR, f"{module}.py"))
+    return [os.path.join(PACKAGE_DIR, f"{module}.py") for module in sorted(modules)] + [script]
+
+
+def load_config(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def store_settings(path=PIPELINE_CONFIG):
+    """The `store` block of pipeline_config.json (disabled if absent)."""
+    if not os.path.exists(path):
+        return {"enabled": False}
+    with open(path, "r") as f:
+        return {"enabled": False, "path": STORE_PATH, **json.load(f).get("store", {})}
+
+
+def raw_sources(config, freq=None):
+    """
+    (key, path, preprocessing function name) of each raw file in preprocessing_config.json,
+    with "{frequency}" in the paths filled in.
+    """
+    freq = freq or get_frequency()
+    sources = []
+    for key, raw_info in config["raw_files"].items():
+        path = raw_info["filename"] if isinstance(raw_info, dict) else raw_info
+        # Default: resample last
+        func_name = raw_info.get("preprocessing", "resample_weekly_last") if isinstance(raw_info, dict) \
+            else "resample_weekly_last"
+        sources.append((key, raw_path(path, freq), func_name))
+    return sources
+
+
+def vintage_sources(config):
+    """
+    {key: vintages path} of the raw files read point-in-time, when `point_in_time`
+    is enabled in preprocessing_config.json (sources with a "vintages" file).
+    """
+    if not config.get("point_in_time", {}).get("enabled", False):
+        return {}
+    return {key: info["vintages"] for key, info in config["raw_files"].items()
+            if isinstance(info, dict) and info.get("vintages")}
+
+
+# ---------------------------------------------------------------
+# Cache keys
+# ---------------------------------------------------------------
+def cache_inputs(name, config):
+    """
+    What a stage's cache key is computed from.
+
+    Args:
+        name (str): "preprocessing", "features", "model" or "dashboard"
+        config (dict): the stage config
+    Returns:
+        (key config, input paths, source paths): as `cache.check_stage` takes them.
+            Raises FileNotFoundError when an upstream table is missing.
+    """
+    sources = stage_sources(name)
+
+    if name == "preprocessing":
+        freq = get_frequency()
+        # Read from the time-series store instead of the raw CSVs (pipeline_config.json "store")
+        store_cfg = store_settings()
+        if store_cfg["enabled"]:
+            input_paths = [store_cfg["path"]]
+        else:
+            input_paths = [path for _, path, _ in raw_sources(config, freq)]
+            # Release-date vintages of the sources read point-in-time
+            input_paths += list(vintage_sources(config).values())
+        return {**config, "frequency": freq["name"], "store": store_cfg["enabled"]}, input_paths, sources
+
+    if name == "features":
+        input_paths = [resolve_table_path(config["input_stage"], config.get("input"))]
+        key_config = {**config, "frequency": get_frequency()["name"]}
+        if config.get("matrix", {}).get("enabled", False):
+            # The matrix is laid out for the model's feature columns
+            key_config["matrix_leading"] = load_config(STAGE_CONFIGS["model"])["feature_columns"]
+        return key_config, input_paths, sources
+
+    if name == "model":
+        # Trained from the memory-mapped feature matrix instead of the table (see features_config "matrix")
+        if config.get("input", {}).get("matrix", False):
+            manifest_path = resolve_matrix_path(config["input_stage"], config.get("input"))
+            input_paths = [manifest_path, *matrix_files(manifest_path)]
+        else:
+            input_paths = [resolve_table_path(config["input_stage"], config.get("input"))]
+        return {**config, "frequency": get_frequency()["name"]}, input_paths, sources
+
+    if name == "dashboard":
+        input_paths = [
+            resolve_table_path(config["model_stage"], config.get("input_model")),
+            resolve_table_path(config["preproc_stage"], config.get("input_preproc")),
+        ]
+        return config, input_paths, sources
+
+    raise ValueError(f"Unknown stage: {name}")
+
+
+def check(name, config=None, touch=True):
+    """
+    `cache.check_stage` for a stage: (key, cached artifact paths or None).
+
+    Args:
+        config (dict, optional): the stage config, read from STAGE_CONFIGS by default
+        touch (bool): reuse a hit; False only checks for one
+    """
+    config = config or load_config(STAGE_CONFIGS[name])
+    handed_off = _HANDED_OFF.pop(name, None)
+    if touch and handed_off is not None and handed_off[1] == config:
+        return handed_off[0], None
+    key_config, input_paths, sources = cache_inputs(name, config)
+    return check_stage(config["stage_name"], key_config, input_paths, sources, touch=touch)
+
+
+def hand_off(name, key, config=None):
+    """
+    Pass the key of a miss to the stage script about to run in this process, so
+    its `check` with the same config returns it instead of hashing the inputs again.
+    """
+    _HANDED_OFF[name] = (key, config or load_config(STAGE_CONFIGS[name]))
+
+
+def status(name):
+    """
+    Whether a stage would be a cache hit now, without touching its cache.
+
+    Returns:
+        (state, paths): "cached" with the cached artifact paths, or "stale" (inputs,
+            config or code changed), "no cache" (caching disabled) or "missing input",
+            with the stage's latest output table (None if there is none)
+    """
+    config = load_config(STAGE_CONFIGS[name])
+    try:
+        key, cached = check(name, config, touch=False)
+        state = "no cache" if key is None else ("cached" if cached else "stale")
+    except FileNotFoundError:
+        state, cached = "missing input", None
+    if cached:
+        return state, cached
+    try:
+        return state, [resolve_table_path(config["stage_name"], config.get("output"))]
+    except FileNotFoundError:
+        return state, None
@@ -0,0 +1,286 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from sbux_model.stages import STORE_PATH, store_settings
+from sbux_model.preprocessing import VINTAGE_KEYS
+
+# One row per (series, date, field), clustered on that key (WITHOUT ROWID), so
+# reading a date range of a few series only touches those pages of the B-tree
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    series TEXT NOT NULL,
+    field  TEXT NOT NULL,
+    date   INTEGER NOT NULL,   -- seconds since the epoch
+    value  REAL,
+    PRIMARY KEY (series, date, field)
+) WITHOUT ROWID;
+
+-- Release-date vintages of revised series (e.g. FRED/ALFRED): the value of an
+-- observation from its release date on, clustered by release date so the
+-- vintages known by a given date are one range
+CREATE TABLE IF NOT EXISTS vintages (
+    series         TEXT NOT NULL,
+    field          TEXT NOT NULL,
+    realtime_start INTEGER NOT NULL,   -- release date, seconds since the epoch
+    date           INTEGER NOT NULL,   -- observation date
+    value          REAL,
+    PRIMARY KEY (series, realtime_start, date, field)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fields (
+    series   TEXT NOT NULL,
+    field    TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    dtype    TEXT NOT NULL,
+    PRIMARY KEY (series, field)
+) WITHOUT ROWID;
+"""
+
+
+def series_name(path):
+    """Store key of a raw file: its name without extension, e.g. "SBUX_weekly"."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _to_seconds(index):
+    return pd.DatetimeIndex(index).values.astype("datetime64[s]").astype(np.int64)
+
+
+def _to_dates(seconds):
+    return pd.DatetimeIndex(np.asarray(seconds, dtype=np.int64).astype("datetime64[s]").astype("datetime64[ns]"))
+
+
+class TimeSeriesStore:
+    """
+    Raw time series in a single SQLite file, keyed by series, date and field.
+
+    A series is a date-indexed table (e.g. the columns of one raw CSV); each of
+    its columns is a field. Missing values are kept as NULLs, so a series reads
+    back with the rows it was written with.
+
+    Args:
+        path (str): database file, created with its directory if missing
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Concurrent writers (e.g. collection threads, each with its own connection) wait for the lock
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------------------------------------
+    # Writes
+    # -----------------------------------------------------------
+    def _register_fields(self, series, fields, dtypes):
+        known = dict(self.conn.execute("SELECT field, position FROM fields WHERE series = ?", (series,)))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO fields (series, field, position, dtype) VALUES (?, ?, ?, ?)",
+            [(series, f, len(known) + i, str(dtype))
+             for i, (f, dtype) in enumerate((f, d) for f, d in zip(fields, dtypes) if f not in known)],
+        )
+
+    def _write(self, series, df, on_conflict):
+        if isinstance(df, pd.Series):
+            df = df.to_frame()
+        df = df.loc[df.index.notna()]
+        fields = [str(c) for c in df.columns]
+        values = df.to_numpy(dtype=float)
+        # Long rows (field, date, value), NaN stored as NULL
+        dates = np.tile(_to_seconds(df.index), len(fields)).tolist()
+        names = np.repeat(np.array(fields, dtype=object), len(df)).tolist()
+        flat = values.T.ravel()
+        flat = np.where(np.isnan(flat), None, flat.astype(object)).tolist()
+
+        with self.conn:
+            self._register_fields(series, fields, df.dtypes)
+            self.conn.executemany(
+                f"INSERT INTO observations (series, field, date, value) VALUES (?, ?, ?, ?) {on_conflict}",
+                zip([series] * len(flat), names, dates, flat),
+            )
+        return len(flat)
+
+    def append(self, series, df):
+        """
+        Add new observations of a date-indexed table; values for dates already
+        stored are left unchanged.
+
+        Returns:
+            int: observations offered (one per field and date)
+        """
+        return self._write(series, df, "ON CONFLICT (series, date, field) DO NOTHING")
+
+    def upsert(self, series, df):
+        """Add new observations and overwrite stored ones with the same dates (e.g. revised values)."""
+        return self._write(series, df, "ON CONFLICT (series, date, field) DO UPDATE SET value = excluded.value")
+
+    def import_csv(self, path, series=None):
+        """Upsert a raw CSV (dates in the first column) as `series` (by default its file name)."""
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        return self.upsert(series or series_name(path), df)
+
+    def upsert_vintages(self, series, vintages):
+        """
+        Add release-date vintages, overwriting stored ones with the same release
+        and observation dates.
+
+        Args:
+            vintages (pd.DataFrame): "realtime_start" (release date), "date"
+                (observation date) and one column per field, as from
+                `collect.get_fred_vintages`
+        Returns:
+            int: vintages offered (one per field and row)
+        """
+        fields = [str(c) for c in vintages.columns if c not in VINTAGE_KEYS]
+        released = np.tile(_to_seconds(vintages["realtime_start"]), len(fields)).tolist()
+        dates = np.tile(_to_seconds(vintages["date"]), len(fields)).tolist()
+        names = np.repeat(np.array(fields, dtype=object), len(vintages)).tolist()
+        flat = vintages[fields].to_numpy(dtype=float).T.ravel()
+        flat = np.where(np.isnan(flat), None, flat.astype(object)).tolist()
+
+        with self.conn:
+            self._register_fields(series, fields, vintages[fields].dtypes)
+            self.conn.executemany(
+                "INSERT INTO vintages (series, field, realtime_start, date, value) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (series, realtime_start, date, field) DO UPDATE SET value = excluded.value",
+                zip([series] * len(flat), names, released, dates, flat),
+            )
+        return len(flat)
+
+    def import_vintages_csv(self, path, series=None):
+        """Upsert a vintages CSV ("realtime_start", "date" and value columns) as `series`."""
+        vintages = pd.read_csv(path, parse_dates=VINTAGE_KEYS)
+        return self.upsert_vintages(series or series_name(path), vintages)
+
+    # -----------------------------------------------------------
+    # Reads
+    # -----------------------------------------------------------
+    def _query(self, series, start=None, end=None, fields=None):
+        clauses = [f"series IN ({', '.join('?' * len(series))})"]
+        params = list(series)
+        if fields:
+            clauses.append(f"field IN ({', '.join('?' * len(fields))})")
+            params += list(fields)
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(int(_to_seconds([pd.Timestamp(start)])[0]))
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(int(_to_seconds([pd.Timestamp(end)])[0]))
+        rows = self.conn.execute(
+            f"SELECT series, field, date, value FROM observations WHERE {' AND '.join(clauses)}", params
+        ).fetchall()
+        if not rows:
+            return None
+        s, f, d, v = zip(*rows)
+        return pd.DataFrame({
+            "series": s,
+            "field": f,
+            "date": np.array(d, dtype=np.int64),
+            "value": np.array(v, dtype=float),   # NULL -> NaN
+        })
+
+    def read(self, series, start=None, end=None, fields=None):
+        """
+        Observations of some series between `start` and `end` (inclusive).
+
+        Args:
+            series (str or list): one series, or several
+            fields (list, optional): only these fields
+        Returns:
+            pd.DataFrame indexed by "Date": the series' fields as columns, in the
+            order they were first written (columns (series, field) for a list)
+        """
+        names = [series] if isinstance(series, str) else list(series)
+        long = self._query(names, start, end, fields)
+        if long is None:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="Date"))
+
+        wide = long.pivot(index="date", columns=["series", "field"], values="value")
+        wide.index = _to_dates(wide.index)
+        wide.index.name = "Date"
+
+        catalog = self.conn.execute(
+            f"SELECT series, field, position, dtype FROM fields WHERE series IN ({', '.join('?' * len(names))})", names
+        ).fetchall()
+        order = {(s, f): (names.index(s), p) for s, f, p, _ in catalog}
+        wide = wide[sorted(wide.columns, key=order.get)]
+        # Integer fields come back as integers when nothing is missing
+        dtypes = {(s, f): d for s, f, _, d in catalog}
+        for col in wide.columns:
+            if dtypes[col].startswith("int") and wide[col].notna().all():
+                wide[col] = wide[col].astype(dtypes[col])
+
+        if isinstance(series, str):
+            wide.columns = wide.columns.get_level_values("field")
+        wide.columns.name = None
+        return wide
+
+    def read_vintages(self, series, released_by=None, fields=None):
+        """
+        Release-date vintages of a series, optionally only those released by a date.
+
+        Returns:
+            pd.DataFrame: "realtime_start", "date" and one column per field, sorted
+            by release then observation date (as `preprocessing.asof_vintages` takes)
+        """
+        clauses, params = ["series = ?"], [series]
+        if fields:
+            clauses.append(f"field IN ({', '.join('?' * len(fields))})")
+            params += list(fields)
+        if released_by is not None:
+            clauses.append("realtime_start <= ?")
+            params.append(int(_to_seconds([pd.Timestamp(released_by)])[0]))
+        rows = self.conn.execute(
+            f"SELECT field, realtime_start, date, value FROM vintages WHERE {' AND '.join(clauses)}", params
+        ).fetchall()
+        positions = dict(self.conn.execute("SELECT field, position FROM fields WHERE series = ?", (series,)))
+        if not rows:
+            return pd.DataFrame(columns=VINTAGE_KEYS + sorted(positions, key=positions.get))
+
+        f, s, d, v = zip(*rows)
+        long = pd.DataFrame({"field": f, "realtime_start": np.array(s, dtype=np.int64),
+                             "date": np.array(d, dtype=np.int64), "value": np.array(v, dtype=float)})
+        wide = long.pivot(index=["realtime_start", "date"], columns="field", values="value")
+        wide = wide[sorted(wide.columns, key=positions.get)].reset_index()
+        wide.columns.name = None
+        wide["realtime_start"] = _to_dates(wide["realtime_start"])
+        wide["date"] = _to_dates(wide["date"])
+        return wide
+
+    def last_date(self, series):
+        """Latest stored date of a series, or None."""
+        (last,) = self.conn.execute("SELECT MAX(date) FROM observations WHERE series = ?", (series,)).fetchone()
+        return None if last is None else _to_dates([last])[0]
+
+    def series(self):
+        """Stored series (and vintage series) with their observation counts and first/last dates."""
+        rows = self.conn.execute(
+            "SELECT series, COUNT(*), MIN(date), MAX(date) FROM "
+            "(SELECT series, date FROM observations UNION ALL SELECT series, date FROM vintages) "
+            "GROUP BY series ORDER BY series"
+        ).fetchall()
+        return pd.DataFrame(
+            [(s, n, _to_dates([lo])[0], _to_dates([hi])[0]) for s, n, lo, hi in rows],
+            columns=["series", "observations", "first", "last"],
+        )
+
+
+def open_store(settings=None):
+    """The store of pipeline_config.json, or None when it is disabled."""
+    settings = settings or store_settings()
+    if not settings.get("enabled", False):
+        return None
+    return TimeSeriesStore(settings.get("path", STORE_PATH))
@@ -0,0 +1,43 @@
+# src/search.py
+import argparse
+
+from sbux_model import pipeline as pl
+from sbux_model import profiling
+from sbux_model import search
+from sbux_model.io import read_table
+
+SEARCH_CONFIG = "src/config/search_config.json"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search feature subsets, walk-forward windows and models")
+    parser.add_argument("--config", default=SEARCH_CONFIG, help="Search space and strategy")
+    parser.add_argument("--strategy", choices=search.STRATEGIES, help="Overrides the config's strategy")
+    parser.add_argument("--candidates", type=int, help="Candidates sampled for random / halving search")
+    parser.add_argument("--jobs", type=int, help="Worker processes fitting folds (-1: every CPU)")
+    parser.add_argument("--top", type=int, default=10, help="Leaderboard rows printed")
+    args = parser.parse_args()
+
+    search_cfg = pl.load_config(args.config)
+    if args.strategy:
+        search_cfg["strategy"] = args.strategy
+    if args.candidates:
+        search_cfg["n_candidates"] = args.candidates
+    train_cfg = pl.load_config(pl.STAGE_CONFIGS["model"])
+
+    profiling.start_run("search")
+    # Only the columns some candidate uses, plus the target
+    candidates = search.expand_space(search_cfg["space"], train_cfg)
+    columns = list(dict.fromkeys([train_cfg["target"]] + [c for cand in candidates for c in cand["features"]]))
+    df = read_table(stage_name=train_cfg["input_stage"], config=train_cfg.get("input"), columns=columns)
+
+    leaderboard, info = search.search(search_cfg, train_cfg, df, n_jobs=args.jobs)
+    path = search.write_leaderboard(leaderboard, info, search_cfg, train_cfg)
+
+    metric = search_cfg.get("metric", "r2_oos")
+    print(f"\nOOS {info['oos_start']} to {info['oos_end']}, zero baseline {metric}: {info['zero_baseline'][metric]:.6f}")
+    print(f"Folds fitted: {info['fits']['computed']}, reused: {info['fits']['reused']}\n")
+    for entry in leaderboard[:args.top]:
+        print(f"{entry['rank']:>3}  {metric} {entry[metric]: .6f}  rung {entry['rung']}  "
+              f"window {entry['train_window']}  horizon {entry['horizon']}  {entry['model']}  "
+              f"{entry['n_features']} features")
+    print(f"\nSaved leaderboard → {path}")
@@ -0,0 +1,19 @@
+# src/serve.py
+import asyncio
+import argparse
+
+from sbux_model.serve import load_scorer, serve
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve alpha predictions for new bars over a local JSON-lines socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", help="Model artifact manifest or pickled pipeline (default: latest in data/model)")
+    args = parser.parse_args()
+
+    scorer = load_scorer(args.model)
+    print(f"Loaded model, features warmed up to {scorer.features.last_date}")
+    try:
+        asyncio.run(serve(scorer, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,29 @@
+# src/store.py
+import os
+import argparse
+
+from sbux_model import pipeline as pl
+from sbux_model.store import TimeSeriesStore, store_settings, series_name, STORE_PATH
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load raw CSVs into the time-series store, or list what it holds")
+    parser.add_argument("command", choices=["import", "info"],
+                        help="import: upsert the raw files (and vintages) of preprocessing_config.json; info: list stored series")
+    parser.add_argument("--path", help=f"Store file (default: pipeline_config.json store path, else {STORE_PATH})")
+    args = parser.parse_args()
+
+    path = args.path or store_settings().get("path", STORE_PATH)
+    with TimeSeriesStore(path) as store:
+        if args.command == "import":
+            config = pl.load_config(pl.STAGE_CONFIGS["preprocessing"])
+            for key, raw_path, _ in pl.raw_sources(config):
+                n = store.import_csv(raw_path)
+                print(f"{raw_path} → {series_name(raw_path)} ({n} observations)")
+            # Release-date vintages of the sources that have them (saved by collection)
+            for key, info in config["raw_files"].items():
+                vintages_path = info.get("vintages") if isinstance(info, dict) else None
+                if vintages_path and os.path.exists(vintages_path):
+                    n = store.import_vintages_csv(vintages_path)
+                    print(f"{vintages_path} → {series_name(vintages_path)} ({n} vintages)")
+        print(store.series().to_string(index=False))
+        print(f"\nStore: {path}")
@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+
+@pytest.fixture
+def preprocessed():
+    """Synthetic weekly preprocessed table with every input column of features_config.json."""
+    rng = np.random.default_rng(0)
+    n = 420
+    index = pd.date_range("2018-01-01", periods=n, freq="W-MON", name="Date")
+    df = pd.DataFrame(index=index)
+    for col in ["SBUX", "SPY", "XLY", "MCD"]:
+        df[col] = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+    df["^VIX"] = 20 + rng.normal(0, 2, n)
+    df["gt_interest"] = 50 + rng.normal(0, 5, n).round()
+    for col in ["10Y_treasury", "2Y_treasury"]:
+        df[col] = 3 + np.cumsum(rng.normal(0, 0.05, n))
+    # Monthly series, forward-filled as in the raw files
+    for col in ["CPI", "fed_funds_rate"]:
+        df[col] = pd.Series(np.cumsum(rng.normal(0.2, 0.1, n)), index=index)[::4].reindex(index).ffill() + 100
+    for col in ["hl_range", "vol_norm", "price_impact", "volatility"]:
+        df[col] = np.abs(rng.normal(1, 0.3, n))
+    return df
+
+
+@pytest.fixture
+def feature_defs():
+    """The `features` block of features_config.json, plus a beta term structure."""
+    with open(os.path.join(ROOT, "src", "config", "features_config.json")) as f:
+        defs = json.load(f)["features"]
+    defs["beta_ts"] = {"type": "beta_term_structure", "column": "asset_ret", "windows": [8, 26], "halflives": [8]}
+    return defs
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model import backtest
+from sbux_model.frequency import get_frequency
+
+WEEKLY = get_frequency("weekly")
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(4)
+    n = 200
+    index = pd.date_range("2016-01-04", periods=n, freq="W-MON")
+    returns = rng.normal(0, 0.03, n)
+    pred = 0.3 * returns + rng.normal(0, 0.03, n)
+    pred[:40] = np.nan
+    returns[-1] = np.nan   # not realised yet
+    return pd.DataFrame({"pred": pred, "ret": returns}, index=index)
+
+
+def test_trailing_rank_matches_brute_force():
+    rng = np.random.default_rng(0)
+    pred = np.round(rng.normal(size=60), 1)   # ties
+    window = 10
+    rank = backtest.trailing_rank(pred, window)
+
+    assert np.isnan(rank[:window]).all()
+    for i in range(window, len(pred)):
+        past = pred[i - window:i]
+        expected = (np.sum(past < pred[i]) + 0.5 * np.sum(past == pred[i])) / window
+        assert rank[i] == pytest.approx(expected)
+
+
+def test_vol_leverage_matches_pandas():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0, 0.02, 80)
+    leverage = backtest.vol_leverage(returns, 13, vol_target=0.2, max_leverage=1.5, annualisation=52)
+
+    realised = pd.Series(returns).rolling(13).std().shift(1) * np.sqrt(52)
+    expected = np.minimum(0.2 / realised, 1.5).fillna(0.0).to_numpy()
+    np.testing.assert_allclose(leverage, expected, rtol=1e-10)
+    assert (backtest.vol_leverage(returns, 13) == 1.0).all()
+
+
+def test_run_by_hand():
+    index = pd.date_range("2020-01-06", periods=5, freq="W-MON")
+    df = pd.DataFrame({
+        "pred": [np.nan, 0.02, -0.03, 0.005, 0.04],
+        "ret": [0.01, 0.02, 0.01, -0.02, np.nan],
+    }, index=index)
+    bars_df, stats = backtest.run(df, "pred", "ret", {"threshold": 0.01, "cost_bps": 10}, freq=WEEKLY)
+
+    # Rows from the first prediction to the last realised return
+    assert list(bars_df.index) == list(index[1:4])
+    np.testing.assert_array_equal(bars_df["position"], [1.0, -1.0, 0.0])
+    np.testing.assert_array_equal(bars_df["turnover"], [1.0, 2.0, 1.0])
+    np.testing.assert_allclose(bars_df["net_pnl"], [0.02 - 0.001, -0.01 - 0.002, -0.001])
+    np.testing.assert_allclose(bars_df["equity"], np.cumprod(1 + bars_df["net_pnl"]))
+    assert stats["total_return"] == pytest.approx(bars_df["equity"].iloc[-1] - 1)
+    assert stats["exposure"] == pytest.approx(2 / 3)
+    assert stats["hit_rate"] == pytest.approx(0.5)
+    assert stats["max_drawdown"] == pytest.approx(bars_df["drawdown"].min())
+
+
+def test_run_without_predictions(predictions):
+    with pytest.raises(ValueError, match="No predictions"):
+        backtest.run(predictions.assign(pred=np.nan), "pred", "ret", {}, freq=WEEKLY)
+
+
+@pytest.mark.parametrize("max_cells", [50_000_000, 1000])
+def test_sweep_matches_run(predictions, max_cells):
+    grid = {
+        "signal": ["threshold", "rank"],
+        "threshold": [0.0, 0.01],
+        "rank_window": [13, 26],
+        "quantile": [0.2, 0.4],
+        "vol_target": [None, 0.15],
+        "vol_window": [8, 26],
+        "max_leverage": [1.0, 3.0],
+        "cost_bps": [0.0, 25.0],
+    }
+    results = backtest.sweep(predictions, "pred", "ret", grid, freq=WEEKLY, max_cells=max_cells)
+    # (2 thresholds + 2 windows x 2 quantiles) x (1 + 2 windows x 2 caps) x 2 costs
+    assert len(results) == 6 * 5 * 2
+
+    stat_columns = list(backtest.performance(np.zeros(3), np.zeros(3), np.zeros(3)))
+    for row in results.to_dict("records"):
+        strategy = {k: v for k, v in row.items() if k not in stat_columns and not pd.isna(v)}
+        if row["vol_target"] is None or pd.isna(row["vol_target"]):
+            strategy["vol_target"] = None
+        _, stats = backtest.run(predictions, "pred", "ret", strategy, freq=WEEKLY)
+        for k in stat_columns:
+            np.testing.assert_allclose(row[k], stats[k], rtol=1e-9, atol=1e-12, err_msg=f"{strategy} {k}")
@@ -0,0 +1,20 @@
+import json
+
+import bench
+
+
+def test_run_benchmarks_small():
+    results = bench.run_benchmarks(rows=300, assets=3, n_features=12, freq="W-MON", repeat=1,
+                                   stages=["compute_residual_alpha", "apply_features_fused", "walk_forward_eval_linear"])
+    assert set(results) == {"compute_residual_alpha", "apply_features_fused", "walk_forward_eval_linear"}
+    assert all(r["wall_s"] > 0 and r["peak_mb"] >= 0 for r in results.values())
+
+
+def test_compare_flags_regressions(tmp_path):
+    params = {"rows": 300}
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"params": params, "results": {
+        "fast": {"wall_s": 1.0}, "slow": {"wall_s": 1.0}, "gone": {"wall_s": 1.0},
+    }}))
+    current = {"fast": {"wall_s": 1.1}, "slow": {"wall_s": 1.5}, "new": {"wall_s": 9.0}}
+    assert bench.compare(current, params, str(path), threshold=1.2) == ["slow"]
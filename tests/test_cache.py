@@ -0,0 +1,112 @@
+import os
+import ast
+import json
+import time
+
+import pytest
+
+from sbux_model import cache, stages
+
+
+@pytest.fixture
+def stage_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/stage")
+    with open("input.csv", "w") as f:
+        f.write("Date,a\n2020-01-06,1\n")
+    return tmp_path
+
+
+def write_artifact(name, text="x"):
+    path = os.path.join("data", "stage", name)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def test_key_follows_inputs_config_and_code(stage_dir):
+    with open("code.py", "w") as f:
+        f.write("x = 1\n")
+    key = cache.stage_key(["input.csv"], {"a": 1}, ["code.py"])
+    assert cache.stage_key(["input.csv"], {"a": 1}, ["code.py"]) == key
+    assert cache.stage_key(["input.csv"], {"a": 2}, ["code.py"]) != key
+    with open("code.py", "a") as f:
+        f.write("y = 2\n")
+    assert cache.stage_key(["input.csv"], {"a": 1}, ["code.py"]) != key
+
+
+def test_hit_renames_artifacts_to_now(stage_dir):
+    config = {"cache": {"enabled": True}}
+    key, cached = cache.check_stage("stage", config, ["input.csv"])
+    assert cached is None
+    paths = [write_artifact("stage_20200101_000000.csv"), write_artifact("stage_20200101_000000_metrics.json")]
+    cache.store_stage("stage", config, key, paths)
+
+    assert cache.peek("stage", key) == paths
+    _, cached = cache.check_stage("stage", config, ["input.csv"])
+    assert len(cached) == 2 and all(os.path.exists(p) for p in cached)
+    assert "20200101_000000" not in cached[0]
+    assert not os.path.exists(paths[0])
+
+
+def test_overwritten_artifact_is_a_miss(stage_dir):
+    config = {"cache": {"enabled": True}}
+    key, _ = cache.check_stage("stage", config, ["input.csv"])
+    path = write_artifact("fixed.csv")
+    cache.store_stage("stage", config, key, [path])
+    time.sleep(0.01)
+    write_artifact("fixed.csv", "changed by another run")
+    assert cache.check_stage("stage", config, ["input.csv"])[1] is None
+    assert key not in cache.load_manifest("stage")
+
+
+def test_eviction_keeps_the_latest_entries(stage_dir):
+    config = {"cache": {"enabled": True, "keep": 2}}
+    paths = []
+    for i in range(3):
+        paths.append(write_artifact(f"stage_2020010{i + 1}_000000.csv"))
+        cache.record("stage", f"key{i}", [paths[-1]])
+        manifest = cache.load_manifest("stage")
+        manifest[f"key{i}"]["last_used"] = f"2020010{i + 1}_000000"
+        with open(os.path.join("data", "stage", cache.MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f)
+    assert cache.evict("stage", keep=config["cache"]["keep"]) == [paths[0]]
+    assert set(cache.load_manifest("stage")) == {"key1", "key2"}
+
+
+# ---------------------------------------------------------------
+# Code hashed per stage
+# ---------------------------------------------------------------
+def source_modules(name):
+    return {os.path.basename(path)[:-3] for path in stages.stage_sources(name)[:-1]}
+
+
+def test_stage_sources_follow_imports():
+    assert {"features", "rolling", "panel", "frequency", "quality", "pipeline", "io"} <= source_modules("features")
+    assert {"preprocessing", "store", "quality", "frequency"} <= source_modules("preprocessing")
+    assert {"model", "significance", "artifact"} <= source_modules("model")
+    for name in stages.STAGE_CONFIGS:
+        # Editing these never invalidates a stage
+        assert not {"serve", "cli", "backtest", "search", "collect"} & source_modules(name)
+    assert "model" not in source_modules("preprocessing")
+
+
+def test_lazy_imports_are_listed():
+    # Function-level sbux_model imports of pipeline.py are not followed: they must be in STAGE_LAZY_IMPORTS
+    path = os.path.join(stages.PACKAGE_DIR, "pipeline.py")
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    lazy = set()
+    for func in tree.body:
+        if isinstance(func, ast.FunctionDef):
+            for node in ast.walk(func):
+                if isinstance(node, ast.ImportFrom) and node.module.startswith("sbux_model"):
+                    lazy.add(node.module.split(".")[1] if "." in node.module else node.names[0].name)
+    assert lazy == set(stages.STAGE_LAZY_IMPORTS["model"])
+
+
+def test_handed_off_key_is_used_once():
+    config = {"stage_name": "model", "cache": {"enabled": True}}
+    stages.hand_off("model", "abc", config)
+    assert stages.check("model", config) == ("abc", None)
+    assert "model" not in stages._HANDED_OFF
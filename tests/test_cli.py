@@ -0,0 +1,74 @@
+import os
+import shutil
+
+import pytest
+
+from sbux_model import cli
+from sbux_model.clean import FOLDERS, STORE_FOLDER
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A project with the repo's configs and a file in every data folder, run from a subdirectory."""
+    shutil.copytree(os.path.join(ROOT, "src", "config"), tmp_path / "src" / "config")
+    for folder in [*FOLDERS.values(), STORE_FOLDER, "data/raw"]:
+        os.makedirs(tmp_path / folder)
+        (tmp_path / folder / "file.csv").write_text("x\n")
+    (tmp_path / "notebooks" / "scratch").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path / "notebooks" / "scratch")
+    return tmp_path
+
+
+def remaining(root):
+    return {folder for folder in [*FOLDERS.values(), STORE_FOLDER, "data/raw"]
+            if os.listdir(root / folder)}
+
+
+def test_project_root(project):
+    assert cli.project_root() == str(project)
+    assert cli.project_root(str(project / "src" / "config")) == str(project)
+    # Outside any project: the checkout the package lives in
+    assert cli.project_root("/") == ROOT
+
+
+def test_clean_defaults_keep_raw_data(project):
+    cli.main(["clean", "-y"])
+    assert os.getcwd() == str(project)
+    assert remaining(project) == {STORE_FOLDER, "data/raw"}
+
+
+@pytest.mark.parametrize("options, cleaned", [
+    (["--features"], {"data/features", "data/features_panel"}),
+    (["--model", "--profile", "--bench"], {"data/model", "data/profile", "data/bench"}),
+    (["--store"], {STORE_FOLDER}),
+])
+def test_clean_targets(project, options, cleaned):
+    before = remaining(project)
+    cli.main(["clean", *options, "-y"])
+    assert remaining(project) == before - cleaned
+
+
+def test_clean_asks_first(project, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt: "n")
+    before = remaining(project)
+    cli.main(["clean"])
+    assert remaining(project) == before
+
+
+def test_status(project, capsys):
+    cli.main(["status"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["stage", "cache", "output"]
+    rows = {line.split()[0]: line for line in lines[1:]}
+    assert set(rows) == {"preprocessing", "features", "model", "dashboard"}
+    # Nothing has run: no stage has its input tables
+    assert all("missing input" in row and row.endswith("-") for row in rows.values())
+
+
+def test_no_project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cli, "project_root", lambda cwd=None: None)
+    with pytest.raises(SystemExit, match="Project root not found"):
+        cli.main(["status"])
@@ -0,0 +1,125 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model import collect
+from sbux_model.collect import LocalPriceClient, LocalFredClient
+from sbux_model.frequency import get_frequency, raw_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RecordingClient(LocalPriceClient):
+    """LocalPriceClient that records the start date of every download."""
+
+    def __init__(self, frames):
+        super().__init__(frames)
+        self.starts = []
+
+    def download(self, tickers, start=None, **kwargs):
+        self.starts.append(start)
+        return super().download(tickers, start=start, **kwargs)
+
+
+def daily_frames(tickers, end, scale=None):
+    index = pd.bdate_range("2020-01-01", end)
+    frames = {}
+    for i, ticker in enumerate(tickers):
+        close = 100 + i + np.arange(len(index)) * 0.1
+        close = close * (scale or {}).get(ticker, 1.0)
+        frames[ticker] = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                                       "Volume": 1000.0}, index=index)
+    return frames
+
+
+@pytest.fixture
+def raw_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path)
+
+
+def saved(raw_dir, ticker):
+    return pd.read_csv(os.path.join(raw_dir, f"{ticker}_weekly.csv"), index_col=0, parse_dates=True)[ticker]
+
+
+def test_prices_resume_from_the_last_saved_week(raw_dir):
+    tickers = ["SBUX", "SPY"]
+    collect.collect_prices(tickers, start="2020-01-01", client=RecordingClient(daily_frames(tickers, "2020-06-30")),
+                           raw_dir=raw_dir)
+    last = saved(raw_dir, "SBUX").index[-1]
+
+    client = RecordingClient(daily_frames(tickers, "2020-09-30"))
+    collect.collect_prices(tickers, start="2020-01-01", client=client, raw_dir=raw_dir)
+    assert client.starts == [(last - pd.Timedelta(weeks=1)).strftime("%Y-%m-%d")]
+    expected = collect.get_weekly_prices(["SBUX"], start="2020-01-01", client=client)["SBUX"]
+    pd.testing.assert_series_equal(saved(raw_dir, "SBUX"), expected, check_names=False, check_freq=False)
+
+
+def test_rescaled_history_is_downloaded_again(raw_dir):
+    tickers = ["SBUX", "SPY"]
+    collect.collect_prices(tickers, start="2020-01-01", client=RecordingClient(daily_frames(tickers, "2020-06-30")),
+                           raw_dir=raw_dir)
+
+    # A dividend since the last run scales every earlier adjusted SBUX close
+    client = RecordingClient(daily_frames(tickers, "2020-09-30", scale={"SBUX": 0.98}))
+    collect.collect_prices(tickers, start="2020-01-01", client=client, raw_dir=raw_dir)
+    assert client.starts[1:] == ["2020-01-01"]
+    for ticker in tickers:
+        expected = collect.get_weekly_prices([ticker], start="2020-01-01", client=client)[ticker]
+        pd.testing.assert_series_equal(saved(raw_dir, ticker), expected, check_names=False, check_freq=False)
+
+
+def test_fred_resumes_with_an_overlap(raw_dir):
+    index = pd.date_range("2020-01-01", "2020-12-31", freq="D")
+    series = pd.Series(np.arange(len(index), dtype=float), index=index)
+    collect.get_fred_one("rate", "DGS", LocalFredClient({"DGS": series.loc[:"2020-06-30"]}), start="2020-01-01",
+                         raw_dir=raw_dir)
+    revised = series.copy()
+    revised.loc["2020-06-01":] += 0.5
+    new = collect.get_fred_one("rate", "DGS", LocalFredClient({"DGS": revised}), start="2020-01-01", raw_dir=raw_dir)
+
+    assert new.index[0] == pd.Timestamp("2020-04-06")
+    rate = pd.read_csv(os.path.join(raw_dir, "rate_weekly.csv"), index_col=0, parse_dates=True)["rate"]
+    pd.testing.assert_series_equal(rate, revised.resample("W-MON").last(), check_names=False, check_freq=False)
+
+
+def test_retries_back_off_then_give_up(monkeypatch):
+    waits = []
+    monkeypatch.setattr(collect.time, "sleep", waits.append)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("timeout")
+        return "ok"
+
+    assert collect.with_retries(flaky, retries=3, backoff=0.5) == "ok"
+    assert waits == [0.5, 1.0]
+
+    def broken():
+        raise ConnectionError("down")
+
+    results = collect.run_collection({"ok": lambda: 1, "broken": broken}, retries=2, backoff=0.5)
+    assert results["ok"] == 1
+    assert isinstance(results["broken"], ConnectionError)
+
+
+class FakeTrends:
+    def build_payload(self, keywords, timeframe):
+        self.keyword = keywords[0]
+
+    def interest_over_time(self):
+        index = pd.date_range("2020-01-01", periods=12, freq="MS")
+        return pd.DataFrame({self.keyword: np.arange(12) * 5}, index=index)
+
+
+def test_trends_are_written_where_preprocessing_reads_them(raw_dir):
+    with open(os.path.join(ROOT, "src", "config", "preprocessing_config.json")) as f:
+        path = raw_path(json.load(f)["raw_files"]["gt"]["filename"], get_frequency("weekly"))
+    os.makedirs("data/raw")
+    collect.get_google_trends_weekly("Starbucks", start="2020-01-01", client=FakeTrends(), path=path)
+    assert pd.read_csv(path, index_col=0)["gt_interest"].iloc[-1] == 55
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model import features as ft
+from sbux_model.serve import OnlineFeatures
+
+
+def incremental_state(preprocessed, feature_defs, split, revisable=0):
+    history = preprocessed.iloc[:split]
+    frame = ft.build_features(history.copy(), feature_defs)
+    return ft.init_feature_state(history, frame, feature_defs, revisable=revisable)
+
+
+def test_incremental_matches_batch(preprocessed, feature_defs):
+    batch = ft.build_features(preprocessed.copy(), feature_defs)
+
+    state = incremental_state(preprocessed, feature_defs, 330)
+    rows = []
+    for end in range(339, len(preprocessed) + 9, 9):
+        new_rows, state = ft.update_features(state, preprocessed.iloc[:end], feature_defs)
+        rows.append(new_rows)
+    incremental = pd.concat(rows)
+    # Each update also returns the last previously seen date, whose forward target is now known
+    incremental = incremental.loc[~incremental.index.duplicated(keep="last")]
+
+    # Rolling windows are recomputed from the tail and EWMAs continue from their running sums:
+    # only summation order differs from the batch
+    expected = batch.loc[incremental.index, incremental.columns]
+    pd.testing.assert_frame_equal(incremental, expected, check_freq=False, rtol=1e-9, atol=1e-12)
+    assert len(ft.update_features(state, preprocessed, feature_defs)[0]) == 0
+
+
+def test_revised_rows_are_recomputed(preprocessed, feature_defs):
+    state = incremental_state(preprocessed, feature_defs, 400, revisable=8)
+    revised = preprocessed.copy()
+    revised.iloc[395, revised.columns.get_loc("SBUX")] *= 1.05
+    revised.iloc[397, revised.columns.get_loc("CPI")] += 1.0
+
+    rows, _ = ft.update_features(state, revised, feature_defs)
+    assert rows.index[0] == revised.index[394]
+    expected = ft.build_features(revised.copy(), feature_defs).loc[rows.index, rows.columns]
+    pd.testing.assert_frame_equal(rows, expected, check_freq=False, rtol=1e-9, atol=1e-12)
+
+
+def test_revision_before_the_window_needs_a_full_recompute(preprocessed, feature_defs):
+    state = incremental_state(preprocessed, feature_defs, 400, revisable=8)
+    revised = preprocessed.copy()
+    revised.iloc[390, revised.columns.get_loc("SPY")] *= 1.05
+    assert ft.update_features(state, revised, feature_defs)[0] is None
+    revised = preprocessed.copy()
+    revised.iloc[10, revised.columns.get_loc("SPY")] *= 1.05
+    assert ft.update_features(state, revised, feature_defs)[0] is None
+    assert ft.update_features(state, preprocessed.iloc[:398], feature_defs)[0] is None
+
+
+def test_fused_features_match_one_spec_at_a_time(preprocessed, feature_defs):
+    alpha_df = ft.compute_residual_alpha(preprocessed.copy())
+    expected = alpha_df.copy()
+    for feat_cfg in feature_defs.values():
+        ft.apply_feature(expected, feat_cfg)
+
+    fused = ft.apply_features(alpha_df, feature_defs)
+    pd.testing.assert_frame_equal(fused[expected.columns], expected, check_freq=False, check_exact=True)
+    # Outputs come out in the order the specs add them
+    plan = ft.compile_features(feature_defs)
+    assert [name for name, _, _, _ in plan] == [c for c in expected.columns if c not in alpha_df.columns]
+
+
+def test_online_matches_batch(preprocessed, feature_defs):
+    batch = ft.build_features(preprocessed.copy(), feature_defs)
+    online = OnlineFeatures(feature_defs)
+    rows = [online.push(dict(zip(online.input_columns, values)), date=date)
+            for date, values in zip(preprocessed.index, preprocessed[online.input_columns].to_numpy(dtype=float))]
+    pushed = pd.DataFrame(rows, index=preprocessed.index, columns=online.columns)
+
+    # Every feature and the residual alpha, past the warm-up; the forward target is not known online
+    columns = list(dict.fromkeys(name for name, _, _, _ in online.plan)) + ["beta_roll", "alpha"]
+    start = ft.feature_lookback(feature_defs)
+    pd.testing.assert_frame_equal(pushed[columns].iloc[start:], batch[columns].iloc[start:],
+                                  check_freq=False, check_dtype=False, rtol=1e-7, atol=1e-10)
+
+
+def test_online_rejects_out_of_order_bars(feature_defs):
+    online = OnlineFeatures(feature_defs)
+    online.push({"SBUX": 1.0, "SPY": 1.0}, date="2024-01-08 10:00")
+    with pytest.raises(ValueError):
+        online.push({"SBUX": 1.0, "SPY": 1.0}, date="2024-01-08 09:00")
+    with pytest.raises(ValueError):
+        online.push({"SBUX": 1.0, "SPY": 1.0}, date=None)
+    row = online.push({"SBUX": 1.1, "SPY": 1.0}, date="2024-01-08 11:00")
+    assert np.isfinite(row[online.position["asset_ret"]])
+    # The returned row is not overwritten by later bars
+    online.push({"SBUX": 1.3, "SPY": 1.0}, date="2024-01-08 12:00")
+    assert row[online.position["SBUX"]] == 1.1
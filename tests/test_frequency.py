@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from sbux_model import features as ft
+from sbux_model.frequency import get_frequency, bars, scale_feature_defs
+
+
+@pytest.mark.parametrize("name, weeks, expected", [
+    ("weekly", 4, 4), ("weekly", 0.1, 1), ("weekly", 2.6, 3),
+    ("daily", 4, 20), ("daily", 1.5, 8), ("daily", 0.1, 1), ("hourly", 0.5, 18),
+])
+def test_bars_are_whole_rows(name, weeks, expected):
+    rows = bars(weeks, get_frequency(name))
+    assert rows == expected and isinstance(rows, int)
+
+
+def test_scaled_specs_keep_names_and_fractional_halflives(preprocessed, feature_defs):
+    feature_defs["beta_ts"]["halflives"] = [2.5]
+    daily = scale_feature_defs(feature_defs, get_frequency("daily"))
+    assert daily["stock_mom_4"]["bars"] == {"window": 20}
+    assert daily["beta_ts"]["bars"] == {"windows": [40, 130], "halflives": [12.5]}
+    assert "bars" not in feature_defs["stock_mom_4"]
+
+    frame = ft.build_features(preprocessed.copy(), daily)
+    assert {"SBUX_mom_4", "beta_ewm2.5", "alpha_8"} <= set(frame.columns)
+    assert np.isfinite(frame["SBUX_mom_4"].iloc[20]) and np.isnan(frame["SBUX_mom_4"].iloc[19])
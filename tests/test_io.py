@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model.io import save_table, read_table, save_matrix, read_matrix
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2020-01-06", periods=30, freq="W-MON", name="Date")
+    return pd.DataFrame({"a": rng.normal(size=30), "b": rng.normal(size=30), "n": np.arange(30)}, index=index)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+def test_table_round_trip(tmp_path, monkeypatch, table, fmt):
+    monkeypatch.chdir(tmp_path)
+    path = save_table(table, "stage", {"filename": "", "format": fmt})
+    assert path.endswith("." + fmt)
+
+    loaded = read_table("stage")
+    pd.testing.assert_frame_equal(loaded, table, check_freq=False)
+    # Only the requested columns, in the requested order, with the index
+    pd.testing.assert_frame_equal(read_table("stage", columns=["n", "a"]), table[["n", "a"]], check_freq=False)
+
+
+def test_format_from_filename(tmp_path, monkeypatch, table):
+    monkeypatch.chdir(tmp_path)
+    path = save_table(table, "stage", {"filename": "fixed.parquet"})
+    assert path == "data/stage/fixed.parquet"
+    pd.testing.assert_frame_equal(read_table("stage", {"filename": "fixed.parquet"}), table, check_freq=False)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_matrix_round_trip(tmp_path, monkeypatch, table, dtype):
+    monkeypatch.chdir(tmp_path)
+    _, _, index_path = save_matrix(table, "stage", {"dtype": dtype}, leading=["n", "a"])
+    matrix = read_matrix("stage")
+
+    assert matrix.columns == ["n", "a", "b"]
+    pd.testing.assert_index_equal(matrix.index, table.index, exact=False)
+    expected = table[["n", "a"]].astype(dtype)
+    # The leading columns are adjacent: one view of the memory map, no copy
+    features = matrix.frame(["n", "a"])
+    pd.testing.assert_frame_equal(features, expected, check_freq=False)
+    assert np.shares_memory(features.to_numpy(), matrix.values)
+    pd.testing.assert_frame_equal(matrix.frame(["b", "n"]), table[["b", "n"]].astype(dtype), check_freq=False)
+    assert matrix.frame([]).shape == (30, 0)
+    # Dates are stored as datetime64, loadable without pickle
+    assert np.load(index_path, allow_pickle=False).dtype.kind == "M"
+
+
+def test_matrix_rejects_object_index(tmp_path, monkeypatch, table):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError):
+        save_matrix(table.set_index(table.index.strftime("%Y-%m-%d")), "stage")
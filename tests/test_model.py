@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import mean_squared_error
+
+from sbux_model.model import (build_pipeline, walk_forward_eval, walk_forward_eval_linear,
+                              walk_forward_eval_nested, walk_forward_windows, walk_forward_configs,
+                              alpha_grid)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(1)
+    n, k = 150, 6
+    index = pd.date_range("2015-01-05", periods=n, freq="W-MON")
+    X = pd.DataFrame(rng.normal(size=(n, k)) * rng.uniform(0.5, 5, k), index=index,
+                     columns=[f"x{i}" for i in range(k)])
+    y = pd.Series(X.to_numpy() @ rng.normal(0, 0.01, k) + rng.normal(0, 0.05, n), index=index)
+    return X, y
+
+
+@pytest.mark.parametrize("model_cfg", [
+    {"type": "linear"},
+    {"type": "ridge", "alpha": 20.0},
+    {"type": "ridge", "alpha": 5.0, "fit_intercept": False},
+])
+@pytest.mark.parametrize("expanding", [False, True])
+def test_closed_form_matches_sklearn(data, model_cfg, expanding):
+    X, y = data
+    preds, truths, metrics = walk_forward_eval(X, y, build_pipeline(model_cfg), 60, 7, expanding)
+    fast_preds, fast_truths, fast_metrics = walk_forward_eval_linear(
+        X, y, 60, 7, expanding,
+        alpha=model_cfg.get("alpha", 0.0), fit_intercept=model_cfg.get("fit_intercept", True)
+    )
+    np.testing.assert_allclose(fast_preds.to_numpy(), preds.to_numpy(), rtol=1e-8, atol=1e-12)
+    pd.testing.assert_index_equal(fast_preds.index, preds.index)
+    pd.testing.assert_series_equal(fast_truths, truths, check_names=False)
+    assert fast_metrics["n_oos"] == metrics["n_oos"]
+    assert fast_metrics["r2_oos"] == pytest.approx(metrics["r2_oos"], rel=1e-8)
+
+
+def test_closed_form_refresh_does_not_change_predictions(data):
+    X, y = data
+    exact, _, _ = walk_forward_eval_linear(X, y, 40, 3, alpha=1.0, refresh=1)
+    running, _, _ = walk_forward_eval_linear(X, y, 40, 3, alpha=1.0, refresh=1000)
+    np.testing.assert_allclose(running.to_numpy(), exact.to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+def test_alpha_sweep_matches_one_fit_per_alpha(data):
+    X, y = data
+    alphas = [1.0, 20.0]
+    preds, _, metrics = walk_forward_eval(X, y, build_pipeline({"type": "ridge"}), 60, 7, alphas=alphas)
+    for alpha in alphas:
+        single, _, single_metrics = walk_forward_eval(X, y, build_pipeline({"type": "ridge", "alpha": alpha}), 60, 7)
+        np.testing.assert_allclose(preds[alpha].to_numpy(), single.to_numpy(), rtol=1e-8, atol=1e-12)
+        assert metrics[alpha]["r2_oos"] == pytest.approx(single_metrics["r2_oos"], rel=1e-8)
+
+
+@pytest.mark.parametrize("expanding", [False, True])
+def test_nested_matches_brute_force(data, expanding):
+    X, y = data
+    alphas, validation = [0.1, 5.0, 50.0, 500.0], 15
+    preds, truths, _, chosen = walk_forward_eval_nested(X, y, 60, 7, alphas, validation, expanding)
+
+    expected_preds, expected_chosen = [], []
+    for tr_start, te_start, te_end in walk_forward_windows(len(X), 60, 7, expanding):
+        fit, val = slice(tr_start, te_start - validation), slice(te_start - validation, te_start)
+        errors = []
+        for alpha in alphas:
+            pipeline = build_pipeline({"type": "ridge", "alpha": alpha}).fit(X.iloc[fit], y.iloc[fit])
+            errors.append(mean_squared_error(y.iloc[val], pipeline.predict(X.iloc[val])))
+        best = alphas[int(np.argmin(errors))]
+        pipeline = build_pipeline({"type": "ridge", "alpha": best}).fit(X.iloc[tr_start:te_start],
+                                                                        y.iloc[tr_start:te_start])
+        expected_preds.extend(pipeline.predict(X.iloc[te_start:te_end]))
+        expected_chosen.append(best)
+
+    np.testing.assert_allclose(preds.to_numpy(), expected_preds, rtol=1e-8, atol=1e-12)
+    assert list(chosen) == expected_chosen
+    assert len(truths) == len(expected_preds)
+
+
+def test_alpha_grid_rejects_bad_grids(data):
+    for alphas in [[], [1.0, 1.0], [-1.0, 2.0]]:
+        with pytest.raises(ValueError):
+            alpha_grid(alphas)
+    X, y = data
+    with pytest.raises(ValueError):
+        walk_forward_eval(X, y, build_pipeline({"type": "lasso"}), 60, 7, alphas=[1.0, 2.0])
+
+
+def test_process_pool_matches_serial(data):
+    X, y = data
+    pipeline = build_pipeline({"type": "ridge", "alpha": 20.0})
+    serial, _, serial_metrics = walk_forward_eval(X, y, pipeline, 60, 7)
+    serial_coef = pipeline.named_steps["model"].coef_.copy()
+    parallel, _, parallel_metrics = walk_forward_eval(X, y, pipeline, 60, 7, n_jobs=2)
+    pd.testing.assert_series_equal(parallel, serial)
+    assert parallel_metrics == serial_metrics
+    # Left fitted on the last training window either way
+    np.testing.assert_array_equal(pipeline.named_steps["model"].coef_, serial_coef)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_walk_forward_configs_match_single_runs(data, n_jobs):
+    X, y = data
+    configs = [
+        {"model": {"type": "ridge", "alpha": 5.0}, "train_window": 60, "horizon": 7},
+        {"model": {"type": "linear"}, "train_window": 50, "horizon": 4, "expanding": True, "features": ["x3", "x0"]},
+    ]
+    results = walk_forward_configs(X, y, configs, n_jobs=n_jobs)
+    for cfg, (preds, truths, metrics) in zip(configs, results):
+        features = cfg.get("features", list(X.columns))
+        expected, expected_truths, expected_metrics = walk_forward_eval(
+            X[features], y, build_pipeline(cfg["model"]), cfg["train_window"], cfg["horizon"],
+            cfg.get("expanding", False))
+        np.testing.assert_allclose(preds.to_numpy(), expected.to_numpy(), rtol=1e-10)
+        pd.testing.assert_index_equal(preds.index, expected.index)
+        assert metrics["r2_oos"] == pytest.approx(expected_metrics["r2_oos"], rel=1e-10)
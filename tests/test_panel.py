@@ -0,0 +1,35 @@
+import os
+import json
+
+import pandas as pd
+
+from sbux_model import features as ft
+from sbux_model.panel import build_panel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def panel_defs():
+    with open(os.path.join(ROOT, "src", "config", "features_config.json")) as f:
+        return json.load(f)["panel"]["features"]
+
+
+def test_panel_matches_single_asset_features(preprocessed):
+    assets = ["SBUX", "MCD", "XLY"]
+    panel = build_panel(preprocessed[assets], preprocessed["SPY"], panel_defs(), window=52)
+    assert list(panel.index.get_level_values("asset")[:3]) == assets
+
+    for asset in assets:
+        single = ft.compute_residual_alpha(preprocessed.copy(), asset_col=asset, benchmark_col="SPY", window=52)
+        single["price"] = single[asset]
+        single = ft.apply_features(single, panel_defs())
+        rows = panel.xs(asset, level="asset")
+        pd.testing.assert_frame_equal(rows, single[rows.columns], check_freq=False, check_names=False,
+                                      rtol=1e-9, atol=1e-12)
+
+
+def test_chunks_do_not_change_the_panel(preprocessed):
+    assets = ["SBUX", "MCD", "XLY", "SPY"]
+    whole = build_panel(preprocessed[assets], preprocessed["SPY"], panel_defs())
+    chunked = build_panel(preprocessed[assets], preprocessed["SPY"], panel_defs(), chunk_size=3)
+    pd.testing.assert_frame_equal(chunked, whole)
@@ -0,0 +1,44 @@
+import time
+import threading
+
+import pandas as pd
+
+from sbux_model import pipeline as pl
+
+CONFIGS = {
+    "preprocessing": {"stage_name": "preprocessing"},
+    "features": {"stage_name": "features", "input_stage": "preprocessing"},
+    "model": {"stage_name": "model", "input_stage": "features"},
+    "dashboard": {"stage_name": "dashboard", "model_stage": "model", "preproc_stage": "preprocessing"},
+}
+
+
+def test_concurrent_stages_read_a_shared_upstream_once(monkeypatch):
+    reads = []
+    lock = threading.Lock()
+
+    def slow_read_table(stage_name, config=None):
+        with lock:
+            reads.append(stage_name)
+        # Dashboard asks for preprocessing while features is still reading it
+        time.sleep(0.1 if stage_name == "preprocessing" else 0.01)
+        return pd.DataFrame({"x": [1.0]}, index=[stage_name])
+
+    monkeypatch.setattr(pl, "read_table", slow_read_table)
+    monkeypatch.setitem(pl.STAGE_FUNCTIONS, "features", lambda config, df: df.assign(f=2.0))
+    monkeypatch.setitem(pl.STAGE_FUNCTIONS, "dashboard", lambda config, model_df, preproc_df: (model_df, preproc_df))
+
+    results = pl.run_pipeline(["features", "dashboard"], max_workers=2, configs=CONFIGS)
+    assert sorted(reads) == ["model", "preprocessing"]
+    assert list(results["features"].index) == ["preprocessing"]
+    model_df, preproc_df = results["dashboard"]
+    assert list(model_df.index) == ["model"] and list(preproc_df.index) == ["preprocessing"]
+
+
+def test_downstream_stages_get_the_output_in_memory(monkeypatch):
+    monkeypatch.setattr(pl, "read_table", lambda stage_name, config=None: pd.DataFrame({"x": [1.0]}))
+    monkeypatch.setitem(pl.STAGE_FUNCTIONS, "features", lambda config, df: df.assign(f=2.0))
+    monkeypatch.setitem(pl.STAGE_FUNCTIONS, "model", lambda config, df: {"predictions": df.assign(p=3.0)})
+
+    results = pl.run_pipeline(["model", "features"], configs=CONFIGS)
+    assert list(results["model"]["predictions"].columns) == ["x", "f", "p"]
@@ -0,0 +1,120 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model import pipeline as pl
+from sbux_model import preprocessing as pp
+from sbux_model.stages import raw_sources, vintage_sources
+from sbux_model.store import TimeSeriesStore
+
+
+# ---------------------------------------------------------------
+# Point-in-time vintages
+# ---------------------------------------------------------------
+def random_vintages(rng, n_obs=30, n_releases=120):
+    """Monthly observations of two series, each released and then revised at random dates."""
+    obs = pd.date_range("2018-01-01", periods=n_obs, freq="MS")
+    rows = []
+    for _ in range(n_releases):
+        date = obs[rng.integers(n_obs)]
+        release = date + pd.Timedelta(days=int(rng.integers(10, 400)))
+        series = ["CPI", "fed_funds_rate"][rng.integers(2)]
+        rows.append({"realtime_start": release, "date": date, series: float(rng.normal())})
+    return pd.DataFrame(rows, columns=pp.VINTAGE_KEYS + ["CPI", "fed_funds_rate"])
+
+
+def brute_force_asof(vintages, dates):
+    out = pd.DataFrame(np.nan, index=pd.DatetimeIndex(dates), columns=["CPI", "fed_funds_rate"])
+    for col in out.columns:
+        releases = vintages.dropna(subset=[col])
+        for date in out.index:
+            known = releases[releases["realtime_start"] <= date]
+            if known.empty:
+                continue
+            latest = known[known["date"] == known["date"].max()]
+            out.loc[date, col] = latest.sort_values("realtime_start", kind="stable")[col].iloc[-1]
+    return out
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_asof_vintages_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    vintages = random_vintages(rng).sort_values(pp.VINTAGE_KEYS, kind="stable").reset_index(drop=True)
+    dates = pd.date_range("2017-12-04", "2021-06-28", freq="W-MON")
+    pd.testing.assert_frame_equal(pp.asof_vintages(vintages, dates), brute_force_asof(vintages, dates),
+                                  check_freq=False)
+
+
+# ---------------------------------------------------------------
+# Streaming vs batch preprocessing
+# ---------------------------------------------------------------
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A project directory with daily, weekly and vintage raw files, as the working directory."""
+    rng = np.random.default_rng(3)
+    (tmp_path / "src" / "config").mkdir(parents=True)
+    (tmp_path / "data" / "raw").mkdir(parents=True)
+    with open(tmp_path / "src" / "config" / "pipeline_config.json", "w") as f:
+        json.dump({"frequency": "weekly", "store": {"enabled": False}}, f)
+
+    days = pd.bdate_range("2019-01-01", "2020-06-30")
+    pd.DataFrame({"Date": days, "SBUX": 100 + np.cumsum(rng.normal(size=len(days)))}) \
+        .to_csv(tmp_path / "data" / "raw" / "SBUX_weekly.csv", index=False)
+    pd.DataFrame({"Date": days, "hl_range": np.abs(rng.normal(size=len(days)))}) \
+        .to_csv(tmp_path / "data" / "raw" / "micro_weekly.csv", index=False)
+    weeks = pd.date_range("2018-12-31", "2020-07-06", freq="W-MON")
+    rate = pd.Series(rng.normal(size=len(weeks))).where(np.arange(len(weeks)) % 4 == 0)
+    pd.DataFrame({"Date": weeks, "rate": rate}).to_csv(tmp_path / "data" / "raw" / "rate_weekly.csv", index=False)
+    random_vintages(rng).to_csv(tmp_path / "data" / "raw" / "CPI_vintages.csv", index=False)
+    pd.DataFrame({"Date": weeks, "CPI": 1.0}).to_csv(tmp_path / "data" / "raw" / "CPI_weekly.csv", index=False)
+
+    monkeypatch.chdir(tmp_path)
+    return {
+        "raw_files": {
+            "SBUX": {"filename": "data/raw/SBUX_{frequency}.csv", "preprocessing": "resample_weekly_last"},
+            "micro": {"filename": "data/raw/micro_{frequency}.csv", "preprocessing": "resample_weekly_mean"},
+            "rate": {"filename": "data/raw/rate_{frequency}.csv", "preprocessing": "resample_weekly_ffill"},
+            "CPI": {"filename": "data/raw/CPI_{frequency}.csv", "preprocessing": "resample_weekly_ffill",
+                    "vintages": "data/raw/CPI_vintages.csv"},
+        },
+        "quality": {"enabled": False},
+    }
+
+
+@pytest.mark.parametrize("point_in_time", [False, True])
+@pytest.mark.parametrize("chunksize", [3, 50, 100_000])
+def test_streaming_matches_batch(project, point_in_time, chunksize):
+    config = {**project, "point_in_time": {"enabled": point_in_time}}
+    batch = pl.preprocess(config)
+    streamed = pl.preprocess({**config, "streaming": {"enabled": True, "chunksize": chunksize}})
+    assert len(batch) > 50
+    # Point-in-time CPI comes from the vintages, not the revised weekly file
+    assert (batch["CPI"] != 1.0).any() == point_in_time
+    pd.testing.assert_frame_equal(streamed[batch.columns], batch, check_freq=False)
+
+
+def _enable_store():
+    with open(os.path.join("src", "config", "pipeline_config.json"), "w") as f:
+        json.dump({"frequency": "weekly", "store": {"enabled": True, "path": "data/store/ts.sqlite"}}, f)
+
+
+@pytest.mark.parametrize("point_in_time", [False, True])
+def test_store_matches_csv(project, point_in_time):
+    config = {**project, "point_in_time": {"enabled": point_in_time}}
+    batch = pl.preprocess(config)
+    with TimeSeriesStore("data/store/ts.sqlite") as store:
+        for _, path, _ in raw_sources(config):
+            store.import_csv(path)
+        for path in vintage_sources(config).values():
+            store.import_vintages_csv(path)
+    _enable_store()
+    pd.testing.assert_frame_equal(pl.preprocess(config), batch, check_freq=False)
+
+
+def test_streaming_rejects_store(project):
+    _enable_store()
+    with pytest.raises(ValueError, match="store"):
+        pl.preprocess({**project, "streaming": {"enabled": True}})
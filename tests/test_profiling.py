@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+import pytest
+
+from sbux_model import profiling
+
+
+@pytest.fixture
+def recording():
+    profiling.reset()
+    profiling.enable()
+    yield
+    profiling.disable()
+    profiling.reset()
+
+
+@profiling.instrument
+def halve(a):
+    return a[: len(a) // 2]
+
+
+def test_disabled_hooks_record_nothing():
+    profiling.disable()
+    profiling.reset()
+    with profiling.span("block", rows=3) as s:
+        pass
+    assert halve(np.zeros(10)).shape == (5,)
+    assert s is profiling._NULL_SPAN
+    assert profiling.events() == []
+
+
+def test_spans_and_instrumented_calls_are_recorded(recording):
+    with profiling.span("block", rows=3, column="x"):
+        halve(np.zeros(10))
+    halve(np.zeros(4))
+
+    events = profiling.events()
+    assert [e["name"] for e in events] == ["test_profiling.halve", "block", "test_profiling.halve"]
+    assert events[0]["args"] == {"rows_in": 10, "rows_out": 5}
+    assert events[1]["args"] == {"rows": 3, "column": "x"}
+    # The span encloses the call it timed
+    assert events[1]["ts"] <= events[0]["ts"] and events[0]["dur"] <= events[1]["dur"]
+
+    summary = profiling.summary()
+    assert summary["test_profiling.halve"]["calls"] == 2
+    assert summary["test_profiling.halve"]["rows_in"] == 14
+
+
+@pytest.mark.parametrize("fmt", ["chrome", "json"])
+def test_trace_formats(recording, tmp_path, fmt):
+    halve(np.zeros(6))
+    path = profiling.write_trace(str(tmp_path / "trace.json"), stage_name="stage", fmt=fmt)
+    with open(path) as f:
+        trace = json.load(f)
+    if fmt == "chrome":
+        assert trace["traceEvents"][0]["ph"] == "X" and trace["otherData"]["stage"] == "stage"
+    else:
+        assert trace["events"][0]["args"]["rows_out"] == 3
+    with pytest.raises(ValueError):
+        profiling.write_trace(str(tmp_path / "x.json"), fmt="svg")
+
+
+def test_enable_from_env(monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, "0")
+    assert not profiling.enable_from_env()
+    monkeypatch.setenv(profiling.PROFILE_ENV, "on")
+    assert profiling.enable_from_env()
+    profiling.disable()
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model.quality import longest_runs, mask_runs, quality_report, robust_center_scale
+
+
+def brute_force_runs(column):
+    """(start, length) of each run of True, by walking the column."""
+    runs, start = [], None
+    for i, v in enumerate(list(column) + [False]):
+        if v and start is None:
+            start = i
+        elif not v and start is not None:
+            runs.append((start, i - start))
+            start = None
+    return runs
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_runs_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    mask = rng.random((50, 6)) < [0.0, 0.2, 0.5, 0.8, 1.0, 0.5]
+    mask[:, 5] = mask[::-1, 5]
+
+    cols, starts, lengths = mask_runs(mask)
+    longest, start, n_runs = longest_runs(mask)
+    for j in range(mask.shape[1]):
+        runs = brute_force_runs(mask[:, j])
+        assert list(zip(starts[cols == j], lengths[cols == j])) == runs
+        assert n_runs[j] == len(runs)
+        if runs:
+            best = max(length for _, length in runs)
+            assert longest[j] == best
+            assert start[j] == next(s for s, length in runs if length == best)
+        else:
+            assert (longest[j], start[j]) == (0, -1)
+
+
+def test_robust_center_scale_matches_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.standard_t(3, size=(41, 4))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[:, 3] = np.nan
+
+    median, scale = robust_center_scale(values)
+    with pytest.warns(RuntimeWarning):
+        q25, q50, q75 = np.nanpercentile(values, [25, 50, 75], axis=0)
+    np.testing.assert_allclose(median, q50)
+    np.testing.assert_allclose(scale, (q75 - q25) / 1.349)
+
+
+def test_quality_report():
+    index = pd.date_range("2020-01-06", periods=8, freq="W-MON")
+    df = pd.DataFrame({
+        "a": [np.nan, np.nan, 1.0, 2.0, np.nan, 3.0, 4.0, 5.0],
+        "cpi": [1.0, 2.0, 2.0, 2.0, 2.0, 3.0, 3.0, 4.0],
+        "spike": [0.0, 0.1, -0.1, 0.05, 50.0, 0.0, -0.05, 0.1],
+        "name": list("abcdefgh"),
+    }, index=index)
+
+    report = quality_report(df, warmup=2, outlier_z=8.0)
+    assert report["rows"] == 8
+    assert list(report["columns"]) == ["a", "cpi", "spike"]
+
+    a = report["columns"]["a"]
+    assert (a["nan_count"], a["nan_runs"], a["longest_nan_run"]) == (3, 2, 2)
+    assert a["longest_nan_run_start"] == "2020-01-06"
+    assert (a["first_valid"], a["last_valid"]) == ("2020-01-20", "2020-02-24")
+
+    cpi = report["columns"]["cpi"]
+    assert (cpi["longest_stale_run"], cpi["longest_stale_run_start"]) == (4, "2020-01-13")
+    assert report["columns"]["spike"]["outliers"] == 1
+    assert report["columns"]["spike"]["longest_stale_run"] == 0
+
+    # Only the NaN in "a" after the two warmup rows
+    assert report["rows_with_nans"] == {"count": 1, "dates": {"2020-02-03": ["a"]}}
+
+
+def test_quality_report_lists_at_most_max_rows():
+    df = pd.DataFrame({"x": np.nan, "y": [1.0, np.nan] * 5}, index=range(10))
+    report = quality_report(df, max_rows=3)
+    assert report["rows_with_nans"]["count"] == 10
+    assert report["rows_with_nans"]["dates"] == {"0": ["x"], "1": ["x", "y"], "2": ["x"]}
+    assert report["columns"]["x"]["first_valid"] is None
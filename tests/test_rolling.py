@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model import rolling
+from sbux_model.features import beta_term_structure, term_structure_columns
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(2)
+    n = 300
+    bench = rng.normal(0, 0.02, n)
+    assets = bench[:, None] * [0.8, 1.2, 1.0] + rng.normal(0, 0.01, (n, 3))
+    bench[[10, 11, 150]] = np.nan
+    assets[[40, 200], 0] = np.nan
+    assets[:30, 2] = np.nan   # listed later
+    return assets, bench
+
+
+def test_multi_window_beta_matches_pandas(returns):
+    x, y = returns
+    windows = [13, 26, 52, 400]
+    betas = rolling.multi_window_beta(x, y, windows)
+    bench = pd.Series(y)
+    for window in windows:
+        for j in range(x.shape[1]):
+            asset = pd.Series(x[:, j])
+            expected = asset.rolling(window).cov(bench) / bench.where(asset.notna()).rolling(window).var()
+            np.testing.assert_allclose(betas[window][:, j], expected, rtol=1e-8, atol=1e-12,
+                                       err_msg=f"window {window}, asset {j}")
+        np.testing.assert_allclose(betas[window][:, 0], rolling.rolling_beta(x[:, 0], y, window),
+                                   rtol=1e-8, atol=1e-12)
+
+
+def test_ewm_beta_matches_pandas(returns):
+    x, y = returns
+    halflives = [4, 26]
+    betas = rolling.ewm_beta(x, y, halflives)
+    bench = pd.Series(y)
+    for halflife in halflives:
+        for j in range(x.shape[1]):
+            asset = pd.Series(x[:, j])
+            expected = asset.ewm(halflife=halflife).cov(bench) / bench.ewm(halflife=halflife).var()
+            np.testing.assert_allclose(betas[halflife][:, j], expected, rtol=1e-8, atol=1e-12,
+                                       err_msg=f"halflife {halflife}, asset {j}")
+
+
+@pytest.mark.parametrize("split", [1, 100, 299])
+def test_ewm_sums_continue_exactly(returns, split):
+    x, y = returns[0][:, 0], returns[1]
+    whole = rolling.ewm_beta_sums(x, y, 8)
+    head = rolling.ewm_beta_sums(x[:split], y[:split], 8)
+    tail = rolling.ewm_beta_sums(x[split:], y[split:], 8, init=head[-1])
+    np.testing.assert_allclose(np.vstack([head, tail]), whole, rtol=1e-12)
+    np.testing.assert_allclose(rolling.beta_from_ewm_sums(whole), rolling.ewm_beta(x, y, [8])[8],
+                               rtol=1e-8, atol=1e-12)
+
+
+def test_beta_term_structure(returns):
+    x, y = returns
+    out = beta_term_structure(x, y, windows=[13, 52], halflives=[8], labels=(["3m", "1y"], ["2m"]))
+    assert list(out) == term_structure_columns(["3m", "1y"], ["2m"])
+    np.testing.assert_array_equal(out["beta_1y"], rolling.multi_window_beta(x, y, [52])[52])
+    np.testing.assert_allclose(out["alpha_ewm2m"], x - out["beta_ewm2m"] * y[:, None])
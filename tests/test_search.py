@@ -0,0 +1,81 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model.frequency import get_frequency
+from sbux_model.model import build_pipeline, oos_metrics, walk_forward_eval
+from sbux_model.search import expand_space, run_search, write_leaderboard
+
+TRAIN_CFG = {
+    "target": "y",
+    "feature_columns": ["x0", "x1", "x2"],
+    "test": {"train_window": 228, "horizon": 4, "expanding": False},
+    "model": {"type": "ridge", "alpha": 20.0},
+}
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(3)
+    n, k = 160, 4
+    index = pd.date_range("2015-01-05", periods=n, freq="W-MON")
+    X = pd.DataFrame(rng.normal(size=(n, k)), index=index, columns=[f"x{i}" for i in range(k)])
+    y = pd.Series(X.to_numpy() @ rng.normal(0, 0.01, k) + rng.normal(0, 0.05, n), index=index)
+    return X, y
+
+
+def test_star_is_the_train_config_baseline():
+    space = {
+        "feature_columns": ["*", ["x0"]],
+        "train_window": ["*", 156, 228],
+        "horizon": ["*", 8],
+        "model": ["*", {"type": "ridge", "alpha": 20.0}],
+    }
+    candidates = expand_space(space, TRAIN_CFG)
+
+    assert sorted({c["train_window"] for c in candidates}) == [156, 228]
+    assert sorted({c["horizon"] for c in candidates}) == [4, 8]
+    assert all(c["model"] == TRAIN_CFG["model"] for c in candidates)
+    # "*" and the explicit duplicates collapse: 2 feature sets x 2 windows x 2 horizons x 1 model
+    assert len(candidates) == 8
+    assert {"features": ["x0", "x1", "x2"], "train_window": 228, "horizon": 4, "expanding": False,
+            "model": TRAIN_CFG["model"]} in candidates
+
+
+def test_grid_matches_walk_forward_eval(data):
+    X, y = data
+    candidates = expand_space({
+        "feature_columns": [["x0", "x1"], ["x1", "x2", "x3"]],
+        "train_window": [60],
+        # 100 OOS rows in whole horizons, so no partial last window
+        "horizon": [5],
+        "model": [{"type": "ridge", "alpha": 5.0}, {"type": "linear"}],
+    }, TRAIN_CFG)
+    leaderboard, info = run_search(X, y, candidates, freq=get_frequency("weekly"))
+
+    assert len(leaderboard) == len(candidates)
+    for entry in leaderboard:
+        preds, truths, metrics = walk_forward_eval(X[entry["features"]], y, build_pipeline(entry["model"]), 60, 5)
+        assert entry["n_oos"] == metrics["n_oos"]
+        assert entry["r2_oos"] == pytest.approx(metrics["r2_oos"], rel=1e-8)
+    assert [e["rank"] for e in leaderboard] == list(range(1, len(candidates) + 1))
+    assert [e["r2_oos"] for e in leaderboard] == sorted((e["r2_oos"] for e in leaderboard), reverse=True)
+    assert info["zero_baseline"] == oos_metrics(y.to_numpy()[60:], np.zeros(len(y) - 60))
+
+
+def test_leaderboard_in_its_own_folder(data, tmp_path, monkeypatch):
+    X, y = data
+    monkeypatch.chdir(tmp_path)
+    candidates = expand_space({"train_window": [60], "horizon": [7]}, TRAIN_CFG)
+    leaderboard, info = run_search(X, y, candidates, freq=get_frequency("weekly"))
+
+    path = write_leaderboard(leaderboard, info, {"stage_name": "search", "strategy": "grid"}, TRAIN_CFG)
+    assert os.path.dirname(path) == os.path.join("data", "search")
+    assert not os.path.exists(tmp_path / "data" / "model")
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["best"]["feature_columns"] == TRAIN_CFG["feature_columns"]
+    assert saved["best"]["test"]["train_window"] == 60
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+
+from sbux_model import cache
+from sbux_model import features as ft
+from sbux_model.artifact import LinearPredictor, export_linear, latest_artifact_path
+from sbux_model.serve import Scorer
+
+
+def bars(df, columns):
+    return [{"Date": str(date), **dict(zip(columns, values))}
+            for date, values in zip(df.index, df[columns].to_numpy(dtype=float))]
+
+
+def test_scores_match_batch_features_and_provisional_bars_are_undone(preprocessed, feature_defs):
+    columns = ["gt_interest_diff_1", "alpha_lag1", "alpha_ma4", "beta_ewm8"]
+    model = LinearPredictor(np.array([0.1, -0.2, 0.3, 0.05]), 0.01, columns)
+    scorer = Scorer(model, feature_defs, columns)
+    inputs = scorer.features.input_columns
+    scorer.warm_up(preprocessed.iloc[:-3])
+
+    last = bars(preprocessed.iloc[-3:], inputs)
+    provisional = scorer.score(last[0], commit=False)
+    assert scorer.score(last[0]) == provisional
+    out = scorer.score_batch(last[1:])
+
+    batch = ft.build_features(preprocessed.copy(), feature_defs)
+    expected = model.predict(batch[columns].iloc[-3:].to_numpy())
+    np.testing.assert_allclose([provisional["pred_alpha_fwd_1"]] + [o["pred_alpha_fwd_1"] for o in out],
+                               expected, rtol=1e-9)
+
+
+def test_bundle_loads_after_a_cache_hit_renames_it(tmp_path, monkeypatch):
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data/model")
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(50, 3)), rng.normal(size=50)
+    pipeline = Pipeline([("scaler", StandardScaler()), ("model", Ridge(alpha=1.0))]).fit(X, y)
+    paths = export_linear(pipeline, "data/model/model_20200101_000000", ["a", "b", "c"], "alpha_fwd_1")
+
+    cache.record("model", "key", paths)
+    renamed = cache.lookup("model", "key")
+    assert "20200101_000000" not in renamed[0]
+    model = LinearPredictor.load(latest_artifact_path("model"))
+    np.testing.assert_allclose(model.predict(X), pipeline.predict(X), rtol=1e-10)
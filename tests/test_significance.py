@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from sbux_model.model import oos_metrics
+from sbux_model.significance import (batch_metrics, block_permutation_indices, resample_metrics, significance,
+                                     stationary_bootstrap_indices)
+
+
+@pytest.fixture
+def oos():
+    rng = np.random.default_rng(5)
+    truths = rng.normal(0, 0.03, 150)
+    preds = 0.2 * truths + rng.normal(0, 0.01, 150)
+    return truths, preds
+
+
+def test_stationary_bootstrap_blocks():
+    n, mean_block = 100, 5
+    new_rate = []
+    for seed in range(3):
+        idx = stationary_bootstrap_indices(n, 200, mean_block, np.random.default_rng(seed))
+        assert idx.shape == (200, n)
+        assert idx.min() >= 0 and idx.max() < n
+        # Every row continues the previous one (wrapping), except where a block starts
+        new_rate.append(np.mean(idx[:, 1:] != (idx[:, :-1] + 1) % n))
+    assert np.mean(new_rate) == pytest.approx(1 / mean_block, abs=0.01)
+
+
+@pytest.mark.parametrize("block", [1, 4, 7])
+def test_block_permutations(block):
+    n = 30
+    idx = block_permutation_indices(n, 50, block, np.random.default_rng(0))
+    assert (np.sort(idx, axis=1) == np.arange(n)).all()
+    # Rows inside a block stay in order after their block's first row
+    inside = idx[:, 1:] % block != 0
+    assert (idx[:, 1:][inside] == idx[:, :-1][inside] + 1).all()
+
+
+def test_batch_metrics_match_oos_metrics(oos):
+    truths, preds = oos
+    metrics = batch_metrics(truths, preds)
+    expected = oos_metrics(truths, preds)
+    assert metrics["r2_oos"] == pytest.approx(expected["r2_oos"])
+    assert metrics["rmse_oos"] == pytest.approx(expected["rmse_oos"])
+    assert metrics["r2_gain"] == pytest.approx(expected["r2_oos"] - oos_metrics(truths, np.zeros_like(truths))["r2_oos"])
+
+
+@pytest.mark.parametrize("kind", ["bootstrap", "permutation"])
+def test_resampled_metrics_match_brute_force(oos, kind):
+    truths, preds = oos
+    n_resamples, batch_size, block = 230, 100, 4
+    result = resample_metrics(truths, preds, kind, n_resamples, block, seed=7, batch_size=batch_size)
+
+    expected = []
+    for seed, size in zip(np.random.SeedSequence(7).spawn(3), [100, 100, 30]):
+        rng = np.random.default_rng(seed)
+        if kind == "bootstrap":
+            idx = stationary_bootstrap_indices(len(truths), size, block, rng)
+            expected.append(batch_metrics(truths[idx], preds[idx]))
+        else:
+            idx = block_permutation_indices(len(truths), size, block, rng)
+            expected.append(batch_metrics(np.broadcast_to(truths, idx.shape), preds[idx]))
+    for k, values in result.items():
+        assert values.shape == (n_resamples,)
+        np.testing.assert_allclose(values, np.concatenate([e[k] for e in expected]), rtol=1e-9, err_msg=k)
+
+
+def test_same_results_for_any_n_jobs(oos):
+    truths, preds = oos
+    serial = resample_metrics(truths, preds, "bootstrap", 300, 3, seed=1, batch_size=100)
+    parallel = resample_metrics(truths, preds, "bootstrap", 300, 3, seed=1, batch_size=100, n_jobs=2)
+    for k in serial:
+        np.testing.assert_array_equal(serial[k], parallel[k])
+
+
+def test_significance(oos):
+    truths, preds = oos
+    result = significance(truths, preds, n_resamples=999)
+    assert result["block"] == 5   # ~150^(1/3)
+    assert result["observed"]["r2_oos"] == pytest.approx(oos_metrics(truths, preds)["r2_oos"])
+    lo, hi = result["bootstrap"]["intervals"]["r2_gain"]
+    assert lo < result["observed"]["r2_gain"] < hi
+    # Strongly related predictions: no resample beats them or loses to zero
+    assert result["permutation"]["p_values"]["r2_oos"] == pytest.approx(1 / 1000)
+    assert result["bootstrap"]["p_no_gain"] == 0.0
+
+
+def test_significance_of_noise():
+    rng = np.random.default_rng(6)
+    truths = rng.normal(0, 0.03, 150)
+    preds = rng.normal(0, 0.01, 150)
+    result = significance(truths, preds, n_resamples=999)
+    assert result["permutation"]["p_values"]["r2_oos"] > 0.05
+    assert result["bootstrap"]["p_no_gain"] > 0.5
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sbux_model.preprocessing import VINTAGE_KEYS
+from sbux_model.store import TimeSeriesStore, open_store, series_name
+
+
+@pytest.fixture
+def store(tmp_path):
+    with TimeSeriesStore(str(tmp_path / "store" / "ts.sqlite")) as s:
+        yield s
+
+
+@pytest.fixture
+def prices():
+    index = pd.date_range("2020-01-06", periods=6, freq="W-MON", name="Date")
+    return pd.DataFrame({
+        "close": [10.0, 10.5, np.nan, 11.0, 11.2, 10.9],
+        "volume": np.arange(6, dtype=np.int64) * 100,
+        "adj": [1.0, 1.0, 1.0, 1.0, 0.5, 0.5],
+    }, index=index)
+
+
+def test_round_trip(store, prices):
+    assert store.append("SBUX_weekly", prices) == prices.size
+    out = store.read("SBUX_weekly")
+    # Column order, NaNs and the integer dtype survive
+    pd.testing.assert_frame_equal(out, prices, check_freq=False)
+    assert store.last_date("SBUX_weekly") == prices.index[-1]
+    assert store.last_date("missing") is None
+
+
+def test_append_keeps_and_upsert_overwrites(store, prices):
+    store.append("s", prices)
+    revised = prices.iloc[-2:] * 2
+    later = pd.DataFrame({"close": [12.0]}, index=pd.DatetimeIndex(["2020-02-17"], name="Date"))
+
+    store.append("s", pd.concat([revised, later]))
+    out = store.read("s")
+    pd.testing.assert_frame_equal(out.iloc[:6], prices.astype({"volume": float}), check_freq=False)
+    assert out["close"].iloc[-1] == 12.0 and np.isnan(out["volume"].iloc[-1])
+
+    store.upsert("s", revised)
+    np.testing.assert_array_equal(store.read("s")["close"].iloc[4:6], revised["close"])
+
+
+def test_read_ranges_fields_and_several_series(store, prices):
+    store.append("a", prices)
+    store.append("b", prices[["close"]] + 1)
+
+    out = store.read("a", start="2020-01-13", end="2020-01-27", fields=["adj", "close"])
+    assert list(out.index) == list(prices.index[1:4])
+    # Written order, not the order asked for
+    assert list(out.columns) == ["close", "adj"]
+
+    both = store.read(["b", "a"], fields=["close"])
+    assert list(both.columns) == [("b", "close"), ("a", "close")]
+    np.testing.assert_array_equal(both[("b", "close")], prices["close"] + 1)
+    assert store.read("a", start="2030-01-01").empty
+
+
+def test_vintages(store):
+    vintages = pd.DataFrame({
+        "realtime_start": pd.to_datetime(["2020-02-14", "2020-03-13", "2020-03-13", "2020-04-10"]),
+        "date": pd.to_datetime(["2020-01-01", "2020-01-01", "2020-02-01", "2020-03-01"]),
+        "CPI": [258.7, 258.8, 259.0, np.nan],
+    })
+    assert store.read_vintages("CPI_vintages").columns.tolist() == VINTAGE_KEYS
+
+    store.upsert_vintages("CPI_vintages", vintages)
+    pd.testing.assert_frame_equal(store.read_vintages("CPI_vintages"), vintages)
+    pd.testing.assert_frame_equal(store.read_vintages("CPI_vintages", released_by="2020-03-13"), vintages.iloc[:3])
+
+    revised = vintages.iloc[[3]].assign(CPI=260.1)
+    store.upsert_vintages("CPI_vintages", revised)
+    assert store.read_vintages("CPI_vintages")["CPI"].iloc[-1] == 260.1
+
+    listing = store.series().set_index("series")
+    assert listing.loc["CPI_vintages", "observations"] == 4
+
+
+def test_import_csv(store, prices, tmp_path):
+    path = str(tmp_path / "SBUX_weekly.csv")
+    prices.to_csv(path)
+    store.import_csv(path)
+    assert series_name(path) == "SBUX_weekly"
+    pd.testing.assert_frame_equal(store.read("SBUX_weekly"), prices, check_freq=False)
+
+
+def test_open_store(tmp_path):
+    assert open_store({"enabled": False}) is None
+    store = open_store({"enabled": True, "path": str(tmp_path / "ts.sqlite")})
+    assert isinstance(store, TimeSeriesStore)
+    store.close()